@@ -0,0 +1,438 @@
+#!/bin/python3
+
+"""
+Benchmark the card render path of create_card.
+
+A fixed corpus of synthetic cards (covering every type, level, translucency and effect style, long and
+short effects, and spells and units) is rendered with generated placeholder art, so the benchmark runs
+headless and without the real card art. It reports the time spent in each render stage, cards/second
+in one process and in a pool of worker processes, and the peak memory use, and compares the results
+against a stored baseline.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import platform
+import collections
+import concurrent.futures
+import PIL
+from PIL import Image
+
+import create_card
+
+# Import common methods from ttcg_tools.
+from ttcg_tools import output_text
+from ttcg_tools import write_file_atomically
+
+# Import constants from ttcg_constants.
+from ttcg_constants import TYPE_LIST
+from ttcg_constants import SUBTYPES_LIST
+from ttcg_constants import VALID_CARD_LEVELS
+from ttcg_constants import VALID_TRANSLUCENT_VALUES
+from ttcg_constants import VALID_OVERLAY_STYLES
+from ttcg_constants import CARD_OUTPUT_PROFILES
+from ttcg_constants import DEFAULT_CARD_OUTPUT_PROFILE
+from ttcg_constants import DEFAULT_CACHE_FOLDER
+
+
+# Bump this when the corpus or the measurements change, so older baselines are not compared against.
+RENDER_BENCHMARK_VERSION = 1
+DEFAULT_RENDER_BENCHMARK_BASELINE = os.path.join(DEFAULT_CACHE_FOLDER, "render_benchmark_baseline.json")
+DEFAULT_BENCHMARK_CARDS = 90
+
+# The create_card functions timed by the benchmark, and the stage their time is counted in. Time spent
+# in a nested timed function is only counted in the inner function's stage.
+RENDER_STAGES = {
+    "get_card_art": "asset_load",
+    "get_template_asset": "asset_load",
+    "get_frame_layer": "compositing",
+    "create_base_card": "compositing",
+    "draw_single_line_text": "text_fitting",
+    "draw_wrapped_text": "text_fitting",
+    "encode_card_image": "encode"
+}
+
+SHORT_EFFECTS = ["Draw one card.", "Destroy target spell.", "Gain 100 ATK until end of turn."]
+LONG_EFFECTS = [
+    "When this card is summoned, you may search your deck for a level 2 or lower aquatic card, reveal it, "
+    "add it to your hand, then shuffle your deck. You can only use this effect once per turn.",
+    "Until your next turn, all cards you control gain 200 DEF for each dragon or beast card in your graveyard, "
+    "and cannot be destroyed by effects of spells your opponent controls.",
+    "Discard two cards: Destroy all units your opponent controls with DEF lower than this card's ATK, then "
+    "each player draws cards equal to the number of units destroyed this way."
+]
+
+
+def create_placeholder_art(file_path, seed, size=(1024, 1024)):
+    """
+    Write a generated JPEG to stand in for card art.
+
+    Args:
+        file_path (str): The file to write.
+        seed (int): Selects the colors and orientation of the image.
+        size (tuple): The (width, height) of the image.
+    """
+    rng = random.Random(seed)
+    red = Image.linear_gradient("L").rotate(rng.randrange(360)).resize(size)
+    green = Image.radial_gradient("L").resize(size)
+    blue = Image.effect_noise(size, rng.randrange(16, 96))
+    Image.merge("RGB", (red, green, blue)).save(file_path, quality=90)
+
+
+def build_benchmark_corpus(num_cards=DEFAULT_BENCHMARK_CARDS, art_folder=None, seed=0):
+    """
+    Build the card data of the synthetic benchmark corpus.
+
+    Cards cycle through the types, levels, translucencies and effect styles, so any corpus of at least
+    len(TYPE_LIST) * len(VALID_OVERLAY_STYLES) cards covers every one of them. Every tenth card has no art.
+
+    Args:
+        num_cards (int): The number of cards.
+        art_folder (str, optional): The folder to write placeholder art to. If None, no card has art.
+        seed (int): The seed for the card values.
+
+    Returns:
+        list of dict: The card data (see create_card.render_card).
+    """
+    rng = random.Random(seed)
+    effects = SHORT_EFFECTS + LONG_EFFECTS + [""]
+    corpus = []
+    for i in range(num_cards):
+        card_type = TYPE_LIST[i % len(TYPE_LIST)]
+        level = VALID_CARD_LEVELS[(i // len(TYPE_LIST)) % len(VALID_CARD_LEVELS)]
+        if card_type == "Spell":
+            attack, defense = f"+{level * 10}", f"-{rng.randrange(level * 10 + 1)}"
+        else:
+            attack = str(rng.randrange(level * 500 + 1))
+            defense = str(level * 500 - int(attack))
+
+        image = ""
+        if art_folder is not None and i % 10 != 9:
+            image = os.path.join(art_folder, f"art-{i}.jpeg")
+            if not os.path.isfile(image):
+                create_placeholder_art(image, seed + i)
+
+        corpus.append({
+            "name": f"Benchmark {card_type} {rng.choice(SUBTYPES_LIST)} {i}",
+            "type": card_type,
+            "subtype": "" if card_type == "Spell" else ", ".join(rng.sample(SUBTYPES_LIST, 1 + i % 3)),
+            "level": level,
+            "image": image,
+            "attack": attack,
+            "defense": defense,
+            "effect1": effects[i % (len(effects) - 1)],
+            "effect2": effects[(i * 3 + 1) % len(effects)],
+            "serial": f"BENCH{i:05d}{rng.randrange(10)}",
+            "rarity": "0",
+            "translucency": VALID_TRANSLUCENT_VALUES[i % len(VALID_TRANSLUCENT_VALUES)],
+            "effect1_style": VALID_OVERLAY_STYLES[i % len(VALID_OVERLAY_STYLES)],
+            "effect2_style": VALID_OVERLAY_STYLES[(i * 3 + 1) % len(VALID_OVERLAY_STYLES)]
+        })
+    return corpus
+
+
+class StageTimer:
+    """
+    Times the render stages of create_card (see RENDER_STAGES) by wrapping the module's functions.
+    """
+
+    def __init__(self, stages=None):
+        """
+        Args:
+            stages (dict, optional): Maps create_card function names to stage names (Defaults to RENDER_STAGES).
+        """
+        self.stages = stages or RENDER_STAGES
+        self.totals = collections.defaultdict(float)
+        self.originals = {}
+        # The time spent in timed functions called by each timed function on the call stack.
+        self.child_times = []
+
+    def wrap(self, function, stage):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            self.child_times.append(0.0)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.totals[stage] += elapsed - self.child_times.pop()
+                if self.child_times:
+                    self.child_times[-1] += elapsed
+        return timed
+
+    def __enter__(self):
+        for name, stage in self.stages.items():
+            self.originals[name] = getattr(create_card, name)
+            setattr(create_card, name, self.wrap(self.originals[name], stage))
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, function in self.originals.items():
+            setattr(create_card, name, function)
+        self.originals = {}
+
+
+def clear_render_caches():
+    """
+    Empty every create_card cache, so a run starts cold.
+    """
+    for cache in (create_card.TEMPLATE_ASSET_BUFFER, create_card.FRAME_LAYER_BUFFER, create_card.FONT_BUFFER,
+                  create_card.FONT_FIT_BUFFER, create_card.TEXT_LENGTH_BUFFER, create_card.ART_BUFFER):
+        cache.clear()
+
+
+def render_encoded_card(card_data, profile=DEFAULT_CARD_OUTPUT_PROFILE):
+    """
+    Render and encode one card in memory, as a batch render would before writing it.
+
+    Args:
+        card_data (dict): The card data.
+        profile (str): The output profile to encode with (see CARD_OUTPUT_PROFILES).
+
+    Returns:
+        int: The size of the encoded card in bytes.
+    """
+    settings = create_card.get_output_profile(profile)
+    return len(create_card.render_card(card_data, encode=settings["format"], **settings["save_options"]))
+
+
+def run_single_core(corpus, profile=DEFAULT_CARD_OUTPUT_PROFILE):
+    """
+    Render the corpus in this process from cold caches, timing each stage.
+
+    Args:
+        corpus (list of dict): The card data to render.
+        profile (str): The output profile to encode with.
+
+    Returns:
+        dict: The seconds, cards_per_second and stage milliseconds per card (stages_ms_per_card).
+    """
+    clear_render_caches()
+    with StageTimer() as timer:
+        start = time.perf_counter()
+        for card_data in corpus:
+            render_encoded_card(card_data, profile)
+        seconds = time.perf_counter() - start
+
+    stages = dict(timer.totals)
+    stages["other"] = max(0.0, seconds - sum(stages.values()))
+    return {
+        "seconds": seconds,
+        "cards_per_second": len(corpus) / seconds,
+        "stages_ms_per_card": {stage: total * 1000 / len(corpus) for stage, total in sorted(stages.items())}
+    }
+
+
+def run_multi_core(corpus, jobs, profile=DEFAULT_CARD_OUTPUT_PROFILE):
+    """
+    Render the corpus in a pool of worker processes (including the pool start up).
+
+    Args:
+        corpus (list of dict): The card data to render.
+        jobs (int): The number of worker processes.
+        profile (str): The output profile to encode with.
+
+    Returns:
+        dict: The jobs, seconds and cards_per_second.
+    """
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=create_card.warm_render_caches) as executor:
+        list(executor.map(render_encoded_card, corpus, [profile] * len(corpus), chunksize=4))
+    seconds = time.perf_counter() - start
+    return {"jobs": jobs, "seconds": seconds, "cards_per_second": len(corpus) / seconds}
+
+
+def get_peak_rss_mb():
+    """
+    Get the peak resident memory of this process and of its largest finished worker process.
+
+    Returns:
+        dict: The peak RSS in MiB of this process (main) and of a worker process (worker).
+    """
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "main": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit,
+        "worker": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    }
+
+
+def run_benchmark(num_cards=DEFAULT_BENCHMARK_CARDS, jobs=None, profile=DEFAULT_CARD_OUTPUT_PROFILE,
+                  repeat=1, art_folder=None):
+    """
+    Run the render benchmark.
+
+    Args:
+        num_cards (int): The number of cards in the corpus.
+        jobs (int, optional): The number of worker processes for the multi-core run (Defaults to the CPU
+                              count). 0 skips the multi-core run.
+        profile (str): The output profile to encode with.
+        repeat (int): The number of times to run each measurement; the fastest run is kept.
+        art_folder (str, optional): The folder for the placeholder art (Defaults to a temporary folder).
+
+    Returns:
+        dict: The benchmark results.
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        corpus = build_benchmark_corpus(num_cards, art_folder or temp_folder)
+        single_core = min((run_single_core(corpus, profile) for _ in range(repeat)), key=lambda r: r["seconds"])
+        multi_core = None
+        if jobs > 0:
+            multi_core = min((run_multi_core(corpus, jobs, profile) for _ in range(repeat)), key=lambda r: r["seconds"])
+
+    return {
+        "version": RENDER_BENCHMARK_VERSION,
+        "cards": num_cards,
+        "profile": profile,
+        "single_core": single_core,
+        "multi_core": multi_core,
+        "peak_rss_mb": get_peak_rss_mb(),
+        "platform": {"python": platform.python_version(), "pillow": PIL.__version__, "cpus": os.cpu_count()}
+    }
+
+
+def get_benchmark_metrics(results):
+    """
+    Flatten the benchmark results into the metrics compared against a baseline.
+
+    Args:
+        results (dict): The results of run_benchmark.
+
+    Returns:
+        dict: Maps each metric name to (value, higher_is_better).
+    """
+    metrics = {"single_core cards/s": (results["single_core"]["cards_per_second"], True)}
+    for stage, ms in results["single_core"]["stages_ms_per_card"].items():
+        metrics[f"{stage} ms/card"] = (ms, False)
+    if results.get("multi_core"):
+        metrics[f"multi_core ({results['multi_core']['jobs']} jobs) cards/s"] = (results["multi_core"]["cards_per_second"], True)
+    for process, mb in results["peak_rss_mb"].items():
+        metrics[f"peak RSS {process} MiB"] = (mb, False)
+    return metrics
+
+
+def compare_to_baseline(results, baseline, tolerance=0.1):
+    """
+    Compare benchmark results against a baseline.
+
+    Args:
+        results (dict): The results of run_benchmark.
+        baseline (dict): Earlier results of run_benchmark.
+        tolerance (float): The relative change that counts as a regression (Defaults to 10%).
+
+    Returns:
+        list of tuple: The (metric, baseline_value, value, relative_change, regressed) of every metric in both.
+    """
+    baseline_metrics = get_benchmark_metrics(baseline)
+    comparison = []
+    for metric, (value, higher_is_better) in get_benchmark_metrics(results).items():
+        if metric not in baseline_metrics or not baseline_metrics[metric][0]:
+            continue
+        baseline_value = baseline_metrics[metric][0]
+        change = (value - baseline_value) / baseline_value
+        regressed = -change > tolerance if higher_is_better else change > tolerance
+        comparison.append((metric, baseline_value, value, change, regressed))
+    return comparison
+
+
+def load_baseline(baseline_file):
+    """
+    Load a stored benchmark baseline.
+
+    Args:
+        baseline_file (str): The baseline JSON file.
+
+    Returns:
+        dict: The baseline results, or None if the file is missing or from another benchmark version.
+    """
+    try:
+        with open(baseline_file, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        return None
+    if baseline.get("version") != RENDER_BENCHMARK_VERSION:
+        output_text(f"Ignoring baseline {baseline_file} from another benchmark version.", "warning")
+        return None
+    return baseline
+
+
+def print_results(results, comparison=None):
+    """
+    Print benchmark results, and their comparison against a baseline if given.
+
+    Args:
+        results (dict): The results of run_benchmark.
+        comparison (list of tuple, optional): The result of compare_to_baseline.
+    """
+    output_text(f"Rendered {results['cards']} synthetic cards (profile: {results['profile']}).", "note")
+    if comparison is None:
+        for metric, (value, _) in get_benchmark_metrics(results).items():
+            output_text(f"  {metric:32s} {value:10.2f}", "text")
+        return
+
+    for metric, baseline_value, value, change, regressed in comparison:
+        line = f"  {metric:32s} {baseline_value:10.2f} -> {value:10.2f} ({change:+.1%})"
+        output_text(line, "warning" if regressed else "text")
+    regressions = [row[0] for row in comparison if row[4]]
+    if regressions:
+        output_text(f"{len(regressions)} metric(s) regressed: {', '.join(regressions)}", "warning")
+    else:
+        output_text("No regressions against the baseline.", "success")
+
+
+def parse_args():
+    """
+    Parse command-line arguments for the render benchmark.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark rendering a synthetic corpus of TTCG cards.")
+    parser.add_argument('-n', "--cards", type=int, default=DEFAULT_BENCHMARK_CARDS,
+                        help=f"Number of synthetic cards to render (default: {DEFAULT_BENCHMARK_CARDS}).")
+    parser.add_argument('-j', "--jobs", type=int, default=None,
+                        help="Worker processes for the multi-core run (default: CPU count, 0 to skip it).")
+    parser.add_argument("--profile", type=str, default=DEFAULT_CARD_OUTPUT_PROFILE, choices=list(CARD_OUTPUT_PROFILES),
+                        help=f"Output profile to encode cards with (default: {DEFAULT_CARD_OUTPUT_PROFILE}).")
+    parser.add_argument('-r', "--repeat", type=int, default=1,
+                        help="Run each measurement this many times and keep the fastest (default: 1).")
+    parser.add_argument("--art_folder", type=str, default=None,
+                        help="Keep the generated placeholder art in this folder (default: a temporary folder).")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_RENDER_BENCHMARK_BASELINE,
+                        help=f"Baseline results to compare against (default: {DEFAULT_RENDER_BENCHMARK_BASELINE}).")
+    parser.add_argument("--save_baseline", action="store_true",
+                        help="Save these results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative change counted as a regression (default: 0.1).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_benchmark(args.cards, args.jobs, args.profile, args.repeat, args.art_folder)
+
+    baseline = load_baseline(args.baseline)
+    comparison = None
+    if baseline is not None:
+        if baseline["cards"] != results["cards"] or baseline["profile"] != results["profile"]:
+            output_text("The baseline was run with another corpus size or profile.", "warning")
+        comparison = compare_to_baseline(results, baseline, args.tolerance)
+    print_results(results, comparison)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        write_file_atomically(args.baseline, json.dumps(results, indent=1, sort_keys=True))
+        output_text(f"Saved the baseline to {args.baseline}", "success")
+
+
+if __name__ == "__main__":
+    main()
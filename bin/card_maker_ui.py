@@ -6,13 +6,13 @@ import random
 from tkinter import ttk
 from tkinter import filedialog
 from pathlib import Path
-import threading
 
 #import sv_ttk
 
 # Used for randomly generating effects.
 from generate_random_effects import load_and_filter_csv
 from generate_random_effects import get_random_effect
+from generate_random_effects import get_weighted_random_effect
 
 # Inports from ttcg_tools
 from ttcg_tools import output_text
@@ -20,12 +20,13 @@ from ttcg_tools import check_line_in_file
 from ttcg_tools import get_relative_path
 from ttcg_tools import rename_file
 from ttcg_tools import deduce_effect_style_from_effect_text
-from ttcg_tools import get_sequence_combinations, ALL_SEQUENCE_BUFFER
-from ttcg_tools import get_combination_id
-from ttcg_tools import get_number_id
-from ttcg_tools import get_index_in_baseN
-from ttcg_tools import sn_in_list
-from ttcg_tools import save_sn_to_list
+from ttcg_tools import get_serial_registry
+from ttcg_tools import locked_file
+from ttcg_tools import write_csv_row
+from ttcg_tools import write_file_atomically
+from ttcg_tools import journal_card_begin
+from ttcg_tools import journal_card_commit
+from ttcg_tools import recover_card_journal
 
 # Import needed constants from ttcg_constants
 from ttcg_constants import TYPE_LIST
@@ -35,25 +36,29 @@ from ttcg_constants import VALID_IMAGE_EXTENSIONS
 from ttcg_constants import VALID_OVERLAY_STYLES
 from ttcg_constants import VALID_TRANSLUCENT_VALUES
 from ttcg_constants import DEFAULT_CARD_LIST_FILE
-from ttcg_constants import ALL_TYPES_LIST_LOWER
 from ttcg_constants import DEFAULT_SERIAL_LIST_FILE
+from ttcg_constants import DEFAULT_CARD_JOURNAL_FILE
 from ttcg_constants import EXTRA_EFFECT_KEYWORDS
 from ttcg_constants import CHARACTERS
+from ttcg_constants import VALID_EFFECT_WEIGHT_SIGNALS
 
 # Used for flipping and correcting images.
 from flip_image import flip_image
 
 # Used for generating card preview.
-from create_card import create_card
+from create_card import render_card
 import os
-import tempfile
+import queue
+import threading
 from PIL import Image, ImageTk
 
 # For SN generation
 import hashlib
+from serial_engine import get_serial_prefix
 
 # Used for card data output.
 import csv
+import io
 
 
 # Global var to determine when preview should be generated vs not.
@@ -67,11 +72,120 @@ output_text(f"SCRIPT_DIR set to: {SCRIPT_DIR}", "program")
 # The number of effect boxes in the UI. Used in various places so it's a global var here.
 NUMBER_OF_EFFECT_BOXES = 50
 
-# For global threading.
-processing_thread = None
-
 # Store sthe load_mode globally. This is set to true with the -L flag.
 LOAD_CARD_MODE = False
+
+# The preview is rendered in the background once no change was made for PREVIEW_DEBOUNCE_MS milliseconds.
+# Finished previews are picked up by the UI every PREVIEW_POLL_MS milliseconds.
+PREVIEW_DEBOUNCE_MS = 150
+PREVIEW_POLL_MS = 30
+PREVIEW_WORKER = None
+
+
+class PreviewWorker:
+    """
+    Render card previews on a background thread, so the UI stays responsive while a card renders.
+
+    Requests are debounced: a request only starts rendering once no newer request was made within the
+    debounce window. Only the latest request counts; a request that is superseded before or while it
+    renders is dropped. Finished previews are handed back to the Tk main thread through root.after, as
+    Tk widgets must only be used from that thread.
+
+    All previews are rendered by the one worker thread, so the create_card caches are never used by two
+    renders at once.
+    """
+
+    def __init__(self, root, on_rendered, delay_ms=PREVIEW_DEBOUNCE_MS, poll_ms=PREVIEW_POLL_MS):
+        """
+        Start the worker thread and the polling of finished previews.
+
+        Args:
+            root (tk.Tk): The Tk root window.
+            on_rendered (callable): Called on the main thread with each finished preview image.
+            delay_ms (int): The debounce window in milliseconds.
+            poll_ms (int): How often finished previews are checked for, in milliseconds.
+        """
+        self.root = root
+        self.on_rendered = on_rendered
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        self.generation = 0
+        self.after_id = None
+        self.pending = None
+        self.condition = threading.Condition()
+        self.results = queue.Queue()
+        threading.Thread(target=self.run, daemon=True).start()
+        self.root.after(self.poll_ms, self.poll_results)
+
+    def request(self, card_data, size, delay_ms=None):
+        """
+        Ask for a preview of a card, superseding every earlier request (called on the main thread).
+
+        Args:
+            card_data (dict): The card data (see create_card.render_card).
+            size (tuple): The (width, height) of the preview.
+            delay_ms (int, optional): The debounce window for this request (e.g., 0 to render right away).
+        """
+        with self.condition:
+            self.generation += 1
+            generation = self.generation
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        delay_ms = self.delay_ms if delay_ms is None else delay_ms
+        self.after_id = self.root.after(delay_ms, self.submit, generation, dict(card_data), size)
+
+    def submit(self, generation, card_data, size):
+        """
+        Hand a request to the worker thread once its debounce window passed, replacing any request that
+        did not start rendering yet.
+        """
+        self.after_id = None
+        with self.condition:
+            self.pending = (generation, card_data, size)
+            self.condition.notify()
+
+    def is_current(self, generation):
+        """
+        Check if a request is still the latest one.
+        """
+        with self.condition:
+            return generation == self.generation
+
+    def run(self):
+        """
+        The worker thread: render the latest request, and queue the result unless it was superseded.
+        """
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                generation, card_data, size = self.pending
+                self.pending = None
+            if not self.is_current(generation):
+                continue
+            try:
+                result = render_card(card_data, size=size)
+            except Exception as e:
+                result = e
+            if self.is_current(generation):
+                self.results.put((generation, result))
+
+    def poll_results(self):
+        """
+        Show the latest finished preview (on the main thread), then check again after poll_ms.
+        """
+        latest = None
+        while True:
+            try:
+                latest = self.results.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None and self.is_current(latest[0]):
+            if isinstance(latest[1], Exception):
+                output_text(f"Failed to render the card preview: {latest[1]}", "error")
+            else:
+                self.on_rendered(latest[1])
+        self.root.after(self.poll_ms, self.poll_results)
     
 
 def get_next_image(current_path):
@@ -236,26 +350,29 @@ def overwrite_card_in_file(filename, row):
     lines = []
     found = False
 
-    # Read existing file
-    if os.path.isfile(filename):
-        with open(filename, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.reader(f, delimiter=';')
-            header = next(reader)  # Preserve header
-            lines.append(header)
-            for existing_row in reader:
-                if existing_row[0].strip() == card_name:  # Match by NAME
-                    found = True
-                    lines.append(row)  # Use the provided row directly
-                else:
-                    lines.append(existing_row)
-
-    if not found:
-        return False
-
-    # Write back to file
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f, delimiter=';')
+    # Hold the card list lock so no other process appends between the read and the rewrite.
+    with locked_file(filename):
+        # Read existing file
+        if os.path.isfile(filename):
+            with open(filename, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f, delimiter=';')
+                header = next(reader)  # Preserve header
+                lines.append(header)
+                for existing_row in reader:
+                    if existing_row[0].strip() == card_name:  # Match by NAME
+                        found = True
+                        lines.append(row)  # Use the provided row directly
+                    else:
+                        lines.append(existing_row)
+
+        if not found:
+            return False
+
+        # Write back to file atomically so a crash never leaves a truncated card list.
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
         writer.writerows(lines)
+        write_file_atomically(filename, buffer.getvalue())
     
     output_text(f"Overwrote card '{card_name}' in {filename}", "success")
     return True
@@ -285,83 +402,85 @@ def save_to_card_list(filename=DEFAULT_CARD_LIST_FILE):
         load_next_image()  # Still load next image even if skipped
         return
 
-    # Define the header
-    header = CARD_LIST_HEADER
-
-    # Check if file exists to determine if header needs to be written
-    file_exists = os.path.isfile(filename)
-
-    # Open the file in append mode
-    with open(filename, mode='a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f, delimiter=';')
-
-        # Write header if the file is new
-        if not file_exists:
-            writer.writerow(header)
-            
-        # Adjust subtypes for spell cards - it should have none.   
-        if card_data["type"].lower() == "spell":
-            card_data["subtype"] = ""
-        
-        # Rename the image file based on the new name selected.
-        image_path = card_data.get("image", "")
-        output_text(f"Full image path: {image_path}", "note")
-        new_image_name = card_data.get("name", "")
-        output_text(f"Image name: {new_image_name}", "note")
-        if new_image_name not in image_path and "Unnamed" not in new_image_name:
-            image_path = rename_file(image_path, new_image_name)
-            WIDGETS["image_entry"].delete(0, tk.END)
-            WIDGETS["image_entry"].insert(0, image_path)  # Update UI with new path
-        
-        # Generate relative path for images.
-        rel_image_path = get_relative_path(SCRIPT_DIR, image_path)
-        output_text(f"Relative path for image set to: {rel_image_path}", "note")
+    # Adjust subtypes for spell cards - it should have none.   
+    if card_data["type"].lower() == "spell":
+        card_data["subtype"] = ""
+    
+    # Rename the image file based on the new name selected.
+    image_path = card_data.get("image", "")
+    output_text(f"Full image path: {image_path}", "note")
+    new_image_name = card_data.get("name", "")
+    output_text(f"Image name: {new_image_name}", "note")
+    if new_image_name not in image_path and "Unnamed" not in new_image_name:
+        image_path = rename_file(image_path, new_image_name)
+        WIDGETS["image_entry"].delete(0, tk.END)
+        WIDGETS["image_entry"].insert(0, image_path)  # Update UI with new path
+    
+    # Generate relative path for images.
+    rel_image_path = get_relative_path(SCRIPT_DIR, image_path)
+    output_text(f"Relative path for image set to: {rel_image_path}", "note")
+    
+    # Prepare the row data, adding a default 'RARITY' since it’s not in card_data
+    row = [
+        card_data.get("name", ""),
+        card_data.get("type", ""),
+        card_data.get("subtype", ""),
+        card_data.get("level", ""),
+        rel_image_path,
+        card_data.get("attack", ""),
+        card_data.get("defense", ""),
+        card_data.get("effect1", ""),
+        card_data.get("effect2", ""),
+        card_data.get("serial", ""),   # If this index changes, mdify the sn value below.
+        card_data.get("rarity", ""),
+        card_data.get("translucency", ""),
+        card_data.get("effect1_style", ""),
+        card_data.get("effect2_style", "")
+    ]                
         
-        # Prepare the row data, adding a default 'RARITY' since it’s not in card_data
-        row = [
-            card_data.get("name", ""),
-            card_data.get("type", ""),
-            card_data.get("subtype", ""),
-            card_data.get("level", ""),
-            rel_image_path,
-            card_data.get("attack", ""),
-            card_data.get("defense", ""),
-            card_data.get("effect1", ""),
-            card_data.get("effect2", ""),
-            card_data.get("serial", ""),   # If this index changes, mdify the sn value below.
-            card_data.get("rarity", ""),
-            card_data.get("translucency", ""),
-            card_data.get("effect1_style", ""),
-            card_data.get("effect2_style", "")
-        ]                
-            
-        # Just a sanity check in case additions are added.
-        if len(CARD_LIST_HEADER) != len(row):
-            output_text(f"ERROR: row data inconsistent with CARD_LIST_HEADER: {row} -> {CARD_LIST_HEADER}", "error")
-
-        if LOAD_CARD_MODE:
-            # Overwrite existing line if name matches
-            if overwrite_card_in_file(filename, row):
-                output_text(f"Card data saved to {filename}: {card_data}", "success")
-                sn = row[9]
-                save_sn_to_list(sn, DEFAULT_SERIAL_LIST_FILE)
-                output_text(f"Serial number {sn} saved to {DEFAULT_SERIAL_LIST_FILE}", "success")
-                load_next_image()
-                return  # Exit after overwriting
+    # Just a sanity check in case additions are added.
+    if len(CARD_LIST_HEADER) != len(row):
+        output_text(f"ERROR: row data inconsistent with CARD_LIST_HEADER: {row} -> {CARD_LIST_HEADER}", "error")
 
+    if LOAD_CARD_MODE:
+        # Overwrite existing line if name matches
+        if overwrite_card_in_file(filename, row):
+            output_text(f"Card data saved to {filename}: {card_data}", "success")
+            sn = row[9]
+            get_serial_registry(DEFAULT_SERIAL_LIST_FILE).add(sn)
+            output_text(f"Serial number {sn} saved to {DEFAULT_SERIAL_LIST_FILE}", "success")
+            load_next_image()
+            return  # Exit after overwriting
+
+    # Hold the card list lock from the duplicate checks to the append, so two sessions cannot both
+    # pass the checks and save the same card.
+    with locked_file(filename):
         # Write the row to the CSV if it's not a duplicate.
-        if not check_line_in_file(filename, ";".join(str(r) for r in row)):
-            if not check_for_effect_combination_in_file(filename, row[7], row[8]):
-                writer.writerow(row)
-                output_text(f"Card data saved to {filename}: {card_data}", "success")
-                sn = row[9]
-                save_sn_to_list(sn, DEFAULT_SERIAL_LIST_FILE)
-                output_text(f"Serial number {sn} saved to {DEFAULT_SERIAL_LIST_FILE}", "success")
-                load_next_image()
-            else:
-                output_text(f"Effect combination already exists in output file! Skipping", "error") 
-        else:
+        file_exists = os.path.isfile(filename)
+        if file_exists and check_line_in_file(filename, ";".join(str(r) for r in row)):
             output_text(f"Card already exists in output file! Skipping", "error") 
+            return
+        if file_exists and check_for_effect_combination_in_file(filename, row[7], row[8]):
+            output_text(f"Effect combination already exists in output file! Skipping", "error") 
+            return
+
+        # Reserve the serial number atomically: another process may have taken the previewed one since.
+        sn = get_serial_registry(DEFAULT_SERIAL_LIST_FILE).reserve(row[9][:-1])
+        if sn != row[9]:
+            output_text(f"Serial number {row[9]} was taken by another session, using {sn}", "warning")
+            row[9] = sn
+            update_serial_number(sn)
+        output_text(f"Serial number {sn} saved to {DEFAULT_SERIAL_LIST_FILE}", "success")
+
+        # Journal the save so a crash between reserving the serial and writing the row is recoverable.
+        journal_card_begin(DEFAULT_CARD_JOURNAL_FILE, sn, row, filename)
+        saved = write_csv_row(filename, row, CARD_LIST_HEADER)
+        if saved:
+            journal_card_commit(DEFAULT_CARD_JOURNAL_FILE, sn)
+
+    if saved:
+        output_text(f"Card data saved to {filename}: {card_data}", "success")
+        load_next_image()
 
 
 def reset_ui():
@@ -412,13 +531,14 @@ def browse_image():
 
 def update_preview(force_update=False):
     """
-    Gather UI input, create a card image, and display it in the preview window.
+    Gather UI input and request a card preview, which is shown in the preview window once rendered.
     
     Args:
-        force_update (bool): True to force an update.
+        force_update (bool): True to force an update, rendered without waiting for the debounce window.
 
-    This function collects card data from the GUI, generates a card image using create_card,
-    saves it to a temporary folder, and updates the preview canvas with the resulting image.
+    This function collects card data from the GUI and updates the serial number right away. The card
+    itself is rendered in memory by the preview worker thread (see PreviewWorker), so the UI does not
+    wait on it; a burst of changes (e.g., typing a name) only renders the final card.
     """
     # Stores the last card data where an update was triggered.
     global LAST_UPDATE_CARD_DATA
@@ -440,30 +560,29 @@ def update_preview(force_update=False):
     serial_number = generate_serial_number(card_data)
     update_serial_number(serial_number)
 
-    # Use a temporary folder for output
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Generate the card image
-        output_file_name = f"{card_data['type'].replace(' ', '_')}_card_{card_data['name'].replace(' ', '_')}-{card_data['translucency']}.png"
-        create_card(card_data, temp_dir, output_file_name, tmp_file=True)
-        
-        # Load the generated image
-        output_file = f"{temp_dir}/{output_file_name}"
-        card_image = Image.open(output_file)
-        
-        # Resize to fit preview canvas
-        preview_width, preview_height = 400, 580
-        card_image = card_image.resize((preview_width, preview_height), Image.Resampling.LANCZOS)
-        
-        # Convert to PhotoImage for Tkinter
-        photo = ImageTk.PhotoImage(card_image)
-        
-        # Update the canvas
-        WIDGETS["preview_canvas"].delete("all")  # Clear previous content
-        WIDGETS["preview_canvas"].create_image(
-            preview_width // 2, preview_height // 2, image=photo
-        )
-        # Store reference to prevent garbage collection
-        WIDGETS["preview_canvas"].image = photo
+    # Render the card in memory at the preview canvas size; nothing is written to disk for a preview.
+    PREVIEW_WORKER.request(card_data, (400, 580), delay_ms=0 if force_update else None)
+
+
+def show_preview(card_image):
+    """
+    Display a rendered card preview on the preview canvas.
+
+    Args:
+        card_image (Image): The rendered preview (see update_preview).
+    """
+    preview_width, preview_height = card_image.size
+
+    # Convert to PhotoImage for Tkinter
+    photo = ImageTk.PhotoImage(card_image)
+
+    # Update the canvas
+    WIDGETS["preview_canvas"].delete("all")  # Clear previous content
+    WIDGETS["preview_canvas"].create_image(
+        preview_width // 2, preview_height // 2, image=photo
+    )
+    # Store reference to prevent garbage collection
+    WIDGETS["preview_canvas"].image = photo
 
 
 def generate_stat_pair(stat_bonus):
@@ -585,7 +704,7 @@ def adjust_listbox_width():
         output_text(f"Error adjusting Listbox width: {e}", "error")
 
 
-def generate_effects(input_file, columns, subtypes):
+def generate_effects(input_file, columns, subtypes, weight_signal=None):
     """
     Generate NUMBER_OF_EFFECT_BOXES random effects and populate the effect buttons.
 
@@ -598,10 +717,18 @@ def generate_effects(input_file, columns, subtypes):
         input_file (str): Path to the input CSV file containing effect data.
         columns (list of str): List of column names to filter on (rows where these are 'True').
         subtypes (list of str): List of selected subtypes to use as search strings for up to 5 effects (for units).
+        weight_signal (str): Optional signal from VALID_EFFECT_WEIGHT_SIGNALS used to favor effects that are
+            underused in the card list (see get_weighted_random_effect). None selects effects uniformly.
     """
     # Load CSV and filter for rows where specified columns are 'True'
     possible_effect_values = load_and_filter_csv(input_file, columns)
     
+    # Select the effect sampler to use.
+    if weight_signal:
+        random_effect = lambda values, **kwargs: get_weighted_random_effect(values, signal=weight_signal, **kwargs)
+    else:
+        random_effect = get_random_effect
+    
     # Track used effects to avoid duplicates
     used_effects = set()
     generated_effects = []
@@ -627,9 +754,9 @@ def generate_effects(input_file, columns, subtypes):
             for _ in range(target_with_search_terms):
                 if not possible_effect_values or len(used_effects) >= len(possible_effect_values):
                     break  # Stop if no more unique effects are available
-                effect = get_random_effect(possible_effect_values, search_strings=search_terms, omit_strings=strings_to_omit)
+                effect = random_effect(possible_effect_values, search_strings=search_terms, omit_strings=strings_to_omit)
                 while effect in used_effects:
-                    effect = get_random_effect(possible_effect_values, search_strings=search_terms, omit_strings=strings_to_omit)
+                    effect = random_effect(possible_effect_values, search_strings=search_terms, omit_strings=strings_to_omit)
                     if len(used_effects) >= len(possible_effect_values):
                         break  # Avoid infinite loop
                 used_effects.add(effect)
@@ -646,9 +773,9 @@ def generate_effects(input_file, columns, subtypes):
             for _ in range(target_with_search):
                 if not possible_effect_values or len(used_effects) >= len(possible_effect_values):
                     break  # Stop if no more unique effects are available
-                effect = get_random_effect(possible_effect_values, search_strings=effect_search_values)
+                effect = random_effect(possible_effect_values, search_strings=effect_search_values)
                 while effect in used_effects:
-                    effect = get_random_effect(possible_effect_values, search_strings=effect_search_values)
+                    effect = random_effect(possible_effect_values, search_strings=effect_search_values)
                     if len(used_effects) >= len(possible_effect_values):
                         break  # Avoid infinite loop
                 used_effects.add(effect)
@@ -659,9 +786,9 @@ def generate_effects(input_file, columns, subtypes):
     for _ in range(remaining):
         if not possible_effect_values or len(used_effects) >= len(possible_effect_values):
             break  # Stop if no more unique effects are available
-        effect = get_random_effect(possible_effect_values)  # No search_strings
+        effect = random_effect(possible_effect_values)  # No search_strings
         while effect in used_effects:
-            effect = get_random_effect(possible_effect_values)
+            effect = random_effect(possible_effect_values)
             if len(used_effects) >= len(possible_effect_values):
                 break  # Avoid infinite loop
         used_effects.add(effect)
@@ -752,7 +879,7 @@ def assign_effect(effect_text):
             WIDGETS['effect2_style_var'].set(effect_style)
 
 
-def generate_serial_number(card_data, waitForThreads=False):
+def generate_serial_number(card_data):
     """
     Generate a unique serial number for a trading card based on its attributes.
 
@@ -781,82 +908,13 @@ def generate_serial_number(card_data, waitForThreads=False):
         - The serial number should be concise (e.g., 8-12 characters) yet unique.
         - Implementation details (e.g., hash, counter, UUID) are left to the user.
     """
-    if waitForThreads:
-        wait_for_preprocessing()
-    
-    if not PREPROCESSING_FINISHED:
-        return "Loading.."
-    
-    # Extract attributes from card_data
-    name = card_data.get('name', '')
-    card_type = card_data.get('type', '')
-    level = card_data.get('level', '')
-    subtypes = card_data.get('subtype', '')
-    rarity = card_data.get('rarity', '')
-    image = card_data.get('image', '')
-    attack = card_data.get('attack', '')
-    defense = card_data.get('defense', '')
-    effect1 = card_data.get('effect1', '')
-    effect1_style = card_data.get('effect1_style', '')
-    effect2 = card_data.get('effect2', '')
-    effect2_style = card_data.get('effect2_style', '')
-        
-    # Placeholder: Combine attributes into a unique string
-    card_attributes = (
-        f"{name}-{card_type}-{subtypes}-{level}-{image}-{attack}-{defense}-{effect1}-{effect1_style}-{effect2}-{effect2_style}-{rarity}"
-    )
+    serial_number = get_serial_prefix(card_data)
 
-    output_text(f"Creating serial number for: {card_attributes}", "note")
-
-    if subtypes == "":
-        all_types = card_type
-    else:
-        all_types = card_type + ", " + subtypes
-    all_types_id = get_combination_id(all_types, ALL_TYPES_LIST_LOWER)
-    effect1_style_id = get_index_in_baseN(effect1_style, VALID_OVERLAY_STYLES)
-    effect2_style_id = get_index_in_baseN(effect2_style, VALID_OVERLAY_STYLES)
-    
-    if effect1 == "":
-        effect1_id = "0"
-    else:
-        effect1_id = effect1[0]
+    output_text(f"Creating serial number for: {card_data.get('name', '')} ({serial_number})", "note")
     
-    if effect2 == "":
-        effect2_id = "0"
-    else:
-        effect2_id = effect2[0]
-
-    serial_number = ""                             # Create the initial SN string.
-    serial_number += name[0].capitalize()          # Add the first letter of the name.
-    serial_number += str(level)                    # Add the level.
-    serial_number += all_types_id                  # Add the unique type+subtype identifier.
-    
-    # Since level is included as part of the SN, the atk and defense can be generated on a scale relative to the level.
-    if "+" in attack or "-" in attack: # Spell stats
-        # For spells, this value x ranges from -level*10 < x < level*10. So if we add level*10 to the value x, we have
-        # 0 < x < 2level*10 => 0 < x < level*20, so, the per level value can be treated as 20. 
-        serial_number += get_number_id(int(attack[1:])+level*10, level, per_level_val=20)  # Add the attack value identifier.
-        serial_number += get_number_id(int(defense[1:])+level*10, level, per_level_val=20) # Add the attack value identifier.    
-    else: # Unit stats
-        serial_number += get_number_id(int(attack), level)  # Add the attack value identifier.
-        serial_number += get_number_id(int(defense), level) # Add the attack value identifier.
-    
-    serial_number += effect1_id                    # Add the first letter of the effect1.
-    serial_number += effect1_style_id              # Add the unique identifier for the the effect1 style.
-    serial_number += effect2_id                    # Add the first letter of the effect2.
-    serial_number += effect2_style_id              # Add the unique identifier for the the effect1 style.
-    serial_number += str(rarity)                   # Add the rarity of the card.
-    
-    # Update the pad bit.
-    pad_bit_index = 0 
-    pad_bit = "0"
-    temp_serial_number = serial_number + pad_bit   # Create what the serial number is without any pad bit modifications.
-    while sn_in_list(temp_serial_number, DEFAULT_SERIAL_LIST_FILE):
-        pad_bit_index += 1                         # Increment the index
-        if pad_bit_index >= len(CHARACTERS):       # Prevent index out of bounds
-            raise ValueError("No unique serial number available - all padding options exhausted")
-        pad_bit = CHARACTERS[pad_bit_index]        # Increment pad bit.
-        temp_serial_number = serial_number + pad_bit
+    # Update the pad bit to the first one not already used by an existing serial number.
+    pad_bit = get_serial_registry(DEFAULT_SERIAL_LIST_FILE).next_pad_bit(serial_number)
+    pad_bit_index = CHARACTERS.index(pad_bit)
         
     # We expect the card to exist if we are loading in an existing card.
     if LOAD_CARD_MODE:
@@ -1143,57 +1201,6 @@ def on_effect_select(event):
         update_preview()
 
 
-PREPROCESSING_FINISHED = False
-
-def preprocess_all_types_list():
-    """
-    This method will pre-process the ALL_TYPES_LIST_LOWER combinations into a buffer
-    so that the SN generation method can use it without having to load it initially.
-    """
-    global PREPROCESSING_FINISHED  # Declare the variable as global to modify it.
-    output_text("Pre-processing started for ALL_TYPE combinations...", "program")
-    get_sequence_combinations(ALL_TYPES_LIST_LOWER)
-    output_text("Pre-processing Finished for ALL_TYPE combinations...", "program")
-    PREPROCESSING_FINISHED = True
-
-
-def wait_for_preprocessing():
-    """
-    Wait for the preprocessing thread to complete before proceeding.
-
-    This function checks if a global `processing_thread` exists and, if so, blocks execution
-    until the thread finishes using `join()`. It provides feedback on the thread's status
-    via print statements. If no thread is defined, it indicates that there’s nothing to wait for.
-
-    Global Variables:
-        processing_thread (threading.Thread or None): The thread object to wait for, expected
-            to be set globally before calling this function.
-
-    Returns:
-        None
-
-    Notes:
-        - Assumes `processing_thread` is a `threading.Thread` object initialized elsewhere
-          (e.g., in `main()`).
-        - Prints status messages to stdout for debugging or user feedback.
-    """
-    global processing_thread
-    if processing_thread is not None:
-        processing_thread.join()
-    else:
-        output_text("No preprocessing thread to wait for!", "warning")
-
-
-def initialize_preprocessing():
-    """
-    Starts the preprocessing for the various combinations for serial number generation.
-    """
-    global processing_thread
-    output_text("Initializing preprocessing...", "program")
-    processing_thread = threading.Thread(target=preprocess_all_types_list)
-    processing_thread.start()
-
-
 def main():
     """
     Set up and run the Card Creator GUI.
@@ -1221,11 +1228,19 @@ def main():
         action="store_true",
         help="Enable loading mode to load and overwrite existing values from the output CSV."
     )
+    parser.add_argument(
+        "-w",
+        "--weight_signal",
+        default=None,
+        choices=VALID_EFFECT_WEIGHT_SIGNALS,
+        help="Favor generated effects whose template or style is underused in the card list. "
+             "If not provided, effects are generated uniformly."
+    )
     
     args = parser.parse_args()
     
-    # Start preprocessing combinations into RAM. Create and start the thread.
-    initialize_preprocessing()
+    # Finish any card saves interrupted by a crash in a previous session.
+    recover_card_journal(DEFAULT_CARD_JOURNAL_FILE, DEFAULT_SERIAL_LIST_FILE)
     
     root = tk.Tk()
     root.title("Game Card Creator")
@@ -1543,7 +1558,8 @@ def main():
             generate_effects(
                 args.input_file,
                 get_gui_metadata(),
-                get_selected_subtypes()
+                get_selected_subtypes(),
+                args.weight_signal
             ),
             update_preview()
         ]
@@ -1598,6 +1614,10 @@ def main():
         "effect_listbox" : effect_listbox
     }
 
+    # Previews are rendered in the background and shown once finished.
+    global PREVIEW_WORKER
+    PREVIEW_WORKER = PreviewWorker(root, show_preview)
+
     # Initial preview update
     update_preview()
 
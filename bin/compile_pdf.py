@@ -2,19 +2,40 @@
 
 import argparse
 import os
+import io
+import zlib
+import collections
+import concurrent.futures
 from PIL import Image
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.pdfgen import canvas
 
 # For progress/status messages.
 from tqdm import tqdm
 
 # Import methods from ttcg_tools
 from ttcg_tools import output_text
+from ttcg_tools import get_card_data_from_row
+
+# Used for writing the PDF one page at a time.
+from pdf_writer import StreamingPdfWriter
+
+# Used for flattening cards onto white, and rendering the cards of a card list.
+from create_card import flatten_card_image
+from create_card import iter_card_rows
+from create_card import process_csv_to_cards
+from create_card import get_card_output_file
 
 # Import needed constants from the ttcg_constants file.
 from ttcg_constants import DEFAULT_GENERATED_CARDS_FOLDER
 from ttcg_constants import DEFAULT_GENERATED_CARDS_PDF
+from ttcg_constants import CARD_OUTPUT_DPI
+from ttcg_constants import DEFAULT_CARD_LIST_FILE
+from ttcg_constants import CARD_OUTPUT_PROFILES
+from ttcg_constants import DEFAULT_CARD_OUTPUT_PROFILE
+
+
+PRINT_ENCODINGS = ["jpeg", "flate"]
+DEFAULT_PRINT_JPEG_QUALITY = 95
 
 
 def get_page_size(size_name):
@@ -39,86 +60,362 @@ def get_image_files(input_folder):
         input_folder (str): Path to the folder containing images.
 
     Returns:
-        list: List of filenames with .png, .jpg, or .jpeg extensions (case-insensitive).
+        list: Sorted list of filenames with .png, .jpg, .jpeg or .webp extensions (case-insensitive).
+    """
+    return sorted(f for f in os.listdir(input_folder) if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')))
+
+
+def get_grid_layout(page_size):
+    """
+    Get the size and position of the 3x3 grid of cards on a page, with no gaps between cards.
+
+    Args:
+        page_size (tuple): (width, height) of the page in points.
+
+    Returns:
+        tuple: (img_width, img_height, margin_x, margin_y) in points. The margins are negative if the grid
+               does not fit the page.
+    """
+    # Set fixed dimensions for MTG card size (2.5 x 3.5 inches at 72 points/inch)
+    img_width = 2.5 * 72  # 180 points
+    img_height = 3.5 * 72  # 252 points
+
+    # Calculate margins to center the 3x3 grid (no gaps between images)
+    page_width, page_height = page_size
+    total_grid_width = 3 * img_width
+    total_grid_height = 3 * img_height
+    margin_x = (page_width - total_grid_width) / 2    # Split remaining space into left and right margins
+    margin_y = (page_height - total_grid_height) / 2  # Split remaining space into top and bottom margins
+    return img_width, img_height, margin_x, margin_y
+
+
+def get_print_image_size(dpi=CARD_OUTPUT_DPI):
+    """
+    Get the pixel size of a card printed at 2.5 x 3.5 inches.
+
+    Args:
+        dpi (int): The print resolution.
+
+    Returns:
+        tuple: (width, height) in pixels.
+    """
+    return round(2.5 * dpi), round(3.5 * dpi)
+
+
+def encode_print_image(image_path, dpi=CARD_OUTPUT_DPI, encoding="jpeg", quality=DEFAULT_PRINT_JPEG_QUALITY):
+    """
+    Encode a card image once, at the print resolution, as a stream that can be embedded in a PDF as is.
+
+    The card is flattened onto white (as it is printed) and resized to 2.5 x 3.5 inches at the given dpi.
+
+    Args:
+        image_path (str): Path to the card image.
+        dpi (int): The print resolution.
+        encoding (str): 'jpeg', or 'flate' for lossless zlib-compressed pixels.
+        quality (int): The JPEG quality.
+
+    Returns:
+        tuple: (width, height, encoding, data) of the encoded image.
+
+    Raises:
+        ValueError: If the encoding is not supported.
+    """
+    if encoding not in PRINT_ENCODINGS:
+        raise ValueError(f"Invalid encoding '{encoding}', valid encodings are: {PRINT_ENCODINGS}")
+    size = get_print_image_size(dpi)
+    with Image.open(image_path) as img:
+        # JPEG sources are decoded at a reduced scale when they are much larger than needed.
+        img.draft("RGB", size)
+        img = flatten_card_image(img.convert("RGBA"), "JPEG")
+    if img.size != size:
+        img = img.resize(size, Image.LANCZOS)
+
+    if encoding == "jpeg":
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality, subsampling=0)
+        data = buffer.getvalue()
+    else:
+        data = zlib.compress(img.tobytes())
+    return size[0], size[1], encoding, data
+
+
+def iter_encoded_images(image_paths, jobs=1, **encode_options):
     """
-    return [f for f in os.listdir(input_folder) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    Encode card images for print, in order, encoding each distinct image only once.
 
+    With more than one job the images are encoded by a pool of worker processes, keeping only a few
+    images per worker in flight so memory use does not grow with the number of images.
+
+    Args:
+        image_paths (list of str): Paths to the card images (the same path may repeat).
+        jobs (int): The number of worker processes. 1 encodes in this process.
+        **encode_options: The dpi, encoding and quality (see encode_print_image).
+
+    Yields:
+        tuple: (image_path, result) for each path in order. The result is the encoded image (see
+               encode_print_image), the exception raised while encoding it, or None if the path was
+               already yielded before.
+    """
+    def encode(path):
+        try:
+            return encode_print_image(path, **encode_options)
+        except Exception as e:
+            return e
+
+    seen = set()
+    if jobs <= 1:
+        for path in image_paths:
+            if path in seen:
+                yield path, None
+                continue
+            seen.add(path)
+            yield path, encode(path)
+        return
 
-def create_pdf(input_folder, output_file, page_size_name):
+    def result(future):
+        try:
+            return future.result() if future is not None else None
+        except Exception as e:
+            return e
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = collections.deque()
+        for path in image_paths:
+            future = None
+            if path not in seen:
+                seen.add(path)
+                future = executor.submit(encode_print_image, path, **encode_options)
+            pending.append((path, future))
+            if len(pending) >= jobs * 4:
+                path, future = pending.popleft()
+                yield path, result(future)
+        while pending:
+            path, future = pending.popleft()
+            yield path, result(future)
+
+
+def create_pdf(input_folder, output_file, page_size_name, dpi=CARD_OUTPUT_DPI, encoding="jpeg",
+               quality=DEFAULT_PRINT_JPEG_QUALITY, jobs=1):
     """
     Create a PDF with images arranged in a 3x3 grid, with no gaps between images.
 
     Images are placed edge-to-edge within the grid, with margins calculated to center
-    the grid on the specified page size. Assumes all images have the same size.
+    the grid on the specified page size. Each image is encoded once at the print resolution
+    (see encode_print_image) and embedded as is; an image placed more than once is stored once.
+    Pages are written to the PDF as soon as they are full, so memory use stays flat.
 
     Args:
         input_folder (str): Path to the folder containing input images.
         output_file (str): Path where the output PDF will be saved.
         page_size_name (str): Page size ('letter' or 'A4').
+        dpi (int): The resolution the images are embedded at.
+        encoding (str): 'jpeg', or 'flate' for lossless images.
+        quality (int): The JPEG quality.
+        jobs (int): The number of worker processes encoding images.
     """
-    # Initialize PDF
-    page_size = get_page_size(page_size_name)
-    c = canvas.Canvas(output_file, pagesize=page_size)
-    page_width, page_height = page_size
-
-    # Get image files
     image_files = get_image_files(input_folder)
     if not image_files:
         output_text("ERROR: No images found in the input folder!", "error")
         return
+    write_pdf([os.path.join(input_folder, img_file) for img_file in image_files], output_file, page_size_name,
+              dpi=dpi, encoding=encoding, quality=quality, jobs=jobs)
 
-    # Set fixed dimensions for MTG card size (2.5 x 3.5 inches at 72 points/inch)
-    img_width = 2.5 * 72  # 180 points
-    img_height = 3.5 * 72  # 252 points
 
-    # Calculate margins to center the 3x3 grid (no gaps between images)
-    total_grid_width = 3 * img_width
-    total_grid_height = 3 * img_height
-    margin_x = (page_width - total_grid_width) / 2    # Split remaining space into left and right margins
-    margin_y = (page_height - total_grid_height) / 2  # Split remaining space into top and bottom margins
+def write_pdf(image_paths, output_file, page_size_name, dpi=CARD_OUTPUT_DPI, encoding="jpeg",
+              quality=DEFAULT_PRINT_JPEG_QUALITY, jobs=1):
+    """
+    Write card images to a PDF in a 3x3 grid, in the given order (see create_pdf).
+
+    Args:
+        image_paths (list of str): Paths to the card images, in page order (the same path may repeat).
+        output_file (str): Path where the output PDF will be saved.
+        page_size_name (str): Page size ('letter' or 'A4').
+        dpi (int): The resolution the images are embedded at.
+        encoding (str): 'jpeg', or 'flate' for lossless images.
+        quality (int): The JPEG quality.
+        jobs (int): The number of worker processes encoding images.
+
+    Returns:
+        int: The number of cards placed in the PDF.
+    """
+    page_size = get_page_size(page_size_name)
+    page_width, page_height = page_size
+
+    # MTG sized cards in a centered 3x3 grid
+    img_width, img_height, margin_x, margin_y = get_grid_layout(page_size)
 
     # Validate that the grid fits the page
     if margin_x < 0 or margin_y < 0:
         output_text(f"ERROR: 3x3 grid of MTG-sized cards (7.5 x 10.5 inches) does not fit on {page_size_name} page.", "error")
-        return
+        return 0
+
+    image_ids = {}
+    placements = []
+    cards_placed = 0
+
+    # The PDF is written next to the output file and only replaces it once complete.
+    temp_file = f"{output_file}.tmp{os.getpid()}"
+    try:
+        with open(temp_file, 'wb') as f, StreamingPdfWriter(f) as pdf:
+            encoded_images = iter_encoded_images(image_paths, jobs, dpi=dpi, encoding=encoding, quality=quality)
+            for img_path, encoded in tqdm(encoded_images, total=len(image_paths), desc=f"Processing images"):
+                if isinstance(encoded, Exception):
+                    output_text(f"Error processing {os.path.basename(img_path)}: {encoded}")
+                    continue
+                if encoded is not None:
+                    image_ids[img_path] = pdf.add_image(*encoded)
+                elif img_path not in image_ids:
+                    # The image failed to encode the first time it was placed.
+                    continue
+
+                # Calculate position (3x3 grid with no gaps)
+                row, col = divmod(len(placements), 3)
+                x = margin_x + col * img_width
+                y = page_height - margin_y - (row + 1) * img_height
+                placements.append((image_ids[img_path], x, y, img_width, img_height))
+                cards_placed += 1
+
+                # Start new page if 9 cards are placed
+                if len(placements) == 9:
+                    pdf.add_page(page_size, placements)
+                    placements = []
+
+            if placements:
+                pdf.add_page(page_size, placements)
+    except BaseException:
+        # Never leave a partial PDF behind, whatever stopped the run.
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+    if cards_placed > 0:
+        os.replace(temp_file, output_file)
+        output_text(f"PDF created successfully at {output_file}", "success")
+    else:
+        os.remove(temp_file)
+        output_text("WARNING: No valid images processed, PDF not created.", "warning")
+    return cards_placed
 
-    cards_per_page = 0
-    row, col = 0, 0
 
-    for img_file in tqdm(image_files, desc=f"Processing images"):
-        img_path = os.path.join(input_folder, img_file)
-        try:
-            img = Image.open(img_path)
+def load_deck(deck_file):
+    """
+    Load a deck manifest: the serial number and count of each card, one card per line.
 
-            # Calculate position (3x3 grid with no gaps)
-            x = margin_x + col * img_width
-            y = page_height - margin_y - (row + 1) * img_height
+    Lines are written as `SERIAL;COUNT` (or just `SERIAL` for one copy). Blank lines and lines starting
+    with '#' are ignored, and the counts of a serial number listed more than once are added up.
 
-            # Draw image at its original size
-            c.drawImage(img_path, x, y, img_width, img_height)
-            cards_per_page += 1
+    Args:
+        deck_file (str): Path to the deck manifest.
 
-            # Update grid position
-            col += 1
-            if col == 3:
-                col = 0
-                row += 1
+    Returns:
+        dict: The count of each serial number, in the order they are first listed.
 
-            # Start new page if 9 cards are placed
-            if cards_per_page == 9:
-                c.showPage()
-                row, col = 0, 0
-                cards_per_page = 0
+    Raises:
+        FileNotFoundError: If the deck manifest does not exist.
+        ValueError: If a line is malformed or a count is not a positive number.
+    """
+    deck = {}
+    with open(deck_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = [field.strip() for field in line.split(';')]
+            if len(fields) > 2 or not fields[0]:
+                raise ValueError(f"Invalid deck line {line_number} in {deck_file}: '{line}'")
+            try:
+                count = int(fields[1]) if len(fields) == 2 else 1
+            except ValueError:
+                count = 0
+            if count < 1:
+                raise ValueError(f"Invalid card count on deck line {line_number} in {deck_file}: '{line}'")
+            deck[fields[0]] = deck.get(fields[0], 0) + count
+    return deck
+
+
+def get_print_run(card_list_file, deck=None):
+    """
+    Get the cards to print from a card list, in a deterministic order.
 
-        except Exception as e:
-            output_text(f"Error processing {img_file}: {e}")
+    Args:
+        card_list_file (str): Path to the card list CSV.
+        deck (dict, optional): The count of each serial number to print (see load_deck). If not given,
+                               one copy of every card in the card list is printed.
 
-    # Save PDF if any cards were added
-    if cards_per_page > 0 or len(image_files) > 0:
-        c.save()
-        output_text(f"PDF created successfully at {output_file}", "success")
-    else:
-        output_text("WARNING: No valid images processed, PDF not created.", "warning")
+    Returns:
+        list of tuple: (card_data, count) of each card, in deck order (or card list order without a deck).
+                       Serial numbers of the deck that are not in the card list are reported and skipped.
+
+    Raises:
+        FileNotFoundError: If the card list does not exist.
+        ValueError: If the card list header is bad.
+    """
+    cards = {}
+    for line_number, row in iter_card_rows(card_list_file):
+        try:
+            card_data = get_card_data_from_row(row)
+        except ValueError as e:
+            output_text(f"Skipping the card on line {line_number}: {e}", "error")
+            continue
+        cards.setdefault(card_data["serial"], card_data)
+
+    if deck is None:
+        return [(card_data, 1) for card_data in cards.values()]
+    missing = [serial for serial in deck if serial not in cards]
+    if missing:
+        output_text(f"ERROR: {len(missing)} deck card(s) are not in {card_list_file}: {', '.join(missing)}", "error")
+    return [(cards[serial], count) for serial, count in deck.items() if serial in cards]
+
+
+def create_pdf_from_card_list(card_list_file, output_file, page_size_name, deck_file=None,
+                              cards_folder=DEFAULT_GENERATED_CARDS_FOLDER, profile=DEFAULT_CARD_OUTPUT_PROFILE,
+                              dpi=CARD_OUTPUT_DPI, encoding="jpeg", quality=DEFAULT_PRINT_JPEG_QUALITY, jobs=1):
+    """
+    Create a PDF of the cards in a card list, or of a deck built from it.
+
+    The cards to print are first rendered into the cards folder if they are missing or out of date (see
+    create_card.process_csv_to_cards, which skips cards that did not change since they were rendered).
+    Copies of a card share one embedded image, so a deck costs only its distinct cards in size and time.
+
+    Args:
+        card_list_file (str): Path to the card list CSV.
+        output_file (str): Path where the output PDF will be saved.
+        page_size_name (str): Page size ('letter' or 'A4').
+        deck_file (str, optional): A deck manifest (see load_deck). If not given, every card is printed once.
+        cards_folder (str): The folder the rendered cards are kept in.
+        profile (str): The output profile the cards are rendered with (see CARD_OUTPUT_PROFILES).
+        dpi (int): The resolution the images are embedded at.
+        encoding (str): 'jpeg', or 'flate' for lossless images.
+        quality (int): The JPEG quality.
+        jobs (int): The number of worker processes rendering and encoding cards.
+
+    Returns:
+        int: The number of cards placed in the PDF.
+
+    Raises:
+        FileNotFoundError: If the card list or deck manifest does not exist.
+        ValueError: If the card list header, deck manifest or output profile is bad.
+    """
+    deck = load_deck(deck_file) if deck_file is not None else None
+    print_run = get_print_run(card_list_file, deck)
+    if not print_run:
+        output_text("ERROR: No cards to print!", "error")
+        return 0
+
+    # Render the cards that are missing or changed since they were last rendered.
+    os.makedirs(cards_folder, exist_ok=True)
+    process_csv_to_cards(card_list_file, cards_folder, jobs=jobs, profile=profile,
+                         serials={card_data["serial"] for card_data, _ in print_run})
+
+    image_paths = []
+    for card_data, count in print_run:
+        card_file = get_card_output_file(card_data, cards_folder, profile)
+        if not os.path.isfile(card_file):
+            output_text(f"Skipping {card_data['name']} ({card_data['serial']}), it could not be rendered.", "warning")
+            continue
+        image_paths.extend([card_file] * count)
+    return write_pdf(image_paths, output_file, page_size_name, dpi=dpi, encoding=encoding, quality=quality,
+                     jobs=jobs)
 
 
 def main():
@@ -128,25 +425,47 @@ def main():
     Accepts input folder, output file path, and page size as arguments, with defaults
     from ttcg_constants, a placeholder output path, and letter page size.
     """
-    parser = argparse.ArgumentParser(description="Generate a PDF from images in a 3x3 grid with no gaps.")
+    parser = argparse.ArgumentParser(description="Generate a PDF from images (or a card list) in a 3x3 grid with no gaps.")
     parser.add_argument('-i', '--input-folder', type=str, default=DEFAULT_GENERATED_CARDS_FOLDER,
                         help=f'Folder containing input images. Defaults to {DEFAULT_GENERATED_CARDS_FOLDER}')
     parser.add_argument('-o', '--output-file', type=str, default=DEFAULT_GENERATED_CARDS_PDF,  # Placeholder, replace with your constant
                         help=f'Output PDF file path. Defaults to: {DEFAULT_GENERATED_CARDS_PDF}')
     parser.add_argument('-s', '--page-size', type=str, default='letter', choices=['letter', 'A4'],
                         help='Page size for the PDF (letter or A4)')
+    parser.add_argument('-S', '--spreadsheet', type=str, default=None,
+                        help=f'Print the cards of a card list (e.g., {DEFAULT_CARD_LIST_FILE}) instead of an image folder, '
+                             f'rendering missing or changed cards into the input folder first.')
+    parser.add_argument('-d', '--deck', type=str, default=None,
+                        help=f'Print a deck manifest (SERIAL;COUNT lines) built from the card list '
+                             f'(defaults the card list to {DEFAULT_CARD_LIST_FILE}).')
+    parser.add_argument('--profile', type=str, default=DEFAULT_CARD_OUTPUT_PROFILE, choices=list(CARD_OUTPUT_PROFILES),
+                        help=f'Output profile cards of a card list are rendered with (default: {DEFAULT_CARD_OUTPUT_PROFILE}).')
+    parser.add_argument('--dpi', type=int, default=CARD_OUTPUT_DPI,
+                        help=f'Resolution the cards are embedded at (default: {CARD_OUTPUT_DPI}).')
+    parser.add_argument('-e', '--encoding', type=str, default='jpeg', choices=PRINT_ENCODINGS,
+                        help='Embed cards as JPEG (default) or lossless (flate).')
+    parser.add_argument('-q', '--quality', type=int, default=DEFAULT_PRINT_JPEG_QUALITY,
+                        help=f'JPEG quality (default: {DEFAULT_PRINT_JPEG_QUALITY}).')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes rendering and encoding cards (default: 1).')
 
     args = parser.parse_args()
 
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(args.output_file) or '.', exist_ok=True)
+
+    if args.spreadsheet is not None or args.deck is not None:
+        create_pdf_from_card_list(args.spreadsheet or DEFAULT_CARD_LIST_FILE, args.output_file, args.page_size,
+                                  args.deck, args.input_folder, args.profile, args.dpi, args.encoding, args.quality,
+                                  args.jobs)
+        return
+
     # Ensure input folder exists
     if not os.path.isdir(args.input_folder):
         output_text(f"ERROR: Input folder {args.input_folder} does not exist.", "error")
         return
 
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(args.output_file) or '.', exist_ok=True)
-
-    create_pdf(args.input_folder, args.output_file, args.page_size)
+    create_pdf(args.input_folder, args.output_file, args.page_size, args.dpi, args.encoding, args.quality, args.jobs)
 
 if __name__ == "__main__":
     main()
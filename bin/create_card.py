@@ -1,13 +1,24 @@
 #!/usr/bin/env python3
 from PIL import Image, ImageDraw, ImageFont
-import textwrap
 import argparse
 import random
 import csv
 import os
+import io
+import hashlib
+import collections
+import itertools
+import threading
+import queue
+import concurrent.futures
 
 # Import common methods from ttcg_tools.
 from ttcg_tools import output_text
+from ttcg_tools import get_card_data_from_row
+from ttcg_tools import write_file_atomically
+
+# Used to skip re-rendering unchanged cards.
+from render_manifest import RenderManifest
 
 # Import constants from ttcg_tools_constants.
 from ttcg_constants import VALID_OVERLAY_POSITIONS
@@ -18,6 +29,259 @@ from ttcg_constants import DEFAULT_CARD_HEIGHT
 from ttcg_constants import CARD_LIST_HEADER
 from ttcg_constants import DEFAULT_CARD_ELEMENTS_FOLDER
 from ttcg_constants import DEFAULT_FONT_PATH
+from ttcg_constants import TYPE_LIST_LOWER
+from ttcg_constants import VALID_CARD_LEVELS
+from ttcg_constants import DEFAULT_TEMPLATE_ASSET_CACHE_SIZE
+from ttcg_constants import DEFAULT_FRAME_LAYER_CACHE_SIZE
+from ttcg_constants import DEFAULT_FONT_FIT_CACHE_SIZE
+from ttcg_constants import DEFAULT_TEXT_LENGTH_CACHE_SIZE
+from ttcg_constants import DEFAULT_RENDER_MANIFEST_FILE
+from ttcg_constants import DEFAULT_ART_CACHE_SIZE
+from ttcg_constants import DEFAULT_ART_CACHE_FOLDER
+from ttcg_constants import CARD_OUTPUT_PROFILES
+from ttcg_constants import DEFAULT_CARD_OUTPUT_PROFILE
+from ttcg_constants import CARD_OUTPUT_DPI
+from ttcg_constants import DEFAULT_RENDER_QUEUE_SIZE
+from ttcg_constants import DEFAULT_RENDER_WRITER_THREADS
+from ttcg_constants import DEFAULT_REJECTED_CARDS_FILE
+
+
+# Global variables used by these methods.
+TEMPLATE_ASSET_BUFFER = collections.OrderedDict()
+TEMPLATE_ASSET_CACHE_SIZE = DEFAULT_TEMPLATE_ASSET_CACHE_SIZE
+FRAME_LAYER_BUFFER = collections.OrderedDict()
+FRAME_LAYER_CACHE_SIZE = DEFAULT_FRAME_LAYER_CACHE_SIZE
+FONT_BUFFER = {}
+FONT_BUFFER_PID = None
+FONT_FIT_BUFFER = collections.OrderedDict()
+FONT_FIT_CACHE_SIZE = DEFAULT_FONT_FIT_CACHE_SIZE
+TEXT_LENGTH_BUFFER = {}
+TEXT_LENGTH_CACHE_SIZE = DEFAULT_TEXT_LENGTH_CACHE_SIZE
+ART_BUFFER = collections.OrderedDict()
+ART_CACHE_SIZE = DEFAULT_ART_CACHE_SIZE
+# Art is decoded in its own thread by the render pipeline, so the art cache is locked.
+ART_BUFFER_LOCK = threading.Lock()
+# The folder resized card art is also stored in (see get_card_art), or None to only keep it in memory.
+ART_CACHE_FOLDER = None
+
+# The starting font sizes of the text boxes drawn by create_card (see preload_fonts).
+CARD_TEXT_FONT_SIZES = [50, 30, 20]
+
+# Bump this whenever a change to the rendering code changes how cards look, so the render manifest
+# (see process_csv_to_cards) re-renders every card.
+CARD_RENDER_VERSION = 1
+
+
+def get_template_asset(file_name, width=DEFAULT_CARD_WIDTH, height=DEFAULT_CARD_HEIGHT):
+    """
+    Get a card template image from the card elements folder, converted to RGBA and resized to the card size.
+
+    Each template is decoded only once per process. The most recently used templates are kept in memory
+    (up to TEMPLATE_ASSET_CACHE_SIZE of them) and the least recently used one is evicted first. Cached
+    images are shared, so callers must not modify them in place.
+
+    Args:
+        file_name (str): The template file name within DEFAULT_CARD_ELEMENTS_FOLDER (e.g., 'fire-50.png').
+        width (int): The width to resize the template to.
+        height (int): The height to resize the template to.
+
+    Returns:
+        Image: The RGBA template image, or None if the template file does not exist.
+    """
+    key = (f"{DEFAULT_CARD_ELEMENTS_FOLDER}/{file_name}", width, height)
+    if key in TEMPLATE_ASSET_BUFFER:
+        TEMPLATE_ASSET_BUFFER.move_to_end(key)
+        return TEMPLATE_ASSET_BUFFER[key]
+
+    try:
+        with Image.open(key[0]) as template_img:
+            asset = template_img.convert("RGBA")
+        if asset.size != (width, height):
+            asset = asset.resize((width, height), Image.Resampling.LANCZOS)
+    except FileNotFoundError:
+        # Remember missing templates too, so they are not looked up again.
+        asset = None
+
+    TEMPLATE_ASSET_BUFFER[key] = asset
+    while len(TEMPLATE_ASSET_BUFFER) > TEMPLATE_ASSET_CACHE_SIZE:
+        TEMPLATE_ASSET_BUFFER.popitem(last=False)
+    return asset
+
+
+def get_art_cache_file(art_key, cache_folder):
+    """
+    Get the path of the sidecar file a resized card art image is stored in.
+
+    Args:
+        art_key (tuple): The (absolute path, modification time, width) of the art (see get_card_art).
+        cache_folder (str): The folder the resized art is stored in.
+
+    Returns:
+        str: The cache file path.
+    """
+    digest = hashlib.sha256(repr(art_key).encode("utf-8")).hexdigest()
+    return os.path.join(cache_folder, f"art-{digest[:32]}.png")
+
+
+def load_card_art(image_file, width):
+    """
+    Decode a card art image, converted to RGBA and resized to a width (keeping its aspect ratio).
+
+    JPEGs are decoded in draft mode, which lets the decoder scale the image down by a power of two
+    (to no smaller than the target size) for a fraction of the cost of a full decode.
+
+    Args:
+        image_file (str): Path to the art image.
+        width (int): The width to resize the art to.
+
+    Returns:
+        Image: The RGBA art image.
+
+    Raises:
+        FileNotFoundError: If the image does not exist.
+    """
+    with Image.open(image_file) as art_img:
+        # Calculate new height maintaining aspect ratio
+        aspect_ratio = art_img.size[1] / art_img.size[0]
+        new_height = int(width * aspect_ratio)
+        if art_img.format == "JPEG":
+            art_img.draft("RGB", (width, new_height))
+        art = art_img.convert("RGBA")
+    if art.size != (width, new_height):
+        art = art.resize((width, new_height), Image.Resampling.LANCZOS)
+    return art
+
+
+def get_card_art(image_file, width=DEFAULT_CARD_WIDTH):
+    """
+    Get a card art image, converted to RGBA and resized to a width (see load_card_art).
+
+    Resized art is keyed by the art's path, modification time and the width, so art that has not
+    changed is only decoded once. This is safe to call from several threads. The most recently used
+    images are kept in memory (up to ART_CACHE_SIZE of them), and if ART_CACHE_FOLDER is set they are
+    also stored there as sidecar PNGs, so later runs do not read the original art at all. Cached
+    images are shared, so callers must not modify them in place.
+
+    Args:
+        image_file (str): Path to the art image.
+        width (int): The width to resize the art to.
+
+    Returns:
+        Image: The RGBA art image.
+
+    Raises:
+        FileNotFoundError: If the image does not exist.
+    """
+    key = (os.path.abspath(image_file), os.stat(image_file).st_mtime_ns, width)
+    with ART_BUFFER_LOCK:
+        if key in ART_BUFFER:
+            ART_BUFFER.move_to_end(key)
+            return ART_BUFFER[key]
+
+    cache_file = get_art_cache_file(key, ART_CACHE_FOLDER) if ART_CACHE_FOLDER is not None else None
+    art = None
+    if cache_file is not None and os.path.isfile(cache_file):
+        try:
+            with Image.open(cache_file) as cached_img:
+                art = cached_img.convert("RGBA")
+        except OSError as e:
+            output_text(f"Ignoring unreadable art cache file {cache_file}: {e}", "warning")
+
+    if art is None:
+        art = load_card_art(image_file, width)
+        if cache_file is not None:
+            try:
+                os.makedirs(ART_CACHE_FOLDER, exist_ok=True)
+                # Save under a temporary name and replace, so a reader never sees a partial file.
+                temp_file = f"{cache_file}.tmp{os.getpid()}"
+                art.save(temp_file, format="PNG", compress_level=1)
+                os.replace(temp_file, cache_file)
+            except OSError as e:
+                output_text(f"Saving art cache file {cache_file}: {e}", "error")
+
+    with ART_BUFFER_LOCK:
+        ART_BUFFER[key] = art
+        while len(ART_BUFFER) > ART_CACHE_SIZE:
+            ART_BUFFER.popitem(last=False)
+    return art
+
+
+def get_font(font_size, font_path=DEFAULT_FONT_PATH):
+    """
+    Get a font at a given size, loading each (path, size) pair only once per process.
+
+    The buffer is reset when used from a new (e.g., forked worker) process, so font objects are never
+    shared between processes.
+
+    Args:
+        font_size (int): The font size.
+        font_path (str): Path to the TrueType font file (Defaults to DEFAULT_FONT_PATH).
+
+    Returns:
+        ImageFont: The font, or Pillow's default font if the font file could not be loaded.
+    """
+    global FONT_BUFFER_PID
+    if FONT_BUFFER_PID != os.getpid():
+        FONT_BUFFER.clear()
+        FONT_BUFFER_PID = os.getpid()
+
+    key = (font_path, font_size)
+    if key not in FONT_BUFFER:
+        try:
+            FONT_BUFFER[key] = ImageFont.truetype(font_path, font_size)
+        except OSError:
+            FONT_BUFFER[key] = ImageFont.load_default()
+    return FONT_BUFFER[key]
+
+
+def preload_fonts(font_sizes=None, font_path=DEFAULT_FONT_PATH):
+    """
+    Load a font at every size the card text boxes can shrink to, so no card has to wait on a font load.
+
+    Args:
+        font_sizes (iterable of int, optional): The sizes to load. Defaults to every size from 1 up to
+                                                the largest of CARD_TEXT_FONT_SIZES.
+        font_path (str): Path to the TrueType font file (Defaults to DEFAULT_FONT_PATH).
+    """
+    if font_sizes is None:
+        font_sizes = range(1, max(CARD_TEXT_FONT_SIZES) + 1)
+    for font_size in font_sizes:
+        get_font(font_size, font_path)
+
+
+def get_template_file_names():
+    """
+    Get the file name of every card template that create_base_card can use.
+
+    Returns:
+        list of str: The type backgrounds (for each translucency), effect overlays and level stars.
+    """
+    file_names = []
+    for card_type in TYPE_LIST_LOWER:
+        for translucency in VALID_TRANSLUCENT_VALUES:
+            file_names.append(f"{card_type}.png" if translucency == 100 else f"{card_type}-{translucency}.png")
+    for style in VALID_OVERLAY_STYLES:
+        if style is not None:
+            file_names.extend(f"{style}-{position}.png" for position in VALID_OVERLAY_POSITIONS)
+    file_names.extend(f"{level} star.png" for level in VALID_CARD_LEVELS)
+    return file_names
+
+
+def preload_template_assets(width=DEFAULT_CARD_WIDTH, height=DEFAULT_CARD_HEIGHT):
+    """
+    Load every card template into the template asset cache, growing the cache to hold all of them.
+
+    This is useful before a batch render, so no card has to wait on a template being decoded.
+
+    Args:
+        width (int): The card width to resize the templates to.
+        height (int): The card height to resize the templates to.
+    """
+    global TEMPLATE_ASSET_CACHE_SIZE
+    file_names = get_template_file_names()
+    TEMPLATE_ASSET_CACHE_SIZE = max(TEMPLATE_ASSET_CACHE_SIZE, len(TEMPLATE_ASSET_BUFFER) + len(file_names))
+    for file_name in file_names:
+        get_template_asset(file_name, width, height)
 
 
 def add_effect_overlay_image(final_img, style, position, width=DEFAULT_CARD_WIDTH, height=DEFAULT_CARD_HEIGHT):
@@ -29,6 +293,8 @@ def add_effect_overlay_image(final_img, style, position, width=DEFAULT_CARD_WIDT
         style (str): The overlay style to use. Valid options are in the VALID_OVERLAY_STYLES variable.
         position (str): The position to place the overlay. This is either the effect 1 
             box or effect two box. Valid options are "top" or "bottom"        
+        width (int): The width of the card (Defaults to 750).
+        height (int): The height of the card (Defaults to 1050).
         
     Returns:
         final_image (Image): The image with the added overlay or the original 
@@ -47,20 +313,133 @@ def add_effect_overlay_image(final_img, style, position, width=DEFAULT_CARD_WIDT
         output_text(f"Valid overlay styles are: {VALID_OVERLAY_STYLES}", "warning")
         return final_img
     
-    base_image_path = f"{DEFAULT_CARD_ELEMENTS_FOLDER}/{style}-{position}.png"
-    try:
-        base_img = Image.open(base_image_path).convert("RGBA")
-        if base_img.size != (width, height):
-            base_img = base_img.resize((width, height), Image.Resampling.LANCZOS)
+    # If no overlay image is found, keep just the original.
+    base_img = get_template_asset(f"{style}-{position}.png", width, height)
+    if base_img is not None:
         # Ensure we're using the alpha channel correctly
         final_img = Image.alpha_composite(final_img, base_img)
-    except FileNotFoundError:
-        # If no type image found, keep just the original
-        pass
     
     return final_img
 
 
+def get_type_template_name(card_type, translucency=100):
+    """
+    Get the file name of the type background template for a card.
+
+    Args:
+        card_type (str): The type of the card (case-insensitive).
+        translucency (int): The translucency to use for minor features of the card art.
+
+    Returns:
+        str: The template file name (e.g., 'fire-50.png').
+    """
+    if translucency == 100:
+        return f"{card_type.lower()}.png"
+    return f"{card_type.lower()}-{translucency}.png"
+
+
+def get_card_input_files(card_data):
+    """
+    Get every file that rendering a card reads: its art, its frame templates and the font.
+
+    Args:
+        card_data (dict): The card data (see create_card).
+
+    Returns:
+        list of str: The file paths, including files that do not exist.
+    """
+    input_files = []
+    if card_data.get("image"):
+        input_files.append(card_data["image"])
+    template_names = [get_type_template_name(card_data["type"], card_data["translucency"])]
+    for style, position in ((card_data.get("effect1_style"), "top"), (card_data.get("effect2_style"), "bottom")):
+        if style is not None and style.lower() != "none":
+            template_names.append(f"{style}-{position}.png")
+    template_names.append(f"{card_data['level']} star.png")
+    input_files.extend(f"{DEFAULT_CARD_ELEMENTS_FOLDER}/{name}" for name in template_names)
+    input_files.append(DEFAULT_FONT_PATH)
+    return input_files
+
+
+def get_render_settings(scale=None, profile=DEFAULT_CARD_OUTPUT_PROFILE):
+    """
+    Get the render settings that change how a rendered card looks (recorded in the render manifest).
+
+    Args:
+        scale (float, optional): The scale factor cards are rendered at (see render_card).
+        profile (str): The output profile cards are saved with (see CARD_OUTPUT_PROFILES).
+
+    Returns:
+        dict: The settings.
+    """
+    width, height = get_render_size(scale=scale)
+    return {"version": CARD_RENDER_VERSION, "width": width, "height": height,
+            "profile": profile, "output": CARD_OUTPUT_PROFILES.get(profile), "dpi": CARD_OUTPUT_DPI}
+
+
+def get_frame_layer(card_type, 
+                    card_level, 
+                    width=DEFAULT_CARD_WIDTH, 
+                    height=DEFAULT_CARD_HEIGHT, 
+                    translucency=100, 
+                    effect1_style=None, 
+                    effect2_style=None):
+    """
+    Get the card frame for a combination of type, translucency, effect styles and level, composed once.
+
+    The frame is the type background, effect overlays and level stars stacked on a transparent canvas, so
+    a card only needs one composite of its frame over the card image. Cards in a set share a small number
+    of frames, so the most recently used ones are kept in memory (up to FRAME_LAYER_CACHE_SIZE of them).
+    Cached frames are shared, so callers must not modify them in place.
+
+    Args:
+        card_type (str): The type of the card.
+        card_level (int): The level of the card.
+        width (int): The width of the card (Defaults to 750).
+        height (int): The height of the card (Defaults to 1050).
+        translucency (int): The translucency to use for minor features of the card art. 
+        effect1_style (str): The style to use for effect one.
+        effect2_style (str): The style to use for effect two.
+
+    Returns:
+        Image: The RGBA card frame.
+    """
+    base_image_name = get_type_template_name(card_type, translucency)
+
+    key = (DEFAULT_CARD_ELEMENTS_FOLDER, base_image_name, str(card_level), effect1_style, effect2_style, width, height)
+    if key in FRAME_LAYER_BUFFER:
+        FRAME_LAYER_BUFFER.move_to_end(key)
+        return FRAME_LAYER_BUFFER[key]
+
+    # Print base image name for debugging.
+    #output_text(f"base_image_name set to: {base_image_name}", "note")
+
+    frame_img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+
+    # If no type image found, keep the frame translucent
+    base_img = get_template_asset(base_image_name, width, height)
+    if base_img is not None:
+        # Ensure we're using the alpha channel correctly
+        frame_img = Image.alpha_composite(frame_img, base_img)
+
+    if effect1_style is not None:
+        frame_img = add_effect_overlay_image(frame_img, effect1_style, "top", width, height)
+
+    if effect2_style is not None:
+        frame_img = add_effect_overlay_image(frame_img, effect2_style, "bottom", width, height)
+
+    # Overlay level-specific PNG (no overlay if level image not found)
+    level_img = get_template_asset(f"{card_level} star.png", width, height)
+    if level_img is not None:
+        # Use alpha_composite for level overlay too
+        frame_img = Image.alpha_composite(frame_img, level_img)
+
+    FRAME_LAYER_BUFFER[key] = frame_img
+    while len(FRAME_LAYER_BUFFER) > FRAME_LAYER_CACHE_SIZE:
+        FRAME_LAYER_BUFFER.popitem(last=False)
+    return frame_img
+
+
 def create_base_card(card_type, 
                      card_level, 
                      width=DEFAULT_CARD_WIDTH, 
@@ -78,7 +457,8 @@ def create_base_card(card_type,
         card_level (int): The level of the card.
         width (int): The width of the card (Defaults to 750).
         height (int): The height of the card (Defaults to 1050).
-        card_image (str): The main image to use behind the card. (Defaults to None).
+        card_image (str or Image): The main image to use behind the card, or the image already loaded
+            by get_card_art. (Defaults to None).
         translucency (int): The translucency to use for minor features of the card art. 
         effect1_style (str): The style to use for effect one.
         effect2_style (str): The style to use for effect two.
@@ -92,52 +472,17 @@ def create_base_card(card_type,
     # Add card_image as bottom layer if provided, resized to width only
     if card_image:
         try:
-            bg_img = Image.open(card_image).convert("RGBA")
-            if bg_img.size != (width, height):
-                # Calculate new height maintaining aspect ratio
-                aspect_ratio = bg_img.size[1] / bg_img.size[0]
-                new_height = int(width * aspect_ratio)
-                bg_img = bg_img.resize((width, new_height), Image.Resampling.LANCZOS)
+            bg_img = card_image if isinstance(card_image, Image.Image) else get_card_art(card_image, width)
             final_img.paste(bg_img, (0, 0), bg_img)
         except FileNotFoundError:
             pass
 
-    # Get base image based on type (case-insensitive)
-    if translucency == 100:
-        base_image_path = f"{DEFAULT_CARD_ELEMENTS_FOLDER}/{card_type.lower()}.png"
-    else:
-        base_image_path = f"{DEFAULT_CARD_ELEMENTS_FOLDER}/{card_type.lower()}-{translucency}.png"
-        
-    # Print base image path for debugging.
-    #output_text(f"base_image_path set to: {base_image_path}", "note")
-        
-    try:
-        base_img = Image.open(base_image_path).convert("RGBA")
-        if base_img.size != (width, height):
-            base_img = base_img.resize((width, height), Image.Resampling.LANCZOS)
-        # Ensure we're using the alpha channel correctly
-        final_img = Image.alpha_composite(final_img, base_img)
-    except FileNotFoundError:
-        # If no type image found, keep just the card_image or translucent
-        pass
-        
-    if effect1_style is not None:
-        final_img = add_effect_overlay_image(final_img, effect1_style, "top")
-        
-    if effect2_style is not None:
-        final_img = add_effect_overlay_image(final_img, effect2_style, "bottom")
-
-    # Overlay level-specific PNG
-    level_image_path = f"{DEFAULT_CARD_ELEMENTS_FOLDER}/{card_level} star.png"
-    try:
-        level_img = Image.open(level_image_path).convert("RGBA")
-        if level_img.size != (width, height):
-            level_img = level_img.resize((width, height), Image.Resampling.LANCZOS)
-        # Use alpha_composite for level overlay too
-        final_img = Image.alpha_composite(final_img, level_img)
-    except FileNotFoundError:
-        # No overlay if level image not found
-        pass
+    # Draw the card frame (everything except the card image and text) over the card image.
+    frame_img = get_frame_layer(card_type, card_level, width, height, translucency, effect1_style, effect2_style)
+    if final_img.getbbox() is None:
+        # Nothing to draw the frame over, so use a copy the caller may draw on.
+        return frame_img.copy()
+    final_img = Image.alpha_composite(final_img, frame_img)
 
     return final_img
 
@@ -153,7 +498,7 @@ def squish_text_horizontally(text, font_path, font_size, squish_factor, output_p
         squish_factor (float): Horizontal squish factor (e.g., 0.5 for half width).
         output_path (str): Path to save the output image.
     """
-    font = ImageFont.truetype(font_path, font_size)
+    font = get_font(font_size, font_path)
     text_width, text_height = font.getsize(text)
 
     image = Image.new("RGBA", (text_width, text_height), (0, 0, 0, 0))
@@ -170,7 +515,127 @@ def squish_text_horizontally(text, font_path, font_size, squish_factor, output_p
     squished_image.save(output_path)
 
 
-def draw_single_line_text(draw, text, top_left, bottom_right, initial_font_size=50, color=(0, 0, 0, 255), center=False):
+def search_font_size(fits, initial_font_size, monotonic=True):
+    """
+    Find the largest font size, from 2 up to initial_font_size, for which some text fits its box.
+
+    Args:
+        fits (function): Takes a font size and returns True if the text fits at that size.
+        initial_font_size (int): The largest font size to try.
+        monotonic (bool): True if the text fitting at a size means it also fits at every smaller size, in
+                          which case the initial size is tried and then the size is found by binary
+                          search. Otherwise every size is tried from the top down.
+
+    Returns:
+        int: The largest fitting font size, or the smallest size (1, or initial_font_size if that is
+             smaller) if none fits.
+    """
+    if not monotonic:
+        font_size = initial_font_size
+        while font_size > 1 and not fits(font_size):
+            font_size -= 1
+        return font_size
+
+    # Most text fits at the initial size, so try that before searching.
+    if initial_font_size > 1 and fits(initial_font_size):
+        return initial_font_size
+
+    low, high = 2, initial_font_size - 1
+    best = min(initial_font_size, 1)
+    while low <= high:
+        middle = (low + high) // 2
+        if fits(middle):
+            best = middle
+            low = middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def get_fitting_font_size(key, fits, initial_font_size, monotonic=True):
+    """
+    Get the largest fitting font size of a text box (see search_font_size), searching each box only once.
+
+    The most recently used results are kept in memory (up to FONT_FIT_CACHE_SIZE of them).
+
+    Args:
+        key (tuple): Identifies the text, box and font, e.g. (kind, text, box_width, box_height,
+                     initial_font_size, font_path).
+        fits (function): Takes a font size and returns True if the text fits at that size.
+        initial_font_size (int): The largest font size to try.
+        monotonic (bool): Whether fitting is monotonic in the font size (see search_font_size).
+
+    Returns:
+        int: The font size.
+    """
+    if key in FONT_FIT_BUFFER:
+        FONT_FIT_BUFFER.move_to_end(key)
+        return FONT_FIT_BUFFER[key]
+
+    font_size = search_font_size(fits, initial_font_size, monotonic)
+    FONT_FIT_BUFFER[key] = font_size
+    while len(FONT_FIT_BUFFER) > FONT_FIT_CACHE_SIZE:
+        FONT_FIT_BUFFER.popitem(last=False)
+    return font_size
+
+
+def get_text_length(font, text):
+    """
+    Get the advance width of a piece of text (e.g., a word) in a font, measuring each only once.
+
+    Words repeat heavily between effects, so the widths are kept in memory until TEXT_LENGTH_CACHE_SIZE
+    of them are stored, at which point the buffer is cleared.
+
+    Args:
+        font (ImageFont): The font to measure with.
+        text (str): The text to measure.
+
+    Returns:
+        float: The width of the text in pixels.
+    """
+    key = (getattr(font, "path", None), getattr(font, "size", None), text)
+    if key not in TEXT_LENGTH_BUFFER:
+        if len(TEXT_LENGTH_BUFFER) >= TEXT_LENGTH_CACHE_SIZE:
+            TEXT_LENGTH_BUFFER.clear()
+        TEXT_LENGTH_BUFFER[key] = font.getlength(text)
+    return TEXT_LENGTH_BUFFER[key]
+
+
+def wrap_text_to_width(text, font, max_width):
+    """
+    Greedily wrap text into lines no wider than a number of pixels, using the measured width of each word.
+
+    Words are kept on the current line while it fits and moved to a new line otherwise. A single word
+    wider than max_width is kept on its own line. Existing line breaks are kept.
+
+    Args:
+        text (str): The text to wrap.
+        font (ImageFont): The font the text will be drawn with.
+        max_width (int): The maximum line width in pixels.
+
+    Returns:
+        str: The wrapped text, with lines separated by newlines.
+    """
+    space_width = get_text_length(font, " ")
+    lines = []
+    for paragraph in text.split("\n"):
+        line_words = []
+        line_width = 0
+        for word in paragraph.split():
+            word_width = get_text_length(font, word)
+            if line_words and line_width + space_width + word_width > max_width:
+                lines.append(" ".join(line_words))
+                line_words = [word]
+                line_width = word_width
+            else:
+                line_width += (space_width if line_words else 0) + word_width
+                line_words.append(word)
+        lines.append(" ".join(line_words))
+    return "\n".join(lines)
+
+
+def draw_single_line_text(draw, text, top_left, bottom_right, initial_font_size=50, color=(0, 0, 0, 255), center=False,
+                          descender_padding=5):
     """
     Draws text within a box defined by top-left and bottom-right corners, auto-adjusting
     font size to fit vertically and squishing horizontally if too wide, without wrapping.
@@ -183,6 +648,7 @@ def draw_single_line_text(draw, text, top_left, bottom_right, initial_font_size=
         initial_font_size (int): Starting font size to try (default 50).
         color (tuple): RGBA color tuple (default black: (0, 0, 0, 255)).
         center (bool): If True, centers text vertically and horizontally (default False).
+        descender_padding (int): Extra box height given to text with descender characters (default 5).
     """
     # Calculate box dimensions
     x1, y1 = top_left
@@ -190,65 +656,64 @@ def draw_single_line_text(draw, text, top_left, bottom_right, initial_font_size=
     
     # Adjust box height for descender characters
     if any(char in text for char in 'qypjg'):
-        y2 += 5
+        y2 += descender_padding
         
     box_width = x2 - x1
     box_height = y2 - y1
 
-    # Use DejaVu Sans font
-    font_path = DEFAULT_FONT_PATH
-    try:
-        font = ImageFont.truetype(font_path, initial_font_size)
-    except:
-        font = ImageFont.load_default()
-        initial_font_size = 12  # Default font is small, approximate size
-
-    # Start with initial font size and adjust downward for height
-    font_size = initial_font_size
-    while font_size > 1:
-        font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default()
-
-        # Measure text dimensions
-        bbox = draw.textbbox((0, 0), text, font=font)
+    # Measure text dimensions (each size is only measured once)
+    measured = {}
+    def measure(size):
+        if size not in measured:
+            measured[size] = draw.textbbox((0, 0), text, font=get_font(size))
+        return measured[size]
+
+    def fits(size):
+        bbox = measure(size)
+        return bbox[3] - bbox[1] <= box_height
+
+    # Find the largest font size (up to the initial font size) that fits vertically
+    key = ("single_line", text, box_height, initial_font_size, DEFAULT_FONT_PATH)
+    font_size = get_fitting_font_size(key, fits, initial_font_size)
+
+    if font_size > 1:
+        font = get_font(font_size)
+        bbox = measure(font_size)
         text_width = bbox[2] - bbox[0]
         text_height = bbox[3] - bbox[1]
 
-        # Check vertical fit
-        if text_height <= box_height:
-            if text_width <= box_width:
-                # Fits naturally, no squishing
-                if center:
-                    x_offset = (box_width - text_width) // 2
-                    y_offset = (box_height - text_height) // 2
-                    draw.text((x1 + x_offset, y1 + y_offset), text, font=font, fill=color)
-                else:
-                    draw.text((x1, y1), text, font=font, fill=color)
+        if text_width <= box_width:
+            # Fits naturally, no squishing
+            if center:
+                x_offset = (box_width - text_width) // 2
+                y_offset = (box_height - text_height) // 2
+                draw.text((x1 + x_offset, y1 + y_offset), text, font=font, fill=color)
             else:
-                # Create temp image for text
-                temp_img = Image.new("RGBA", (text_width, box_height + 20), (0, 0, 0, 0))
-                temp_draw = ImageDraw.Draw(temp_img)
-                temp_draw.text((0, 0), text, font=font, fill=color)
-
-                # Calculate squish factor
-                squish_factor = text_width / box_width  # Note: This seems reversed; should be box_width / text_width
-                affine_matrix = (squish_factor, 0, 0, 0, 1, 0)  # Horizontal scale only
-
-                # Squish the text
-                squished_img = temp_img.transform((box_width, box_height + 20), Image.AFFINE, affine_matrix, resample=Image.BILINEAR)
-                
-                # Center horizontally and vertically if requested
-                if center:
-                    x_offset = (box_width - box_width) // 2  # box_width after squishing
-                    y_offset = (box_height - text_height) // 2  # Use text_height for vertical centering
-                    draw._image.paste(squished_img, (x1 + x_offset, y1 + y_offset), squished_img)
-                else:
-                    draw._image.paste(squished_img, (x1, y1), squished_img)
-            return
+                draw.text((x1, y1), text, font=font, fill=color)
         else:
-            font_size -= 1  # Reduce size for height
+            # Create temp image for text
+            temp_img = Image.new("RGBA", (text_width, box_height + 20), (0, 0, 0, 0))
+            temp_draw = ImageDraw.Draw(temp_img)
+            temp_draw.text((0, 0), text, font=font, fill=color)
+
+            # Calculate squish factor
+            squish_factor = text_width / box_width  # Note: This seems reversed; should be box_width / text_width
+            affine_matrix = (squish_factor, 0, 0, 0, 1, 0)  # Horizontal scale only
+
+            # Squish the text
+            squished_img = temp_img.transform((box_width, box_height + 20), Image.AFFINE, affine_matrix, resample=Image.BILINEAR)
+            
+            # Center horizontally and vertically if requested
+            if center:
+                x_offset = (box_width - box_width) // 2  # box_width after squishing
+                y_offset = (box_height - text_height) // 2  # Use text_height for vertical centering
+                draw._image.paste(squished_img, (x1 + x_offset, y1 + y_offset), squished_img)
+            else:
+                draw._image.paste(squished_img, (x1, y1), squished_img)
+        return
 
     # Fallback: Smallest size, squish if needed
-    font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default()
+    font = get_font(font_size)
     bbox = draw.textbbox((0, 0), text, font=font)
     text_width = bbox[2] - bbox[0]
     text_height = bbox[3] - bbox[1]
@@ -275,47 +740,32 @@ def draw_wrapped_text(draw, text, top_left, bottom_right, initial_font_size=50,
         initial_font_size (int): Starting font size to try (default 50).
         color (tuple): RGBA color tuple (default black: (0, 0, 0, 255)).
     """
-    import textwrap
-
     # Calculate box dimensions
     x1, y1 = top_left
     x2, y2 = bottom_right        
     box_width = x2 - x1
     box_height = y2 - y1
 
-    # Use DejaVu Sans font
-    font_path = DEFAULT_FONT_PATH
-    try:
-        font = ImageFont.truetype(font_path, initial_font_size)
-    except:
-        font = ImageFont.load_default()
-        initial_font_size = 12  # Default font is small, approximate size
-
-    # Start with initial font size and adjust downward for height
-    font_size = initial_font_size
-    while font_size > 1:
-        font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default()
-
-        # Wrap text to fit box width
-        wrapped_text = textwrap.fill(text, width=int(box_width / (font_size * 0.5)))  # Rough chars-per-line estimate
-        bbox = draw.textbbox((0, 0), wrapped_text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-
-        # Check vertical and horizontal fit
-        if text_height <= box_height and text_width <= box_width:
-            # Center the wrapped text
-            x_offset = (box_width - text_width) // 2
-            y_offset = (box_height - text_height) // 2
-            draw.text((x1 + x_offset, y1 + y_offset), wrapped_text, font=font, fill=color, align="center")
-            return
-        else:
-            font_size -= 1  # Reduce size if too tall or wide
-
-    # Fallback: Smallest size
-    font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default()
-    wrapped_text = textwrap.fill(text, width=int(box_width / (font_size * 0.5)))
-    bbox = draw.textbbox((0, 0), wrapped_text, font=font)
+    # Wrap the text to the box width and measure it (each size is only measured once)
+    measured = {}
+    def measure(size):
+        if size not in measured:
+            font = get_font(size)
+            wrapped_text = wrap_text_to_width(text, font, box_width)
+            measured[size] = (wrapped_text, draw.textbbox((0, 0), wrapped_text, font=font))
+        return measured[size]
+
+    def fits(size):
+        bbox = measure(size)[1]
+        return bbox[3] - bbox[1] <= box_height and bbox[2] - bbox[0] <= box_width
+
+    # Find the largest font size (up to the initial font size) that fits the box
+    key = ("wrapped", text, box_width, box_height, initial_font_size, DEFAULT_FONT_PATH)
+    font_size = get_fitting_font_size(key, fits, initial_font_size)
+
+    # Center the wrapped text
+    font = get_font(font_size)
+    wrapped_text, bbox = measure(font_size)
     text_width = bbox[2] - bbox[0]
     text_height = bbox[3] - bbox[1]
     x_offset = (box_width - text_width) // 2
@@ -323,14 +773,44 @@ def draw_wrapped_text(draw, text, top_left, bottom_right, initial_font_size=50,
     draw.text((x1 + x_offset, y1 + y_offset), wrapped_text, font=font, fill=color, align="center")
 
 
-def create_card(card_data, output_folder, output_file_name=None, tmp_file=False):
+def get_render_size(size=None, scale=None):
     """
-    Creates a TTCG trading card image with specified details and saves it to a file.
+    Get the pixel size to render a card at.
 
-    This function generates a 750x1050 pixel card image based on the provided card data,
-    including type, level, name, subtype, attack, defense, and effects. It uses a base image
-    determined by the card type and level, overlays text in designated areas, and saves the
-    result as a PNG file in the specified output folder.
+    Args:
+        size (tuple, optional): The (width, height) to render at.
+        scale (float, optional): A scale factor of the full 750x1050 card size (used if size is not given).
+
+    Returns:
+        tuple: The (width, height) to render at.
+
+    Raises:
+        ValueError: If the size or scale is not positive.
+    """
+    if size is not None:
+        width, height = int(size[0]), int(size[1])
+    elif scale is not None:
+        width, height = round(DEFAULT_CARD_WIDTH * scale), round(DEFAULT_CARD_HEIGHT * scale)
+    else:
+        return DEFAULT_CARD_WIDTH, DEFAULT_CARD_HEIGHT
+    if width < 1 or height < 1:
+        raise ValueError(f"Invalid card render size: {width}x{height}")
+    return width, height
+
+
+def render_card(card_data, encode=None, size=None, scale=None, art=None, **save_options):
+    """
+    Render a TTCG trading card image in memory.
+
+    This function generates a card image based on the provided card data, including type, level,
+    name, subtype, attack, defense, and effects. It uses a base image determined by the card type
+    and level and overlays text in designated areas. Nothing is written to disk, so previews and
+    other consumers can use the image directly.
+
+    The card is 750x1050 pixels unless a size or scale is given, in which case it is rendered
+    natively at that size: the templates are resized once to that size (and cached), and the
+    layout boxes and font sizes are scaled to match. This is much cheaper than rendering a full
+    card and downscaling it, e.g. for previews and thumbnails.
 
     Args:
         card_data (dict): A dictionary containing card details with the following keys:
@@ -346,34 +826,49 @@ def create_card(card_data, output_folder, output_file_name=None, tmp_file=False)
             - serial (str): The serial number for this card.
             - effect1_style (str): The style to use for the effect one box (default = None).
             - effect2_style (str): The style to use for the effect two box (default = None).
-        output_folder (str): Path to the folder where the card image will be saved.
-        output_file_name (str): An optional output file name to use. This should not include the output folder path.
-        tmp_file (bool): True if this is saving a temporary file (disables output).
+        encode (str, optional): An image format (e.g., 'PNG' or 'JPEG'). If given, the encoded
+            image bytes are returned instead of the image.
+        size (tuple, optional): The (width, height) to render the card at.
+        scale (float, optional): A scale factor of the full card size (used if size is not given).
+        art (Image, optional): The card art already loaded at the card width (see get_card_art). If
+            None, the art is loaded from card_data["image"].
+        **save_options: Extra options passed to Image.save when encoding (e.g., quality=90).
 
     Returns:
-        None: The function saves the card image to a file and prints the file path.
+        Image or bytes: The RGBA card image, or its encoded bytes if encode is given.
 
     Notes:
-        - The card dimensions are fixed at 750x1050 pixels (2.5" x 3.5" at 300 DPI).
-        - Text is drawn in specific boxes using helper functions (`create_base_card`,
-          `draw_single_line_text`, `draw_wrapped_text`), which are assumed to be defined elsewhere.
-        - The output file is named `<serial>.png`, with spaces in the name replaced by underscores.
+        - The full card size is 750x1050 pixels (2.5" x 3.5" at 300 DPI).
     """
     # TTCG card dimensions: 2.5" x 3.5" at 300 DPI = 750 x 1050 pixels
-    width, height = DEFAULT_CARD_WIDTH, DEFAULT_CARD_HEIGHT
-    
+    width, height = get_render_size(size, scale)
+
+    # The layout is given for a full size card, so scale it to the render size.
+    scale_x = width / DEFAULT_CARD_WIDTH
+    scale_y = height / DEFAULT_CARD_HEIGHT
+    font_scale = min(scale_x, scale_y)
+
+    def point(x, y):
+        return round(x * scale_x), round(y * scale_y)
+
+    def font_size(size):
+        return max(1, round(size * font_scale))
+
+    descender_padding = max(1, round(5 * scale_y))
+
     img = create_base_card(card_data["type"], 
                            card_data["level"], 
                            width, 
                            height, 
-                           card_data["image"], 
+                           card_data["image"] if art is None else art, 
                            card_data["translucency"],
                            card_data["effect1_style"],
                            card_data["effect2_style"])
     draw = ImageDraw.Draw(img)
 
     # Draw name in a box from (70, 35) to (585, 70)
-    draw_single_line_text(draw, card_data["name"], (70, 35), (585, 70))
+    draw_single_line_text(draw, card_data["name"], point(70, 35), point(585, 70), font_size(50),
+                          descender_padding=descender_padding)
     
     # Draw subtypes in a box from (70, 90) to (585, 120)
     card_type = card_data["type"]
@@ -382,108 +877,540 @@ def create_card(card_data, output_folder, output_file_name=None, tmp_file=False)
         subtypes_line = f"{card_type}"
     else:
         subtypes_line = f"{card_type}, {card_subtype}"
-    draw_single_line_text(draw, subtypes_line, (70, 90), (585, 120))
+    draw_single_line_text(draw, subtypes_line, point(70, 90), point(585, 120), font_size(50),
+                          descender_padding=descender_padding)
     
     # Draw ATK and def in the boxes.
     atk_x_min, atk_x_max = 135, 215    
     atk_y_min, atk_y_max = 628, 665
     draw_single_line_text(draw, 
                           card_data["attack"], 
-                          (atk_x_min, atk_y_min), 
-                          (atk_x_max, atk_y_max), 
-                          initial_font_size=50, 
-                          center=True)
+                          point(atk_x_min, atk_y_min), 
+                          point(atk_x_max, atk_y_max), 
+                          initial_font_size=font_size(50), 
+                          center=True,
+                          descender_padding=descender_padding)
     draw_single_line_text(draw, card_data["defense"], 
-                          (width - atk_x_max, atk_y_min), 
-                          (width - atk_x_min, atk_y_max), 
-                          initial_font_size=50, 
-                          center=True)
+                          point(DEFAULT_CARD_WIDTH - atk_x_max, atk_y_min), 
+                          point(DEFAULT_CARD_WIDTH - atk_x_min, atk_y_max), 
+                          initial_font_size=font_size(50), 
+                          center=True,
+                          descender_padding=descender_padding)
     
     # Draw effects in boxes.
-    draw_wrapped_text(draw, card_data["effect1"], (70, 710), (680, 810), initial_font_size=30)
-    draw_wrapped_text(draw, card_data["effect2"], (70, 870), (680, 970), initial_font_size=30)
+    draw_wrapped_text(draw, card_data["effect1"], point(70, 710), point(680, 810), initial_font_size=font_size(30))
+    draw_wrapped_text(draw, card_data["effect2"], point(70, 870), point(680, 970), initial_font_size=font_size(30))
     
     # Draw the serial number and trademark.
-    draw_single_line_text(draw, card_data["serial"], (530, 1007), (722, 1022), initial_font_size=20)
-    draw_single_line_text(draw, "© True Trading Card Game Company", (31, 1007), (600, 1022), initial_font_size=20)
+    draw_single_line_text(draw, card_data["serial"], point(530, 1007), point(722, 1022),
+                          initial_font_size=font_size(20), descender_padding=descender_padding)
+    draw_single_line_text(draw, "© True Trading Card Game Company", point(31, 1007), point(600, 1022),
+                          initial_font_size=font_size(20), descender_padding=descender_padding)
+
+    if encode is None:
+        return img
+    return encode_card_image(img, encode, **save_options)
+
+
+def flatten_card_image(img, image_format):
+    """
+    Convert a card image to a mode the image format can store.
+
+    Formats without an alpha channel (JPEG) get the card flattened onto a white background, as it would be
+    printed, rather than having the alpha channel dropped.
+
+    Args:
+        img (Image): The RGBA card image.
+        image_format (str): The image format (e.g., 'PNG' or 'JPEG').
+
+    Returns:
+        Image: The image to save.
+    """
+    if image_format.upper() in ("JPEG", "JPG") and img.mode != "RGB":
+        # JPEG has no alpha channel.
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img.convert("RGBA")).convert("RGB")
+    return img
+
+
+def encode_card_image(img, image_format, **save_options):
+    """
+    Encode a card image to bytes.
+
+    Args:
+        img (Image): The card image.
+        image_format (str): The image format (e.g., 'PNG' or 'JPEG').
+        **save_options: Extra options passed to Image.save.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    buffer = io.BytesIO()
+    flatten_card_image(img, image_format).save(buffer, format=image_format, **save_options)
+    return buffer.getvalue()
+
+
+def get_output_profile(profile):
+    """
+    Get the settings of a card output profile.
+
+    Args:
+        profile (str): The profile name (a key of CARD_OUTPUT_PROFILES).
+
+    Returns:
+        dict: The profile's format, extension and save_options.
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    if profile not in CARD_OUTPUT_PROFILES:
+        raise ValueError(f"Invalid output profile '{profile}', valid profiles are: {list(CARD_OUTPUT_PROFILES)}")
+    return CARD_OUTPUT_PROFILES[profile]
+
+
+def save_card_image(img, output_file, profile=DEFAULT_CARD_OUTPUT_PROFILE):
+    """
+    Save a card image using an output profile (see CARD_OUTPUT_PROFILES).
+
+    Args:
+        img (Image): The card image.
+        output_file (str): The file to save to.
+        profile (str): The output profile name.
+    """
+    settings = get_output_profile(profile)
+    flatten_card_image(img, settings["format"]).save(output_file,
+                                                     format=settings["format"],
+                                                     dpi=(CARD_OUTPUT_DPI, CARD_OUTPUT_DPI),
+                                                     **settings["save_options"])
+
+
+def get_card_output_file(card_data, output_folder, profile=DEFAULT_CARD_OUTPUT_PROFILE):
+    """
+    Get the file a card is saved to: `<output_folder>/<serial>.<profile extension>`.
+
+    Args:
+        card_data (dict): The card data.
+        output_folder (str): The folder cards are saved in.
+        profile (str): The output profile the card is saved with.
+
+    Returns:
+        str: The output file path.
+    """
+    return f"{output_folder}/{card_data['serial']}.{get_output_profile(profile)['extension']}"
+
+
+def create_card(card_data, output_folder, output_file_name=None, tmp_file=False, size=None, scale=None,
+                profile=DEFAULT_CARD_OUTPUT_PROFILE):
+    """
+    Creates a TTCG trading card image with specified details and saves it to a file.
+
+    The card is rendered by render_card and saved in the specified output folder, encoded by an
+    output profile (see CARD_OUTPUT_PROFILES).
+
+    Args:
+        card_data (dict): A dictionary containing card details (see render_card).
+        output_folder (str): Path to the folder where the card image will be saved.
+        output_file_name (str): An optional output file name to use. This should not include the output folder path.
+        tmp_file (bool): True if this is saving a temporary file (disables output).
+        size (tuple, optional): The (width, height) to render the card at (see render_card).
+        scale (float, optional): A scale factor of the full card size (see render_card).
+        profile (str): The output profile to save the card with (Defaults to DEFAULT_CARD_OUTPUT_PROFILE).
+
+    Returns:
+        str: The path of the saved card image.
+
+    Raises:
+        ValueError: If the output profile does not exist.
+
+    Notes:
+        - The output file is named `<serial>.<profile extension>` unless output_file_name is given.
+    """
+    get_output_profile(profile)
+    img = render_card(card_data, size=size, scale=scale)
 
     # Create the output card name.
     if output_file_name == None:
-        serial_num = card_data["serial"]
-        output_file = f"{output_folder}/{serial_num}.png"
+        output_file = get_card_output_file(card_data, output_folder, profile)
     else:
         output_file = f"{output_folder}/{output_file_name}"        
 
     # Save the card
-    img.save(output_file)
+    save_card_image(img, output_file, profile)
     if not tmp_file:
         output_text(f"Card saved as {output_file}", "success")
+    return output_file
 
 
-def process_csv_to_cards(csv_file_path, output_folder):
+def iter_card_rows(csv_file_path):
     """
-    Read a CSV file of card data and create cards by calling create_card for each entry.
+    Stream the rows of a card list CSV one at a time, after checking its header.
 
     Args:
         csv_file_path (str): Path to the CSV file containing card data.
-        output_folder: The folder to output images to.
 
-    Returns:
-        None
+    Yields:
+        tuple: (line_number, row) for each row after the header.
 
     Raises:
         FileNotFoundError: If the CSV file does not exist.
-        ValueError: If the CSV file format is invalid (e.g., wrong number of columns).
-
-    The CSV file is expected to have the following columns in order:
-    {CARD_LIST_HEADER}
-
-    For each row, it constructs a card_data dictionary and calls create_card(card_data, args.output).
+        ValueError: If the CSV header has the wrong number of columns.
     """
     if not os.path.isfile(csv_file_path):
         raise FileNotFoundError(f"The CSV file '{csv_file_path}' does not exist")
 
-    with open(csv_file_path, 'r', encoding='utf-8') as csvfile:
+    with open(csv_file_path, 'r', encoding='utf-8', newline='') as csvfile:
         # Use semicolon as delimiter
         csv_reader = csv.reader(csvfile, delimiter=';')
-        
+
         # Skip header row if present (assuming first row is header)
-        header = next(csv_reader)
+        header = next(csv_reader, [])
         expected_columns = len(CARD_LIST_HEADER)
         if len(header) != expected_columns:
             raise ValueError(f"CSV header has {len(header)} columns, expected {expected_columns}")
 
-        # Process each row
         for row in csv_reader:
-            if len(row) != expected_columns:
-                output_text(f"Row: {row}", "program")
-                raise ValueError(f"Row has {len(row)} columns, expected {expected_columns}")
-
-            # Extract data from the row
-            name, card_type, subtypes, level, image, attack, defense, effect1, effect2, serial, rarity, translucency, effect1_style, effect2_style = row
-
-            # Handle subtypes (convert to string, could be empty or comma-separated)
-            subtype_str = subtypes if subtypes else ""
-
-            # Create card data dictionary
-            card_data = {
-                "name": name,
-                "level": level,
-                "type": card_type,
-                "subtype": subtype_str,
-                "attack": attack,
-                "defense": defense,
-                "effect1": effect1,
-                "effect2": effect2,
-                "image": image,
-                "translucency": translucency,
-                "serial": serial,
-                "effect1_style": effect1_style,
-                "effect2_style": effect2_style
-            }
-
-            # Call create_card with the constructed card_data and args.output
-            create_card(card_data, output_folder)
+            yield csv_reader.line_num, row
+
+
+def warm_render_caches(preload_templates=False, scale=None, art_cache_folder=None):
+    """
+    Load the fonts (and optionally the card templates) used to render cards into this process's caches.
+
+    This is also the initializer of batch render worker processes.
+
+    Args:
+        preload_templates (bool): If True, also load every card template (see preload_template_assets).
+        scale (float, optional): The scale factor cards are rendered at (see render_card).
+        art_cache_folder (str, optional): If given, resized card art is also stored in this folder (see get_card_art).
+    """
+    global ART_CACHE_FOLDER
+    if art_cache_folder is not None:
+        ART_CACHE_FOLDER = art_cache_folder
+    preload_fonts()
+    if preload_templates:
+        preload_template_assets(*get_render_size(scale=scale))
+
+
+def render_card_data(card_data, output_folder, scale=None, profile=DEFAULT_CARD_OUTPUT_PROFILE):
+    """
+    Create one card for a batch render (see create_card).
+
+    Args:
+        card_data (dict): The card data.
+        output_folder (str): The folder to output the card image to.
+        scale (float, optional): A scale factor of the full card size (see render_card).
+        profile (str): The output profile to save the card with.
+
+    Returns:
+        str: The file name of the created card image, relative to output_folder.
+    """
+    return os.path.basename(create_card(card_data, output_folder, scale=scale, profile=profile))
+
+
+def start_pipeline_stage(function, input_queue, output_queue, workers=1):
+    """
+    Start the threads of one stage of the render pipeline (see render_cards_pipelined).
+
+    Each job (a dict) taken from input_queue is updated in place by function and then put on output_queue.
+    A job that already failed skips the function, and an exception raised by the function is stored as the
+    job's error. None marks the end of the jobs, and is passed on once every thread of the stage stopped.
+
+    Args:
+        function (function): Takes a job and updates it.
+        input_queue (queue.Queue): The queue the stage takes jobs from.
+        output_queue (queue.Queue): The queue the stage puts finished jobs on.
+        workers (int): The number of threads running the stage.
+
+    Returns:
+        list of threading.Thread: The started threads.
+    """
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            job = input_queue.get()
+            if job is None:
+                # Leave the end marker for the other threads of this stage.
+                input_queue.put(None)
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        output_queue.put(None)
+                return
+            if job.get("error") is None:
+                try:
+                    function(job)
+                except Exception as e:
+                    job["error"] = e
+            output_queue.put(job)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def render_cards_pipelined(jobs, output_folder, scale=None, profile=DEFAULT_CARD_OUTPUT_PROFILE,
+                           writers=DEFAULT_RENDER_WRITER_THREADS, queue_size=DEFAULT_RENDER_QUEUE_SIZE):
+    """
+    Render cards through a pipeline of threads: decode art -> compose and draw text -> encode and write.
+
+    Each stage runs in its own thread(s) and the stages are joined by bounded queues, so the art of the
+    next cards is decoded and earlier cards are encoded and written while a card is being composed. Pillow
+    releases the GIL while decoding, resizing and encoding, so the stages overlap and throughput is set by
+    the slowest stage (usually the encode, which gets several threads) rather than the sum of all of them.
+    Only one thread composes cards, so the template, frame and font caches are never shared between threads.
+
+    Args:
+        jobs (iterable of dict): The cards to render, each a dict with the card_data. A job that has an
+                                 error is passed through without being rendered.
+        output_folder (str): The folder to save the cards in.
+        scale (float, optional): A scale factor of the full card size to render at.
+        profile (str): The output profile to save the cards with.
+        writers (int): The number of threads encoding and writing cards.
+        queue_size (int): The number of jobs that can wait between two stages.
+
+    Yields:
+        dict: Each job once it is finished, with the file name of the saved card (output) or the error
+              it failed with (error). Jobs are yielded in the order they finish.
+    """
+    width, height = get_render_size(scale=scale)
+
+    def decode_art(job):
+        job["art"] = None
+        image_file = job["card_data"]["image"]
+        if image_file:
+            try:
+                job["art"] = get_card_art(image_file, width)
+            except FileNotFoundError:
+                # Render the card without art, as create_base_card does.
+                pass
+
+    def compose(job):
+        card_data = dict(job["card_data"], image="")
+        art = job.pop("art")
+        job["image"] = render_card(card_data, size=(width, height), art=art)
+
+    def write(job):
+        output_file = get_card_output_file(job["card_data"], output_folder, profile)
+        save_card_image(job.pop("image"), output_file, profile)
+        output_text(f"Card saved as {output_file}", "success")
+        job["output"] = os.path.basename(output_file)
+
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(4)]
+    start_pipeline_stage(decode_art, queues[0], queues[1])
+    start_pipeline_stage(compose, queues[1], queues[2])
+    start_pipeline_stage(write, queues[2], queues[3], writers)
+
+    producer_error = []
+
+    def produce():
+        try:
+            for job in jobs:
+                queues[0].put(job)
+        except BaseException as e:
+            producer_error.append(e)
+        finally:
+            queues[0].put(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    while True:
+        job = queues[3].get()
+        if job is None:
+            break
+        yield job
+    producer.join()
+    if producer_error:
+        raise producer_error[0]
+
+
+def write_rejected_rows(reject_file, rejected_rows):
+    """
+    Write the card list rows that failed to render to a reject file, or remove the file if none failed.
+
+    The reject file is a semicolon separated CSV of the line number, the error and the row's own fields,
+    so the rows can be fixed and copied back into the card list.
+
+    Args:
+        reject_file (str): The reject file.
+        rejected_rows (list of tuple): The (line_number, error, row) of every rejected row.
+    """
+    if not rejected_rows:
+        if os.path.isfile(reject_file):
+            os.remove(reject_file)
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    writer.writerow(["LINE", "ERROR"] + CARD_LIST_HEADER)
+    for line_number, error, row in sorted(rejected_rows, key=lambda rejected: rejected[0]):
+        writer.writerow([line_number, error] + list(row))
+    write_file_atomically(reject_file, buffer.getvalue())
+    output_text(f"Wrote {len(rejected_rows)} rejected row(s) to {reject_file}", "warning")
+
+
+def process_csv_to_cards(csv_file_path, output_folder, preload_templates=False, jobs=1, force=False, scale=None,
+                         art_cache_folder=None, profile=DEFAULT_CARD_OUTPUT_PROFILE, reject_file=None, serials=None):
+    """
+    Read a CSV file of card data and create a card for each entry.
+
+    Rows are streamed from the file rather than read up front. A row that cannot be rendered (e.g., it has
+    the wrong number of columns or its values are invalid) is reported, written to a reject file and
+    skipped, and the rest of the batch still renders.
+
+    With one job, cards are rendered by a pipeline of threads (see render_cards_pipelined). With more, each
+    card is rendered start to finish by one of a pool of worker processes.
+
+    A render manifest in the output folder (see render_manifest.RenderManifest) records what each card was
+    rendered from. Cards whose fields, art, templates, font and render settings did not change since the
+    last run are skipped, and cards that are no longer in the CSV have their images removed (unless a row
+    could not be read, as it may still hold one of them).
+
+    Args:
+        csv_file_path (str): Path to the CSV file containing card data.
+        output_folder: The folder to output images to.
+        preload_templates (bool): If True, load every card template before rendering (see preload_template_assets).
+        jobs (int): The number of worker processes to render with. 1 (the default) renders in this process.
+        force (bool): If True, render every card even if it did not change.
+        scale (float, optional): A scale factor of the full card size to render at, e.g. for thumbnails.
+        art_cache_folder (str, optional): If given, resized card art is stored in this folder, so later runs
+                                          do not decode the original art again (see get_card_art).
+        profile (str): The output profile to save cards with (see CARD_OUTPUT_PROFILES). Changing the
+                       profile renders every card again.
+        reject_file (str, optional): The file rows that failed to render are written to (see
+                                     write_rejected_rows). Defaults to DEFAULT_REJECTED_CARDS_FILE in the
+                                     output folder.
+        serials (set of str, optional): If given, only the cards with these serial numbers are rendered; the
+                                        other cards are left as they are (not rendered, nor removed).
+
+    Returns:
+        list of tuple: The (line_number, error) of every row that failed to render.
+
+    Raises:
+        FileNotFoundError: If the CSV file does not exist.
+        ValueError: If the CSV header has the wrong number of columns or the output profile does not exist.
+
+    The CSV file is expected to have the following columns in order:
+    {CARD_LIST_HEADER}
+    """
+    get_output_profile(profile)
+    if reject_file is None:
+        reject_file = os.path.join(output_folder, DEFAULT_REJECTED_CARDS_FILE)
+
+    # Read the header now, so a missing file or bad header is raised here rather than mid-render.
+    rows = iter_card_rows(csv_file_path)
+    first_row = next(rows, None)
+    if first_row is not None:
+        rows = itertools.chain([first_row], rows)
+
+    manifest = RenderManifest(os.path.join(output_folder, DEFAULT_RENDER_MANIFEST_FILE))
+    settings = get_render_settings(scale, profile)
+    rejected_rows = []
+    seen_serials = set()
+    unreadable_lines = []
+    skipped = []
+
+    def iter_render_jobs():
+        """
+        Yield a job (line_number, row, card_data, card_hash) for every card that needs rendering, and a
+        job with the error for every row that could not be read.
+        """
+        for line_number, row in rows:
+            job = {"line_number": line_number, "row": row, "error": None}
+            try:
+                job["card_data"] = get_card_data_from_row(row)
+                if serials is not None and job["card_data"]["serial"] not in serials:
+                    seen_serials.add(job["card_data"]["serial"])
+                    continue
+                job["card_hash"] = manifest.get_card_hash(job["card_data"], get_card_input_files(job["card_data"]),
+                                                          settings)
+            except Exception as e:
+                job["error"] = e
+                if "card_data" in job:
+                    # The card is still in the card list, so its last good image must be kept.
+                    seen_serials.add(job["card_data"]["serial"])
+                else:
+                    unreadable_lines.append(line_number)
+                yield job
+                continue
+            serial_number = job["card_data"]["serial"]
+            seen_serials.add(serial_number)
+            if not force and manifest.is_current(serial_number, job["card_hash"], output_folder):
+                skipped.append(serial_number)
+                continue
+            yield job
+
+    def finish(job):
+        card_data = job.get("card_data")
+        if job["error"] is not None:
+            if card_data is not None:
+                # Forget the card, so it is rendered again next time.
+                manifest.remove(card_data["serial"])
+            rejected_rows.append((job["line_number"], str(job["error"]), job["row"]))
+            output_text(f"Failed to create the card on line {job['line_number']}: {job['error']}", "error")
+            return
+
+        # Remove the card's previous image if it was saved under another name (e.g., another profile).
+        previous_output = manifest.cards.get(card_data["serial"], {}).get("output")
+        if previous_output is not None and previous_output != job["output"]:
+            try:
+                os.remove(os.path.join(output_folder, previous_output))
+            except FileNotFoundError:
+                pass
+        manifest.record(card_data["serial"], job["card_hash"], job["output"], profile=profile)
+
+    # Warm this process's caches. Forked workers start with a copy of them.
+    warm_render_caches(preload_templates, scale, art_cache_folder)
+
+    if jobs <= 1:
+        for job in render_cards_pipelined(iter_render_jobs(), output_folder, scale, profile):
+            finish(job)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs,
+                                                    initializer=warm_render_caches,
+                                                    initargs=(preload_templates, scale, art_cache_folder)) as executor:
+            pending = {}
+
+            def collect_finished(return_when):
+                done, _ = concurrent.futures.wait(pending, return_when=return_when)
+                for future in done:
+                    job = pending.pop(future)
+                    try:
+                        job["output"] = future.result()
+                    except Exception as e:
+                        job["error"] = e
+                    finish(job)
+
+            # Only keep a few rows per worker in flight, so rows are read as the workers need them.
+            for job in iter_render_jobs():
+                if job["error"] is not None:
+                    finish(job)
+                    continue
+                future = executor.submit(render_card_data, job["card_data"], output_folder, scale, profile)
+                pending[future] = job
+                if len(pending) >= jobs * 4:
+                    collect_finished(concurrent.futures.FIRST_COMPLETED)
+            if pending:
+                collect_finished(concurrent.futures.ALL_COMPLETED)
+
+    # Remove the cards that are no longer in the card list. A row that could not be read may be one of
+    # them, so nothing is removed until every row can be read.
+    if unreadable_lines:
+        output_text(f"Not removing the images of deleted cards, as line(s) {unreadable_lines} could not be read.",
+                    "note")
+    else:
+        for serial_number in set(manifest.cards) - seen_serials:
+            manifest.remove(serial_number, output_folder)
+    manifest.save()
+    write_rejected_rows(reject_file, rejected_rows)
+
+    if skipped:
+        output_text(f"Skipped {len(skipped)} unchanged card(s) (use --force to render them anyway).", "note")
+    if rejected_rows:
+        output_text(f"{len(rejected_rows)} card(s) failed to render.", "warning")
+    return sorted((line_number, error) for line_number, error, _ in rejected_rows)
 
 
 def parse_args():
@@ -521,6 +1448,21 @@ def parse_args():
                         help="The translucency of some card art fields (valid options are 50, 60, 75, and 100).")
     parser.add_argument('-S', "--spreadsheet", type=str, default=None,
                         help="Create's all cards loaded from a spreadsheet.")
+    parser.add_argument("--preload_templates", action="store_true",
+                        help="Load every card template into memory before rendering a spreadsheet.")
+    parser.add_argument('-j', "--jobs", type=int, default=1,
+                        help="Number of worker processes used to render a spreadsheet (default: 1).")
+    parser.add_argument("--scale", type=float, default=None,
+                        help="Render cards at this fraction of the full 750x1050 size (e.g., 0.25 for thumbnails).")
+    parser.add_argument("--art_cache", nargs='?', const=DEFAULT_ART_CACHE_FOLDER, default=None,
+                        help=f"Store resized card art in a folder so unchanged art is not decoded again (default folder: {DEFAULT_ART_CACHE_FOLDER}).")
+    parser.add_argument("--profile", type=str, default=DEFAULT_CARD_OUTPUT_PROFILE, choices=list(CARD_OUTPUT_PROFILES),
+                        help=f"Output profile used to save cards (default: {DEFAULT_CARD_OUTPUT_PROFILE}). 'fast' encodes "
+                             "quickly, 'small' is lossless WebP and 'print' is an RGB JPEG.")
+    parser.add_argument("--reject_file", type=str, default=None,
+                        help=f"File the spreadsheet rows that fail to render are written to (default: {DEFAULT_REJECTED_CARDS_FILE} in the output folder).")
+    parser.add_argument("--force", action="store_true",
+                        help="Render every card of a spreadsheet, even if it did not change since the last run.")
 
     return parser.parse_args()
 
@@ -530,7 +1472,8 @@ if __name__ == "__main__":
     
     # Run the complete processing for a csv file.
     if args.spreadsheet is not None:
-        process_csv_to_cards(args.spreadsheet, args.output)
+        process_csv_to_cards(args.spreadsheet, args.output, args.preload_templates, args.jobs, args.force, args.scale,
+                             args.art_cache, args.profile, args.reject_file)
         exit(1)
 
     # Handle random atk/def based on level
@@ -573,4 +1516,4 @@ if __name__ == "__main__":
         "serial": args.serial
     }
 
-    create_card(card_data, args.output)
+    create_card(card_data, args.output, scale=args.scale, profile=args.profile)
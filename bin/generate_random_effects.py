@@ -3,11 +3,30 @@
 import argparse
 import pandas as pd
 import random
+import csv
+import os
+import re
 import sys
     
 # Import methods from ttcg_tools for use.
 from ttcg_tools import generate_combinations
 from ttcg_tools import output_text
+from ttcg_tools import build_alias_table
+from ttcg_tools import draw_from_alias_table
+
+# Import needed constants from the ttcg_constants file.
+from ttcg_constants import DEFAULT_CARD_LIST_FILE
+from ttcg_constants import DEFAULT_ALL_EFFECT_TEMPLATES_FILE
+from ttcg_constants import VALID_EFFECT_WEIGHT_SIGNALS
+from ttcg_constants import VALID_OVERLAY_STYLES
+from ttcg_constants import EFFECT_STYLE_TEXT_FOLDER
+
+
+# Buffers used by the weighted effect sampler so repeated draws stay O(1).
+EFFECT_KEY_BUFFER = {}
+EFFECT_STYLE_PATTERN_BUFFER = {}
+CARD_LIST_COUNT_BUFFER = {}
+ALIAS_TABLE_BUFFER = {}
 
 
 def load_and_filter_csv(file_path, columns):
@@ -59,26 +78,19 @@ def load_and_filter_csv(file_path, columns):
         sys.exit(f"Error processing CSV: {str(e)}")
         
 
-def get_random_effect(values, search_strings=None, omit_strings=None):
+def filter_effect_values(values, search_strings=None, omit_strings=None):
     """
-    Generate one random effect from the provided values, optionally filtered by search strings
-    and excluding values with omit strings, supporting placeholders with offsets in both.
-
-    This function takes a list of values and returns a single randomly selected value. If
-    search_strings is provided, it filters the values to those containing at least one of
-    the specified strings or their resolved placeholder combinations (case-insensitive). If
-    omit_strings is provided, it excludes values containing any of those strings or their
-    resolved placeholder combinations (case-insensitive) before selecting.
+    Filter a list of effects by search strings and omit strings, supporting placeholders with offsets in both.
 
     Args:
-        values (list): List of values to select from (e.g., effect strings).
-        search_strings (list of str, optional): List of strings or placeholders (e.g., '<number>', '<rank+1>')
-            to search for within the values. If None, no inclusion filtering is applied. Defaults to None.
-        omit_strings (list of str, optional): List of strings or placeholders (e.g., '<verb>', '<rank-1>')
-            to exclude from the values. If None, no exclusion filtering is applied. Defaults to None.
+        values (list): List of values to filter (e.g., effect strings).
+        search_strings (list of str, optional): Strings or placeholders that at least one of must be
+            contained in a value for it to be kept. Defaults to None (no inclusion filtering).
+        omit_strings (list of str, optional): Strings or placeholders that exclude a value when contained
+            in it. Defaults to None (no exclusion filtering).
 
     Returns:
-        str: A single randomly selected value from the (filtered) list.
+        list: The filtered values.
 
     Raises:
         SystemExit: If the input list is empty or if no values remain after filtering.
@@ -117,10 +129,238 @@ def get_random_effect(values, search_strings=None, omit_strings=None):
         if not working_values:
             sys.exit(f"Error: No effects remain after omitting {resolved_omit}")
 
+    return working_values
+
+
+def get_random_effect(values, search_strings=None, omit_strings=None):
+    """
+    Generate one random effect from the provided values, optionally filtered by search strings
+    and excluding values with omit strings, supporting placeholders with offsets in both.
+
+    This function takes a list of values and returns a single randomly selected value. If
+    search_strings is provided, it filters the values to those containing at least one of
+    the specified strings or their resolved placeholder combinations (case-insensitive). If
+    omit_strings is provided, it excludes values containing any of those strings or their
+    resolved placeholder combinations (case-insensitive) before selecting.
+
+    Args:
+        values (list): List of values to select from (e.g., effect strings).
+        search_strings (list of str, optional): List of strings or placeholders (e.g., '<number>', '<rank+1>')
+            to search for within the values. If None, no inclusion filtering is applied. Defaults to None.
+        omit_strings (list of str, optional): List of strings or placeholders (e.g., '<verb>', '<rank-1>')
+            to exclude from the values. If None, no exclusion filtering is applied. Defaults to None.
+
+    Returns:
+        str: A single randomly selected value from the (filtered) list.
+
+    Raises:
+        SystemExit: If the input list is empty or if no values remain after filtering.
+    """
+    working_values = filter_effect_values(values, search_strings, omit_strings)
+
     # Return a random value from the final filtered list
     return random.choice(working_values)
 
 
+def compile_effect_template_pattern(template_file=DEFAULT_ALL_EFFECT_TEMPLATES_FILE):
+    """
+    Compile all effect templates into a single regular expression used to find the template an effect came from.
+
+    Each template becomes one alternative of the pattern, with its placeholders (e.g., '<number>') replaced
+    by a wildcard and '(s)' made optional to account for plurality fixes applied when generating effects.
+
+    Args:
+        template_file (str): Path to the file containing one effect template per line.
+
+    Returns:
+        tuple: (pattern, templates) where pattern is the compiled regex (or None if no templates were found)
+            and templates is the list of templates. The template for a match is templates[match.lastindex - 1].
+    """
+    try:
+        with open(template_file, 'r', encoding='utf-8') as f:
+            templates = [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        output_text(f"Effect template file not found: {template_file}", "warning")
+        return None, []
+
+    if not templates:
+        return None, []
+
+    alternatives = []
+    for template in templates:
+        parts = re.split(r"(<[^>]+>)", template)
+        regex = "".join(".+?" if re.fullmatch(r"<[^>]+>", part) else re.escape(part).replace(r"\(s\)", "s?")
+                        for part in parts)
+        alternatives.append(f"({regex})")
+    return re.compile("|".join(alternatives), re.IGNORECASE), templates
+
+
+def load_effect_style_patterns():
+    """
+    Load and resolve the effect style patterns from EFFECT_STYLE_TEXT_FOLDER once.
+
+    This mirrors deduce_effect_style_from_effect_text, but resolves the placeholder patterns up front
+    so that the style of thousands of effects can be found without re-reading the style files.
+
+    Returns:
+        list: (style, resolved_patterns) tuples in VALID_OVERLAY_STYLES order.
+    """
+    if "patterns" in EFFECT_STYLE_PATTERN_BUFFER:
+        return EFFECT_STYLE_PATTERN_BUFFER["patterns"]
+
+    style_patterns = []
+    for style in VALID_OVERLAY_STYLES:
+        if style is None:
+            continue
+        file_path = os.path.join(EFFECT_STYLE_TEXT_FOLDER, f"{style}.txt")
+        try:
+            with open(file_path, 'r') as f:
+                patterns = [line.strip().lower() for line in f if line.strip()]
+        except FileNotFoundError:
+            continue
+        resolved = []
+        for pattern in patterns:
+            resolved.extend(generate_combinations(pattern))
+        style_patterns.append((style, resolved))
+
+    EFFECT_STYLE_PATTERN_BUFFER["patterns"] = style_patterns
+    return style_patterns
+
+
+def get_effect_weight_keys(values, signal="template", template_file=DEFAULT_ALL_EFFECT_TEMPLATES_FILE):
+    """
+    Get the key each effect is grouped under for the given weighting signal.
+
+    For the 'template' signal the key is the effect template the effect was generated from (or the effect
+    itself if no template matches). For the 'style' signal the key is the effect style deduced from the text
+    (or None). Keys are buffered per effect, so only effects that have not been seen before are processed.
+
+    Args:
+        values (list): List of effect strings.
+        signal (str): The weighting signal to use. Valid options are in VALID_EFFECT_WEIGHT_SIGNALS.
+        template_file (str): Path to the effect templates file (used by the 'template' signal).
+
+    Returns:
+        list: One key per value, in the same order as values.
+    """
+    key_buffer = EFFECT_KEY_BUFFER.setdefault((signal, template_file), {})
+    missing = [value for value in values if value not in key_buffer]
+
+    if missing and signal == "template":
+        pattern, templates = compile_effect_template_pattern(template_file)
+        for value in missing:
+            match = pattern.fullmatch(value.strip()) if pattern is not None else None
+            key_buffer[value] = templates[match.lastindex - 1] if match else value.strip().lower()
+    elif missing and signal == "style":
+        style_patterns = load_effect_style_patterns()
+        for value in missing:
+            text = value.lower()
+            key_buffer[value] = next((style for style, patterns in style_patterns
+                                      if any(p in text for p in patterns)), None)
+
+    return [key_buffer[value] for value in values]
+
+
+def get_card_list_counts(signal="template", card_list_file=DEFAULT_CARD_LIST_FILE):
+    """
+    Count how often each weighting key is used by the effects of the cards in the card list.
+
+    The counts are buffered along with the modification time of the card list, so they are only
+    recounted when the card list changes.
+
+    Args:
+        signal (str): The weighting signal to use. Valid options are in VALID_EFFECT_WEIGHT_SIGNALS.
+        card_list_file (str): Path to the semicolon-delimited card list.
+
+    Returns:
+        dict: Mapping of key -> number of card effects using it. Empty if the card list does not exist.
+    """
+    try:
+        mtime = os.path.getmtime(card_list_file)
+    except OSError:
+        return {}
+
+    buffered = CARD_LIST_COUNT_BUFFER.get((signal, card_list_file))
+    if buffered is not None and buffered[0] == mtime:
+        return buffered[1]
+
+    effects = []
+    styles = []
+    with open(card_list_file, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f, delimiter=';')
+        for row in reader:
+            for effect_column, style_column in (("EFFECT1", "EFFECT1_STYLE"), ("EFFECT2", "EFFECT2_STYLE")):
+                effect = (row.get(effect_column) or "").strip()
+                if not effect:
+                    continue
+                effects.append(effect)
+                style = (row.get(style_column) or "").strip()
+                styles.append(None if style.lower() in ("", "none") else style)
+
+    if signal == "style":
+        keys = styles
+    else:
+        keys = get_effect_weight_keys(effects, signal)
+
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+
+    CARD_LIST_COUNT_BUFFER[(signal, card_list_file)] = (mtime, counts)
+    return counts
+
+
+def get_weighted_random_effect(values, search_strings=None, omit_strings=None, signal="template", 
+                               card_list_file=DEFAULT_CARD_LIST_FILE):
+    """
+    Generate one random effect, favoring effects whose template (or style) is rarely used in the card list.
+
+    Each effect is weighted by 1 / (1 + uses), where uses is how many card list effects share its key for
+    the given signal. Draws come from a Walker/Vose alias table, so after the first call for a given
+    values list and filter, each draw is O(1). The table is only rebuilt when the card list changes.
+
+    Args:
+        values (list): List of values to select from (e.g., effect strings).
+        search_strings (list of str, optional): Same as get_random_effect.
+        omit_strings (list of str, optional): Same as get_random_effect.
+        signal (str): The weighting signal to use. Valid options are in VALID_EFFECT_WEIGHT_SIGNALS.
+        card_list_file (str): Path to the card list used to compute the weights.
+
+    Returns:
+        str: A single randomly selected value from the (filtered) list.
+
+    Raises:
+        ValueError: If signal is not a valid weighting signal.
+        SystemExit: If the input list is empty or if no values remain after filtering.
+    """
+    if signal not in VALID_EFFECT_WEIGHT_SIGNALS:
+        raise ValueError(f"Invalid effect weight signal: {signal}. Valid signals are {VALID_EFFECT_WEIGHT_SIGNALS}")
+
+    buffer_key = (id(values), signal, card_list_file, tuple(search_strings or ()), tuple(omit_strings or ()))
+    entry = ALIAS_TABLE_BUFFER.get(buffer_key)
+    if entry is None or entry["source"] is not values:
+        # Drop tables built for previous effect lists before buffering this one.
+        for key in [k for k, e in ALIAS_TABLE_BUFFER.items() if e["source"] is not values]:
+            del ALIAS_TABLE_BUFFER[key]
+        working_values = filter_effect_values(values, search_strings, omit_strings)
+        entry = {
+            "source": values,
+            "values": working_values,
+            "keys": get_effect_weight_keys(working_values, signal),
+            "counts": None,
+            "table": None
+        }
+        ALIAS_TABLE_BUFFER[buffer_key] = entry
+
+    # Only the weights depend on the card list, so only they are rebuilt when it changes.
+    counts = get_card_list_counts(signal, card_list_file)
+    if entry["counts"] is not counts:
+        entry["table"] = build_alias_table([1.0 / (1 + counts.get(key, 0)) for key in entry["keys"]])
+        entry["counts"] = counts
+
+    return entry["values"][draw_from_alias_table(entry["table"])]
+
+
 def get_random_pairs(values, num_pairs=10):
     """
     Generate a list of random effect pairs by selecting individual effects.
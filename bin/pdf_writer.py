@@ -0,0 +1,191 @@
+#!/bin/python3
+
+"""
+A minimal PDF writer that streams pages to disk as they are added.
+
+Only what the print PDFs need is supported: pages that place pre-encoded RGB images (JPEG or
+zlib-compressed pixels). Every object is written as soon as it is added and only the object offsets are
+kept in memory, so memory use does not grow with the number of pages. An image is written once as an
+XObject and can be placed any number of times, on any page.
+"""
+
+
+def format_number(value):
+    """
+    Format a number for a PDF content stream or dictionary (no exponent, no trailing zeros).
+
+    Args:
+        value (float): The number.
+
+    Returns:
+        str: The formatted number.
+    """
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+class StreamingPdfWriter:
+    """
+    Write a PDF one object at a time (see the module docstring).
+
+    Use it as a context manager, or call close() once every page was added.
+    """
+
+    # PDF stream filters of the supported image encodings.
+    IMAGE_FILTERS = {"jpeg": "/DCTDecode", "flate": "/FlateDecode"}
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self, file):
+        """
+        Start a PDF.
+
+        Args:
+            file: A binary file object opened for writing.
+        """
+        self.file = file
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = self.PAGES_ID + 1
+        self.closed = False
+        self.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def write(self, data):
+        """
+        Write raw bytes to the file.
+
+        Args:
+            data (bytes): The bytes to write.
+        """
+        self.file.write(data)
+
+    def tell(self):
+        """
+        Get the current offset in the file.
+
+        Returns:
+            int: The offset in bytes.
+        """
+        return self.file.tell()
+
+    def reserve_id(self):
+        """
+        Reserve an object id for an object that is written later.
+
+        Returns:
+            int: The object id.
+        """
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def add_object(self, body, object_id=None):
+        """
+        Write an object.
+
+        Args:
+            body (str): The object's contents (e.g., a dictionary).
+            object_id (int, optional): A reserved object id. A new id is used if not given.
+
+        Returns:
+            int: The object id.
+        """
+        if object_id is None:
+            object_id = self.reserve_id()
+        self.offsets[object_id] = self.tell()
+        self.write(f"{object_id} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        return object_id
+
+    def add_stream(self, dictionary, data):
+        """
+        Write a stream object.
+
+        Args:
+            dictionary (str): The stream dictionary entries, without /Length.
+            data (bytes): The (already encoded) stream data.
+
+        Returns:
+            int: The object id.
+        """
+        object_id = self.reserve_id()
+        self.offsets[object_id] = self.tell()
+        self.write(f"{object_id} 0 obj\n<< {dictionary} /Length {len(data)} >>\nstream\n".encode("latin-1"))
+        self.write(data)
+        self.write(b"\nendstream\nendobj\n")
+        return object_id
+
+    def add_image(self, width, height, encoding, data):
+        """
+        Write an RGB image XObject.
+
+        Args:
+            width (int): The image width in pixels.
+            height (int): The image height in pixels.
+            encoding (str): 'jpeg' for JPEG data, or 'flate' for zlib-compressed RGB pixels.
+            data (bytes): The encoded image.
+
+        Returns:
+            int: The object id, to place the image with add_page.
+
+        Raises:
+            ValueError: If the encoding is not supported.
+        """
+        if encoding not in self.IMAGE_FILTERS:
+            raise ValueError(f"Invalid image encoding '{encoding}', valid encodings are: {list(self.IMAGE_FILTERS)}")
+        dictionary = (f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                      f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter {self.IMAGE_FILTERS[encoding]}")
+        return self.add_stream(dictionary, data)
+
+    def add_page(self, page_size, placements):
+        """
+        Write a page that places images.
+
+        Args:
+            page_size (tuple): (width, height) of the page in points.
+            placements (list of tuple): (image_id, x, y, width, height) of each image, in points from the
+                                        bottom-left corner of the page.
+
+        Returns:
+            int: The page's object id.
+        """
+        commands = []
+        for image_id, x, y, width, height in placements:
+            numbers = " ".join(format_number(value) for value in (width, 0, 0, height, x, y))
+            commands.append(f"q {numbers} cm /Im{image_id} Do Q")
+        content_id = self.add_stream("", "\n".join(commands).encode("latin-1"))
+
+        images = " ".join(f"/Im{image_id} {image_id} 0 R" for image_id in sorted({p[0] for p in placements}))
+        page_width, page_height = page_size
+        page_id = self.add_object(
+            f"<< /Type /Page /Parent {self.PAGES_ID} 0 R "
+            f"/MediaBox [0 0 {format_number(page_width)} {format_number(page_height)}] "
+            f"/Resources << /XObject << {images} >> >> /Contents {content_id} 0 R >>")
+        self.page_ids.append(page_id)
+        return page_id
+
+    def close(self):
+        """
+        Write the page tree, the catalog and the cross-reference table that end the PDF.
+        """
+        if self.closed:
+            return
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self.add_object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>", self.PAGES_ID)
+        self.add_object(f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>", self.CATALOG_ID)
+
+        xref_offset = self.tell()
+        size = self.next_id
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets.get(object_id, 0):010d} 00000 {'n' if object_id in self.offsets else 'f'} \n"
+                  for object_id in range(1, size)]
+        lines.append(f"trailer\n<< /Size {size} /Root {self.CATALOG_ID} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        self.write("".join(lines).encode("latin-1"))
+        self.closed = True
@@ -0,0 +1,174 @@
+#!/bin/python3
+
+"""
+Render manifest used to skip re-rendering cards whose inputs did not change.
+
+The manifest is a JSON file kept next to the rendered cards. For each card (keyed by serial number) it
+stores a hash of everything the rendered image depends on (the card list fields, the art, template and
+font files and the render settings) and the name of the output file. File contents are hashed once and
+reused until the file's modification time or size changes.
+"""
+
+import os
+import json
+import hashlib
+
+# load needed methods from ttcg_tools
+from ttcg_tools import output_text
+from ttcg_tools import write_file_atomically
+
+
+# Bump this when the manifest file format changes; older manifests are then ignored.
+RENDER_MANIFEST_VERSION = 1
+
+
+def get_file_hash(filename):
+    """
+    Get the SHA-256 hash of a file's contents.
+
+    Args:
+        filename (str): Path to the file.
+
+    Returns:
+        str: The hex digest, or None if the file does not exist.
+    """
+    sha = hashlib.sha256()
+    try:
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    return sha.hexdigest()
+
+
+class RenderManifest:
+    """
+    The render manifest of an output folder (see the module docstring).
+    """
+
+    def __init__(self, filename):
+        """
+        Load the manifest file (which does not need to exist yet).
+
+        Args:
+            filename (str): Path to the manifest JSON file.
+        """
+        self.filename = filename
+        self.cards = {}
+        self.files = {}
+        self.load()
+
+    def load(self):
+        """
+        Read the manifest file, starting empty if it is missing, unreadable or from another version.
+        """
+        self.cards = {}
+        self.files = {}
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            output_text(f"Ignoring unreadable render manifest {self.filename}: {e}", "warning")
+            return
+        if data.get("version") != RENDER_MANIFEST_VERSION:
+            return
+        self.cards = data.get("cards", {})
+        self.files = data.get("files", {})
+
+    def save(self):
+        """
+        Write the manifest file atomically.
+        """
+        data = {"version": RENDER_MANIFEST_VERSION, "cards": self.cards, "files": self.files}
+        write_file_atomically(self.filename, json.dumps(data, indent=1, sort_keys=True))
+
+    def get_file_hash(self, filename):
+        """
+        Get the hash of a file's contents, only re-reading the file if its modification time or size changed.
+
+        Args:
+            filename (str): Path to the file.
+
+        Returns:
+            str: The hex digest, or None if the file does not exist.
+        """
+        key = os.path.abspath(filename)
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            self.files.pop(key, None)
+            return None
+        state = [stat.st_mtime_ns, stat.st_size]
+        cached = self.files.get(key)
+        if cached is not None and cached[:2] == state:
+            return cached[2]
+        file_hash = get_file_hash(filename)
+        self.files[key] = state + [file_hash]
+        return file_hash
+
+    def get_card_hash(self, card_data, input_files, settings=None):
+        """
+        Get the hash of everything a rendered card depends on.
+
+        Args:
+            card_data (dict): The card data.
+            input_files (list of str): Every file the render reads (art, templates, font).
+            settings (dict, optional): Render settings that change the output (e.g., size or format).
+
+        Returns:
+            str: The hex digest.
+        """
+        inputs = {
+            "card": {key: str(value) for key, value in card_data.items()},
+            "files": [[os.path.basename(filename), self.get_file_hash(filename)] for filename in input_files],
+            "settings": settings or {}
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def is_current(self, serial_number, card_hash, output_folder):
+        """
+        Check if a card's output exists and was rendered from the same inputs.
+
+        Args:
+            serial_number (str): The card's serial number.
+            card_hash (str): The card's current input hash (see get_card_hash).
+            output_folder (str): The folder the card is rendered to.
+
+        Returns:
+            bool: True if the card does not need to be rendered again.
+        """
+        entry = self.cards.get(serial_number)
+        return (entry is not None and entry.get("hash") == card_hash
+                and os.path.isfile(os.path.join(output_folder, entry.get("output", ""))))
+
+    def record(self, serial_number, card_hash, output_file, **details):
+        """
+        Record that a card was rendered.
+
+        Args:
+            serial_number (str): The card's serial number.
+            card_hash (str): The card's input hash (see get_card_hash).
+            output_file (str): The output file name, relative to the output folder.
+            **details: Extra values to store with the card (e.g., the output profile).
+        """
+        self.cards[serial_number] = dict(details, hash=card_hash, output=output_file)
+
+    def remove(self, serial_number, output_folder=None):
+        """
+        Forget a card, optionally deleting its output file.
+
+        Args:
+            serial_number (str): The card's serial number.
+            output_folder (str, optional): If given, the card's output file in this folder is deleted.
+        """
+        entry = self.cards.pop(serial_number, None)
+        if entry is None or output_folder is None:
+            return
+        try:
+            os.remove(os.path.join(output_folder, entry["output"]))
+            output_text(f"Removed {entry['output']} (no longer in the card list)", "note")
+        except FileNotFoundError:
+            pass
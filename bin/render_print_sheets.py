@@ -0,0 +1,282 @@
+#!/bin/python3
+
+"""
+Render print sheets straight from a card list.
+
+Cards are rendered in memory (see create_card.render_card) at the print resolution and composed onto
+page sized sheets, using the same 3x3 grid and margins as compile_pdf.create_pdf. Each sheet is written
+as one image, or as one page of a PDF, without writing a file per card first.
+"""
+
+import os
+import io
+import argparse
+import collections
+import concurrent.futures
+from PIL import Image
+
+# Import methods from ttcg_tools
+from ttcg_tools import output_text
+from ttcg_tools import get_card_data_from_row
+
+# Used for rendering cards in memory.
+from create_card import render_card
+from create_card import iter_card_rows
+from create_card import warm_render_caches
+
+# Used for the page layout.
+from compile_pdf import get_page_size
+from compile_pdf import get_grid_layout
+
+# Used for writing PDF pages as they are rendered.
+from pdf_writer import StreamingPdfWriter
+
+# Import needed constants from the ttcg_constants file.
+from ttcg_constants import DEFAULT_CARD_LIST_FILE
+from ttcg_constants import DEFAULT_GENERATED_CARDS_FOLDER
+from ttcg_constants import CARD_OUTPUT_DPI
+
+
+CARDS_PER_SHEET = 9
+SHEET_FORMATS = ["pdf", "png", "jpeg"]
+
+# The JPEG settings of sheets embedded in a PDF or saved as JPEG.
+SHEET_JPEG_OPTIONS = {"quality": 95, "subsampling": 0}
+
+
+def get_sheet_layout(page_size_name="letter", dpi=CARD_OUTPUT_DPI):
+    """
+    Get the pixel layout of a print sheet.
+
+    Args:
+        page_size_name (str): Page size ('letter' or 'A4').
+        dpi (int): The print resolution.
+
+    Returns:
+        dict: The page size in points (page_size) and pixels (page_pixels), the card size in pixels
+              (card_pixels), the top-left pixel of each card slot, row by row (positions), and the dpi.
+
+    Raises:
+        ValueError: If the 3x3 grid of cards does not fit the page.
+    """
+    page_size = get_page_size(page_size_name)
+    img_width, img_height, margin_x, margin_y = get_grid_layout(page_size)
+    if margin_x < 0 or margin_y < 0:
+        raise ValueError(f"3x3 grid of MTG-sized cards (7.5 x 10.5 inches) does not fit on {page_size_name} page.")
+
+    def to_pixels(points):
+        return round(points * dpi / 72)
+
+    # The PDF grid is placed from the top of the page, so the pixel grid (y down) uses the same top margin.
+    positions = [(to_pixels(margin_x + col * img_width), to_pixels(margin_y + row * img_height))
+                 for row in range(3) for col in range(3)]
+    return {
+        "page_size": page_size,
+        "page_pixels": (to_pixels(page_size[0]), to_pixels(page_size[1])),
+        "card_pixels": (to_pixels(img_width), to_pixels(img_height)),
+        "positions": positions,
+        "dpi": dpi
+    }
+
+
+def render_sheet(cards, layout, failures=None):
+    """
+    Render up to nine cards onto a white print sheet.
+
+    A card that fails to render is reported and its slot is left blank, so one bad card does not stop
+    the rest of the run.
+
+    Args:
+        cards (list of tuple): The (line_number, card_data) of the cards on the sheet, in grid order.
+        layout (dict): The sheet layout (see get_sheet_layout).
+        failures (list, optional): The (line_number, error) of every card that cannot be rendered is
+                                   appended here.
+
+    Returns:
+        Image: The RGB sheet image.
+    """
+    sheet = Image.new("RGB", layout["page_pixels"], (255, 255, 255))
+    for (line_number, card_data), position in zip(cards, layout["positions"]):
+        try:
+            card_img = render_card(card_data, size=layout["card_pixels"])
+        except Exception as e:
+            if failures is not None:
+                failures.append((line_number, str(e)))
+            output_text(f"Error rendering the card on line {line_number}: {e}", "error")
+            continue
+        sheet.paste(card_img, position, card_img)
+    return sheet
+
+
+def encode_sheet(cards, layout, image_format="png"):
+    """
+    Render a print sheet and encode it (the work done by each sheet worker).
+
+    Args:
+        cards (list of tuple): The (line_number, card_data) of the cards on the sheet, in grid order.
+        layout (dict): The sheet layout (see get_sheet_layout).
+        image_format (str): 'png', or 'jpeg' (also used for PDF pages).
+
+    Returns:
+        tuple: (the encoded sheet as bytes, list of (line_number, error) of cards that could not be rendered).
+    """
+    failures = []
+    sheet = render_sheet(cards, layout, failures)
+    buffer = io.BytesIO()
+    dpi = (layout["dpi"], layout["dpi"])
+    if image_format == "png":
+        sheet.save(buffer, format="PNG", dpi=dpi, compress_level=1)
+    else:
+        sheet.save(buffer, format="JPEG", dpi=dpi, **SHEET_JPEG_OPTIONS)
+    return buffer.getvalue(), failures
+
+
+def iter_sheets(csv_file_path, failures):
+    """
+    Stream the cards of a card list in groups of one sheet.
+
+    Args:
+        csv_file_path (str): Path to the card list CSV.
+        failures (list): The (line_number, error) of every row that cannot be read is appended here.
+
+    Yields:
+        list of tuple: The (line_number, card_data) of the cards of each sheet (the last one may hold fewer
+                       than nine cards).
+    """
+    cards = []
+    for line_number, row in iter_card_rows(csv_file_path):
+        try:
+            cards.append((line_number, get_card_data_from_row(row)))
+        except ValueError as e:
+            failures.append((line_number, str(e)))
+            output_text(f"Skipping the card on line {line_number}: {e}", "error")
+            continue
+        if len(cards) == CARDS_PER_SHEET:
+            yield cards
+            cards = []
+    if cards:
+        yield cards
+
+
+def render_print_sheets(csv_file_path, output, page_size_name="letter", dpi=CARD_OUTPUT_DPI, sheet_format="pdf", jobs=1):
+    """
+    Render every card of a card list onto print sheets.
+
+    Sheets are rendered by a pool of worker processes (one sheet per task) and written in order as they
+    finish, so only a few sheets are in memory at a time. PDF pages are streamed to a temporary file that
+    replaces the output PDF once every sheet is written.
+
+    Args:
+        csv_file_path (str): Path to the card list CSV.
+        output (str): The PDF file to write (for the 'pdf' format), or the folder to write sheet images to.
+        page_size_name (str): Page size ('letter' or 'A4').
+        dpi (int): The print resolution.
+        sheet_format (str): 'pdf' (one page per sheet), 'png' or 'jpeg' (one image per sheet).
+        jobs (int): The number of worker processes. 1 renders in this process.
+
+    Returns:
+        tuple: (number of sheets written, list of (line_number, error) of rows that could not be read or
+               rendered).
+
+    Raises:
+        FileNotFoundError: If the CSV file does not exist.
+        ValueError: If the format is invalid, the CSV header is bad, or the grid does not fit the page.
+    """
+    if sheet_format not in SHEET_FORMATS:
+        raise ValueError(f"Invalid sheet format '{sheet_format}', valid formats are: {SHEET_FORMATS}")
+    layout = get_sheet_layout(page_size_name, dpi)
+    image_format = "png" if sheet_format == "png" else "jpeg"
+    failures = []
+    sheets_written = 0
+
+    if sheet_format == "pdf":
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        # Pages are streamed to a file next to the output file, which only replaces it once complete.
+        temp_file = f"{output}.tmp{os.getpid()}"
+        pdf_file = open(temp_file, 'wb')
+        pdf = StreamingPdfWriter(pdf_file)
+    else:
+        os.makedirs(output, exist_ok=True)
+
+    def write_sheet(encoded):
+        nonlocal sheets_written
+        sheet_bytes, sheet_failures = encoded
+        failures.extend(sheet_failures)
+        sheets_written += 1
+        if sheet_format == "pdf":
+            page_width, page_height = layout["page_size"]
+            image_id = pdf.add_image(*layout["page_pixels"], "jpeg", sheet_bytes)
+            pdf.add_page(layout["page_size"], [(image_id, 0, 0, page_width, page_height)])
+        else:
+            extension = "png" if sheet_format == "png" else "jpg"
+            sheet_file = os.path.join(output, f"sheet-{sheets_written:03d}.{extension}")
+            with open(sheet_file, 'wb') as f:
+                f.write(sheet_bytes)
+            output_text(f"Sheet saved as {sheet_file}", "success")
+
+    try:
+        sheets = iter_sheets(csv_file_path, failures)
+        if jobs <= 1:
+            warm_render_caches()
+            for cards in sheets:
+                write_sheet(encode_sheet(cards, layout, image_format))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=warm_render_caches) as executor:
+                # Sheets are written in order, keeping a couple of sheets per worker in flight.
+                pending = collections.deque()
+                for cards in sheets:
+                    pending.append(executor.submit(encode_sheet, cards, layout, image_format))
+                    if len(pending) >= jobs * 2:
+                        write_sheet(pending.popleft().result())
+                while pending:
+                    write_sheet(pending.popleft().result())
+
+        if sheet_format == "pdf":
+            pdf.close()
+            pdf_file.close()
+    except BaseException:
+        # Never leave a partial PDF behind, whatever stopped the run.
+        if sheet_format == "pdf":
+            pdf_file.close()
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        raise
+
+    if sheet_format == "pdf":
+        if sheets_written > 0:
+            os.replace(temp_file, output)
+            output_text(f"PDF with {sheets_written} sheet(s) created successfully at {output}", "success")
+        else:
+            os.remove(temp_file)
+            output_text("No cards found, PDF not created.", "warning")
+    return sheets_written, failures
+
+
+def main():
+    """
+    Parse command-line arguments and render print sheets from a card list.
+    """
+    parser = argparse.ArgumentParser(description="Render a card list straight onto 3x3 print sheets.")
+    parser.add_argument('-S', '--spreadsheet', type=str, default=DEFAULT_CARD_LIST_FILE,
+                        help=f'Card list to render. Defaults to {DEFAULT_CARD_LIST_FILE}')
+    parser.add_argument('-o', '--output', type=str, default=None,
+                        help=f'Output PDF file (pdf format) or folder (image formats). Defaults to '
+                             f'{DEFAULT_GENERATED_CARDS_FOLDER}/sheets.pdf or {DEFAULT_GENERATED_CARDS_FOLDER}/sheets')
+    parser.add_argument('-s', '--page-size', type=str, default='letter', choices=['letter', 'A4'],
+                        help='Page size of the sheets (letter or A4)')
+    parser.add_argument('-f', '--format', type=str, default='pdf', choices=SHEET_FORMATS,
+                        help='Write one PDF page (default) or one image per sheet.')
+    parser.add_argument('--dpi', type=int, default=CARD_OUTPUT_DPI,
+                        help=f'Print resolution (default: {CARD_OUTPUT_DPI}).')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes rendering sheets (default: 1).')
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        output = os.path.join(DEFAULT_GENERATED_CARDS_FOLDER, "sheets.pdf" if args.format == "pdf" else "sheets")
+    render_print_sheets(args.spreadsheet, output, args.page_size, args.dpi, args.format, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
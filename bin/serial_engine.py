@@ -0,0 +1,505 @@
+#!/bin/python3
+
+"""
+Headless serial number engine.
+
+These methods build and regenerate card serial numbers without any UI dependencies, so batch jobs
+(such as regen_serial_numbers.py) do not need tkinter. The type rank tables used by get_combination_id
+and the serial list registry are each loaded once and then shared by every card in the batch.
+"""
+
+import bisect
+import concurrent.futures
+import csv
+
+# load needed methods from ttcg_tools
+from ttcg_tools import output_text
+from ttcg_tools import get_combination_id
+from ttcg_tools import get_combination_from_id
+from ttcg_tools import baseN_to_int
+from ttcg_tools import get_number_id
+from ttcg_tools import get_index_in_baseN
+from ttcg_tools import get_serial_registry
+from ttcg_tools import get_card_data_from_row
+
+# Import some constants from the ttcg_constants file.
+from ttcg_constants import VALID_OVERLAY_STYLES
+from ttcg_constants import ALL_TYPES_LIST_LOWER
+from ttcg_constants import CHARACTERS
+from ttcg_constants import TYPE_LIST_LOWER
+from ttcg_constants import CARD_LIST_HEADER
+
+
+# Global variables used by these methods.
+TYPES_ID_BUFFER = {}
+TYPES_FROM_ID_BUFFER = {}
+
+# The number of characters used by the type+subtype combination ID in a serial number.
+SERIAL_TYPES_ID_DIGITS = 4
+
+# The fields that SerialIndex.query can match on (see decode_serial).
+SERIAL_QUERY_FIELDS = ['name_initial', 'level', 'types', 'has_types', 'type', 'subtypes', 'is_spell', 'attack_id',
+                       'defense_id', 'attack_range', 'defense_range', 'effect1_initial', 'effect1_style',
+                       'effect2_initial', 'effect2_style', 'rarity', 'pad_bit', 'prefix']
+
+
+def get_types_id(all_types):
+    """
+    Get the combination ID of a type+subtype string, ranking each distinct combination only once.
+
+    Args:
+        all_types (str): The comma separated type and subtypes (e.g., 'Fire, Dragon').
+
+    Returns:
+        str: The combination ID (see get_combination_id).
+    """
+    if all_types not in TYPES_ID_BUFFER:
+        TYPES_ID_BUFFER[all_types] = get_combination_id(all_types, ALL_TYPES_LIST_LOWER)
+    return TYPES_ID_BUFFER[all_types]
+
+
+def get_serial_prefix(card_data):
+    """
+    Build the serial number of a card without its trailing pad bit.
+
+    The prefix is made of the first letter of the name, the level, the type+subtype combination ID, the
+    attack and defense identifiers (relative to the level), the first letter and style ID of each effect
+    and the rarity. Cards sharing a prefix are told apart by the pad bit (see assign_pad_bits).
+
+    Args:
+        card_data (dict): A dictionary containing card details (see get_card_data_from_row) with at least
+                          name, type, subtype, level, attack, defense, effect1, effect1_style, effect2,
+                          effect2_style and rarity.
+
+    Returns:
+        str: The serial number prefix (e.g., 'B104dG00U8Y50').
+    """
+    name = card_data.get('name', '')
+    card_type = card_data.get('type', '')
+    level = int(card_data.get('level', 0))
+    subtypes = card_data.get('subtype', '')
+    rarity = card_data.get('rarity', '')
+    attack = str(card_data.get('attack', ''))
+    defense = str(card_data.get('defense', ''))
+    effect1 = card_data.get('effect1', '')
+    effect1_style = card_data.get('effect1_style', '')
+    effect2 = card_data.get('effect2', '')
+    effect2_style = card_data.get('effect2_style', '')
+
+    if subtypes == "":
+        all_types = card_type
+    else:
+        all_types = card_type + ", " + subtypes
+    all_types_id = get_types_id(all_types)
+    effect1_style_id = get_index_in_baseN(effect1_style, VALID_OVERLAY_STYLES)
+    effect2_style_id = get_index_in_baseN(effect2_style, VALID_OVERLAY_STYLES)
+
+    effect1_id = effect1[0] if effect1 else "0"
+    effect2_id = effect2[0] if effect2 else "0"
+
+    serial_prefix = ""                             # Create the initial SN string.
+    serial_prefix += name[0].capitalize()          # Add the first letter of the name.
+    serial_prefix += str(level)                    # Add the level.
+    serial_prefix += all_types_id                  # Add the unique type+subtype identifier.
+
+    # Since level is included as part of the SN, the atk and defense can be generated on a scale relative to the level.
+    if "+" in attack or "-" in attack: # Spell stats
+        # For spells, this value x ranges from -level*10 < x < level*10. So if we add level*10 to the value x, we have
+        # 0 < x < 2level*10 => 0 < x < level*20, so, the per level value can be treated as 20.
+        serial_prefix += get_number_id(int(attack[1:])+level*10, level, per_level_val=20)  # Add the attack value identifier.
+        serial_prefix += get_number_id(int(defense[1:])+level*10, level, per_level_val=20) # Add the defense value identifier.
+    else: # Unit stats
+        serial_prefix += get_number_id(int(attack), level)  # Add the attack value identifier.
+        serial_prefix += get_number_id(int(defense), level) # Add the defense value identifier.
+
+    serial_prefix += effect1_id                    # Add the first letter of the effect1.
+    serial_prefix += effect1_style_id              # Add the unique identifier for the the effect1 style.
+    serial_prefix += effect2_id                    # Add the first letter of the effect2.
+    serial_prefix += effect2_style_id              # Add the unique identifier for the the effect2 style.
+    serial_prefix += str(rarity)                   # Add the rarity of the card.
+
+    return serial_prefix
+
+
+def get_serial_prefixes(card_data_list, jobs=1):
+    """
+    Build the serial number prefix of every card in a list, optionally across a process pool.
+
+    Args:
+        card_data_list (list of dict): The cards to build prefixes for.
+        jobs (int): The number of worker processes to use. 1 (the default) builds them in this process.
+
+    Returns:
+        list of str: The serial number prefixes, in the same order as card_data_list.
+    """
+    if jobs <= 1 or len(card_data_list) < 2:
+        return [get_serial_prefix(card_data) for card_data in card_data_list]
+
+    # Large chunks keep the pickling overhead small compared to the work done per card.
+    chunk_size = max(1, len(card_data_list) // (jobs * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(get_serial_prefix, card_data_list, chunksize=chunk_size))
+
+
+def assign_pad_bits(serial_prefixes, current_serials=None, reserved_serials=()):
+    """
+    Give each serial number prefix a pad bit so that every resulting serial number is unique.
+
+    Conflicts are resolved in memory in three passes. Reserved serials (e.g., retired serials still in the
+    serial list) are never handed out. A card whose current serial still matches its prefix keeps it, so
+    unchanged cards keep their serial numbers. Every other card gets the first free pad bit for its prefix,
+    in list order.
+
+    Args:
+        serial_prefixes (list of str): The serial number prefix of each card.
+        current_serials (list of str, optional): The current serial number of each card ('' if none).
+        reserved_serials (iterable of str, optional): Serial numbers that must not be assigned.
+
+    Returns:
+        list of str: The full serial numbers, in the same order as serial_prefixes.
+
+    Raises:
+        ValueError: If every pad bit is already used for a prefix.
+    """
+    if current_serials is None:
+        current_serials = [""] * len(serial_prefixes)
+
+    used_pad_bits = {}
+    for serial_number in reserved_serials:
+        if serial_number:
+            used_pad_bits.setdefault(serial_number[:-1], set()).add(serial_number[-1])
+
+    serial_numbers = [None] * len(serial_prefixes)
+    for index, (serial_prefix, current_serial) in enumerate(zip(serial_prefixes, current_serials)):
+        if not current_serial or current_serial[:-1] != serial_prefix or current_serial[-1] not in CHARACTERS:
+            continue
+        used = used_pad_bits.setdefault(serial_prefix, set())
+        if current_serial[-1] not in used:
+            used.add(current_serial[-1])
+            serial_numbers[index] = current_serial
+
+    for index, serial_prefix in enumerate(serial_prefixes):
+        if serial_numbers[index] is not None:
+            continue
+        used = used_pad_bits.setdefault(serial_prefix, set())
+        pad_bit = next((char for char in CHARACTERS if char not in used), None)
+        if pad_bit is None:
+            raise ValueError(f"No unique serial number available for {serial_prefix} - all padding options exhausted")
+        used.add(pad_bit)
+        serial_numbers[index] = serial_prefix + pad_bit
+
+    return serial_numbers
+
+
+def regenerate_serials(card_data_list, serial_list_file=None, jobs=1):
+    """
+    Regenerate the serial number of every card in one pass.
+
+    Args:
+        card_data_list (list of dict): The cards to regenerate, each with its current 'serial' (if any).
+        serial_list_file (str, optional): A serial list whose serials, other than the cards' own current ones,
+                                          are treated as retired and never reassigned.
+        jobs (int): The number of worker processes used to build the serial prefixes.
+
+    Returns:
+        tuple: (serial_numbers, changes) where serial_numbers is the list of new serials in card order and
+               changes is a list of (index, name, old_serial, new_serial) for every serial that changed.
+    """
+    current_serials = [card_data.get('serial', '') for card_data in card_data_list]
+
+    reserved_serials = ()
+    if serial_list_file:
+        reserved_serials = get_serial_registry(serial_list_file).serials - set(current_serials)
+
+    serial_prefixes = get_serial_prefixes(card_data_list, jobs)
+    serial_numbers = assign_pad_bits(serial_prefixes, current_serials, reserved_serials)
+
+    changes = [(index, card_data.get('name', ''), old_serial, new_serial)
+               for index, (card_data, old_serial, new_serial)
+               in enumerate(zip(card_data_list, current_serials, serial_numbers))
+               if old_serial != new_serial]
+    return serial_numbers, changes
+
+
+def print_serial_changes(changes):
+    """
+    Print a diff-style report of the serial numbers that changed.
+
+    Args:
+        changes (list of tuple): The (index, name, old_serial, new_serial) changes from regenerate_serials.
+    """
+    if not changes:
+        output_text("No serial numbers changed.", "success")
+        return
+    for index, name, old_serial, new_serial in changes:
+        output_text(f"- {old_serial or '(none)'}")
+        output_text(f"+ {new_serial}    {name} (row {index + 1})")
+    output_text(f"{len(changes)} serial number(s) changed.", "note")
+
+
+def get_serial_field_slices(num_digits=SERIAL_TYPES_ID_DIGITS):
+    """
+    Get the position of each encoded field within a serial number (see get_serial_prefix).
+
+    Args:
+        num_digits (int): The number of characters of the type+subtype combination ID.
+
+    Returns:
+        dict: A map of field name to the slice of the serial number holding it.
+    """
+    return {
+        'name_initial': slice(0, 1),
+        'level': slice(1, 2),
+        'types_id': slice(2, 2 + num_digits),
+        'attack_id': slice(2 + num_digits, 3 + num_digits),
+        'defense_id': slice(3 + num_digits, 4 + num_digits),
+        'effect1_initial': slice(4 + num_digits, 5 + num_digits),
+        'effect1_style_id': slice(5 + num_digits, 6 + num_digits),
+        'effect2_initial': slice(6 + num_digits, 7 + num_digits),
+        'effect2_style_id': slice(7 + num_digits, 8 + num_digits),
+        'rarity': slice(8 + num_digits, -1),
+        'pad_bit': slice(-1, None)
+    }
+
+
+def get_types_from_id(types_id):
+    """
+    Get the sorted, lowercase types of a type+subtype combination ID, decoding each ID only once.
+
+    Args:
+        types_id (str): The combination ID (see get_combination_id).
+
+    Returns:
+        tuple of str: The types and subtypes (e.g., ('aquatic', 'fire')).
+    """
+    if types_id not in TYPES_FROM_ID_BUFFER:
+        TYPES_FROM_ID_BUFFER[types_id] = tuple(get_combination_from_id(types_id, ALL_TYPES_LIST_LOWER))
+    return TYPES_FROM_ID_BUFFER[types_id]
+
+
+def get_stat_range(stat_id, level, is_spell):
+    """
+    Get the range of stat values that get_number_id maps to a stat identifier.
+
+    Args:
+        stat_id (str): The attack or defense identifier from a serial number.
+        level (int): The card level.
+        is_spell (bool): Whether the card is a spell, whose stats are +/- modifiers.
+
+    Returns:
+        tuple: (minimum, maximum) of the stat. For spells, this is the range of the modifier's magnitude,
+               as the sign is not stored in the serial number. The last identifier also holds every larger
+               (clamped) value, so its maximum is None.
+    """
+    per_level_val, offset = (20, level * 10) if is_spell else (500, 0)
+    segment_size = level * per_level_val / len(CHARACTERS)
+    segment_index = CHARACTERS.index(stat_id)
+    minimum = segment_index * segment_size - offset
+    maximum = None
+    if segment_index < len(CHARACTERS) - 1:
+        maximum = (segment_index + 1) * segment_size - offset
+    return (max(0, minimum), maximum)
+
+
+def decode_serial(serial_number, num_digits=SERIAL_TYPES_ID_DIGITS):
+    """
+    Decode the card attributes stored in a serial number (the inverse of get_serial_prefix).
+
+    Only the information kept by the serial number can be recovered: the first letter of the name and of
+    each effect, the level, the type and subtypes, the attack and defense ranges, the effect styles, the
+    rarity and the pad bit. Levels are expected to be a single digit.
+
+    Args:
+        serial_number (str): The serial number to decode (e.g., 'B104dG00U8Y500').
+        num_digits (int): The number of characters of the type+subtype combination ID.
+
+    Returns:
+        dict: The decoded fields: name_initial, level, types, type, subtypes, is_spell, attack_id,
+              defense_id, attack_range, defense_range, effect1_initial, effect1_style, effect2_initial,
+              effect2_style, rarity, pad_bit and prefix. Missing effects have an initial and style of None.
+
+    Raises:
+        ValueError: If the serial number is malformed.
+    """
+    slices = get_serial_field_slices(num_digits)
+    if len(serial_number) < 10 + num_digits:
+        raise ValueError(f"Serial number '{serial_number}' is too short")
+    fields = {name: serial_number[field_slice] for name, field_slice in slices.items()}
+
+    if not fields['level'].isdigit():
+        raise ValueError(f"Invalid level '{fields['level']}' in serial number '{serial_number}'")
+    level = int(fields['level'])
+
+    types = get_types_from_id(fields['types_id'])
+    card_type = next((t for t in types if t in TYPE_LIST_LOWER), None)
+    is_spell = card_type == "spell"
+
+    def decode_style(style_id):
+        index = baseN_to_int(style_id)
+        if index >= len(VALID_OVERLAY_STYLES):
+            raise ValueError(f"Invalid effect style '{style_id}' in serial number '{serial_number}'")
+        return VALID_OVERLAY_STYLES[index]
+
+    for stat in ('attack_id', 'defense_id'):
+        if fields[stat] not in CHARACTERS:
+            raise ValueError(f"Invalid stat identifier '{fields[stat]}' in serial number '{serial_number}'")
+
+    effect1_initial = None if fields['effect1_initial'] == "0" else fields['effect1_initial']
+    effect2_initial = None if fields['effect2_initial'] == "0" else fields['effect2_initial']
+
+    return {
+        'name_initial': fields['name_initial'],
+        'level': level,
+        'types': types,
+        'type': card_type,
+        'subtypes': tuple(t for t in types if t != card_type),
+        'is_spell': is_spell,
+        'attack_id': fields['attack_id'],
+        'defense_id': fields['defense_id'],
+        'attack_range': get_stat_range(fields['attack_id'], level, is_spell),
+        'defense_range': get_stat_range(fields['defense_id'], level, is_spell),
+        'effect1_initial': effect1_initial,
+        'effect1_style': decode_style(fields['effect1_style_id']) if effect1_initial else None,
+        'effect2_initial': effect2_initial,
+        'effect2_style': decode_style(fields['effect2_style_id']) if effect2_initial else None,
+        'rarity': fields['rarity'],
+        'pad_bit': fields['pad_bit'],
+        'prefix': serial_number[:-1]
+    }
+
+
+class SerialIndex:
+    """
+    A sorted, serial-keyed index of cards that answers attribute queries from the serial numbers alone.
+
+    Fields stored at a fixed position in the serial (name initial, level, exact type set, effect initials
+    and styles, rarity) are matched by comparing slices of the serial strings, a leading prefix is found by
+    binary search, and any other field is matched against the (cached) decode_serial result.
+    """
+
+    def __init__(self, serials=(), cards=None):
+        """
+        Create an index of serial numbers.
+
+        Args:
+            serials (iterable of str): The serial numbers to index.
+            cards (dict, optional): A map of serial number to card data, returned by get_card.
+        """
+        self.serials = sorted(set(serial for serial in serials if serial))
+        self.cards = cards or {}
+        self.decoded = {}
+
+    @classmethod
+    def from_serial_list(cls, filename):
+        """
+        Create an index of every serial number in a serial list file.
+        """
+        return cls(get_serial_registry(filename).serials)
+
+    @classmethod
+    def from_card_list(cls, filename):
+        """
+        Create an index of every card in a card list CSV, keeping each card's data.
+        """
+        cards = {}
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f, delimiter=';')
+            next(reader, None)
+            for row in reader:
+                if len(row) == len(CARD_LIST_HEADER):
+                    card_data = get_card_data_from_row(row)
+                    cards[card_data['serial']] = card_data
+        return cls(cards.keys(), cards)
+
+    def __len__(self):
+        return len(self.serials)
+
+    def __contains__(self, serial_number):
+        index = bisect.bisect_left(self.serials, serial_number)
+        return index < len(self.serials) and self.serials[index] == serial_number
+
+    def decode(self, serial_number):
+        """
+        Get the decode_serial fields of a serial number, decoding it only once.
+        """
+        if serial_number not in self.decoded:
+            self.decoded[serial_number] = decode_serial(serial_number)
+        return self.decoded[serial_number]
+
+    def get_card(self, serial_number):
+        """
+        Get the card data for a serial number if it was indexed from a card list, or None.
+        """
+        return self.cards.get(serial_number)
+
+    def with_prefix(self, prefix):
+        """
+        Get every serial number starting with a prefix, found by binary search.
+        """
+        start = bisect.bisect_left(self.serials, prefix)
+        end = bisect.bisect_left(self.serials, prefix + "\uffff")
+        return self.serials[start:end]
+
+    def query(self, prefix="", **fields):
+        """
+        Find the serial numbers of every card matching a prefix and a set of decoded field values.
+
+        Besides the decode_serial fields, 'types' may be given in any order and case, and 'has_types'
+        matches cards having at least the given types. For example, the level 3 Fire/Dragon cards with a
+        counter effect 1 are query(level=3, types=['Fire', 'Dragon'], effect1_style='counter').
+
+        Args:
+            prefix (str): A leading part of the serial numbers to match.
+            **fields: The decode_serial field values to match.
+
+        Returns:
+            list of str: The matching serial numbers, sorted.
+
+        Raises:
+            ValueError: If an unknown field is given.
+        """
+        slices = get_serial_field_slices()
+        unknown = set(fields) - set(SERIAL_QUERY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown serial field(s): {', '.join(sorted(unknown))}")
+
+        # Encode the fields that have a fixed position so they can be matched without decoding.
+        encoded = []
+        decoded_fields = dict(fields)
+        if 'name_initial' in fields:
+            encoded.append((slices['name_initial'], decoded_fields.pop('name_initial').capitalize()))
+        if 'level' in fields:
+            encoded.append((slices['level'], str(decoded_fields.pop('level'))))
+        if 'types' in fields:
+            encoded.append((slices['types_id'], get_types_id(", ".join(decoded_fields.pop('types')))))
+        if 'rarity' in fields:
+            encoded.append((slices['rarity'], str(decoded_fields.pop('rarity'))))
+        if 'pad_bit' in fields:
+            encoded.append((slices['pad_bit'], decoded_fields.pop('pad_bit')))
+        for effect in ('effect1', 'effect2'):
+            if decoded_fields.get(f'{effect}_initial') is not None:
+                encoded.append((slices[f'{effect}_initial'], decoded_fields.pop(f'{effect}_initial')))
+            if decoded_fields.get(f'{effect}_style') is not None:
+                style_id = get_index_in_baseN(decoded_fields.pop(f'{effect}_style'), VALID_OVERLAY_STYLES)
+                encoded.append((slices[f'{effect}_style_id'], style_id))
+
+        has_types = None
+        if 'has_types' in decoded_fields:
+            has_types = {t.strip().lower() for t in decoded_fields.pop('has_types')}
+        for name in ('type', 'subtypes'):
+            if name in decoded_fields and decoded_fields[name] is not None:
+                value = decoded_fields[name]
+                decoded_fields[name] = value.lower() if isinstance(value, str) else tuple(sorted(v.lower() for v in value))
+
+        matches = []
+        for serial_number in self.with_prefix(prefix) if prefix else self.serials:
+            if any(serial_number[field_slice] != value for field_slice, value in encoded):
+                continue
+            if has_types is not None or decoded_fields:
+                decoded = self.decode(serial_number)
+                if has_types is not None and not has_types.issubset(decoded['types']):
+                    continue
+                if any(decoded[name] != value for name, value in decoded_fields.items()):
+                    continue
+            matches.append(serial_number)
+        return matches
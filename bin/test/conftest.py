@@ -0,0 +1,66 @@
+#!/bin/python3
+import re
+import sys
+import pytest
+
+sys.path.append('../')
+
+import create_card
+from ttcg_constants import CARD_LIST_HEADER
+
+# The card templates, relative to this test directory.
+TEST_CARD_ELEMENTS_FOLDER = "../../images/card pngs"
+
+
+@pytest.fixture
+def card_elements_folder(monkeypatch):
+    """
+    Render cards with the repository templates.
+    """
+    monkeypatch.setattr(create_card, "DEFAULT_CARD_ELEMENTS_FOLDER", TEST_CARD_ELEMENTS_FOLDER)
+    return TEST_CARD_ELEMENTS_FOLDER
+
+
+def make_card_row(name, serial, effect="Draw one card."):
+    """
+    Make a card list row for a level 1 fire unit without card art.
+    """
+    return [name, "Fire", "Beast", "1", "missing.png", "100", "400", effect, "", serial, "0", "50", "None", "None"]
+
+
+def write_card_list(path, rows):
+    """
+    Write a card list CSV with the given rows.
+    """
+    lines = [";".join(CARD_LIST_HEADER)] + [";".join(row) for row in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def read_pdf_objects(pdf_bytes):
+    """
+    Check the structure of a PDF and return its objects, keyed by object id.
+    """
+    assert pdf_bytes.startswith(b"%PDF-1.4")
+    assert pdf_bytes.rstrip().endswith(b"%%EOF")
+    xref_offset = int(re.search(rb"startxref\n(\d+)\n%%EOF", pdf_bytes).group(1))
+    assert pdf_bytes[xref_offset:].startswith(b"xref\n")
+    size = int(re.search(rb"/Size (\d+)", pdf_bytes[xref_offset:]).group(1))
+    entries = pdf_bytes[xref_offset:].split(b"\n")[3:2 + size]
+
+    objects = {}
+    for object_id, entry in enumerate(entries, start=1):
+        offset = int(entry[:10])
+        # Every offset points to the start of its object.
+        assert pdf_bytes[offset:].startswith(f"{object_id} 0 obj\n".encode())
+        end = pdf_bytes.index(b"endobj", offset)
+        objects[object_id] = pdf_bytes[offset:end]
+    return objects
+
+
+def get_pages(objects):
+    return [body for body in objects.values() if b"/Type /Page " in body]
+
+
+def get_images(objects):
+    return [body for body in objects.values() if b"/Subtype /Image" in body]
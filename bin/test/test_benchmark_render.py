@@ -0,0 +1,71 @@
+#!/bin/python3
+import os
+import sys
+import copy
+import pytest
+
+sys.path.append('../')
+
+import create_card
+from benchmark_render import build_benchmark_corpus
+from benchmark_render import StageTimer
+from benchmark_render import run_benchmark
+from benchmark_render import compare_to_baseline
+from benchmark_render import DEFAULT_BENCHMARK_CARDS
+
+from ttcg_constants import TYPE_LIST
+from ttcg_constants import VALID_CARD_LEVELS
+from ttcg_constants import VALID_TRANSLUCENT_VALUES
+from ttcg_constants import VALID_OVERLAY_STYLES
+
+pytestmark = pytest.mark.usefixtures("card_elements_folder")
+
+
+def test_build_benchmark_corpus_coverage(tmp_path):
+    """
+    Test that the default corpus covers every type, level, translucency and effect style.
+    """
+    corpus = build_benchmark_corpus(DEFAULT_BENCHMARK_CARDS)
+    assert {card["type"] for card in corpus} == set(TYPE_LIST)
+    assert {(card["type"], card["level"]) for card in corpus} == {(t, l) for t in TYPE_LIST for l in VALID_CARD_LEVELS}
+    assert {card["translucency"] for card in corpus} == set(VALID_TRANSLUCENT_VALUES)
+    assert {card["effect1_style"] for card in corpus} == set(VALID_OVERLAY_STYLES)
+    assert build_benchmark_corpus(DEFAULT_BENCHMARK_CARDS) == corpus
+
+
+def test_build_benchmark_corpus_placeholder_art(tmp_path):
+    """
+    Test that placeholder art is generated for the cards that have art.
+    """
+    corpus = build_benchmark_corpus(10, str(tmp_path))
+    assert all(os.path.isfile(card["image"]) for card in corpus[:9])
+    assert corpus[9]["image"] == ""
+
+
+def test_stage_timer():
+    """
+    Test that the stage timer records the render stages and restores create_card afterwards.
+    """
+    original = create_card.draw_wrapped_text
+    card_data = build_benchmark_corpus(1)[0]
+    with StageTimer() as timer:
+        create_card.render_card(card_data, encode="PNG")
+    assert create_card.draw_wrapped_text is original
+    assert set(timer.totals) == {"asset_load", "compositing", "text_fitting", "encode"}
+    assert all(total >= 0 for total in timer.totals.values())
+
+
+def test_run_benchmark():
+    """
+    Test a small benchmark run, and comparing it against itself and a faster baseline.
+    """
+    results = run_benchmark(num_cards=3, jobs=0)
+    assert results["single_core"]["cards_per_second"] > 0
+    assert results["multi_core"] is None
+    assert results["peak_rss_mb"]["main"] > 0
+    assert not any(row[4] for row in compare_to_baseline(results, results))
+
+    faster = copy.deepcopy(results)
+    faster["single_core"]["cards_per_second"] *= 2
+    regressed = [row[0] for row in compare_to_baseline(results, faster) if row[4]]
+    assert regressed == ["single_core cards/s"]
@@ -0,0 +1,156 @@
+#!/bin/python3
+import sys
+import time
+import threading
+import pytest
+
+sys.path.append('../')
+
+import card_maker_ui
+from card_maker_ui import PreviewWorker
+
+
+class StubRoot:
+    """
+    A stand-in for the Tk root that records scheduled callbacks and runs them on demand.
+    """
+
+    def __init__(self):
+        self.callbacks = {}
+        self.delays = []
+        self.next_id = 0
+
+    def after(self, delay_ms, callback, *args):
+        self.next_id += 1
+        self.callbacks[self.next_id] = (callback, args)
+        self.delays.append((callback.__name__, delay_ms))
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        del self.callbacks[after_id]
+
+    def run(self, name):
+        """
+        Run the scheduled callbacks of a method, e.g., 'submit' or 'poll_results'.
+        """
+        for after_id, (callback, args) in list(self.callbacks.items()):
+            if callback.__name__ == name:
+                del self.callbacks[after_id]
+                callback(*args)
+
+
+class StubRender:
+    """
+    A stand-in for render_card that records the cards rendered, and can hold a render until released.
+    """
+
+    def __init__(self):
+        self.rendered = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, card_data, size):
+        self.rendered.append(card_data["name"])
+        self.started.set()
+        assert self.release.wait(5)
+        return f"preview of {card_data['name']}"
+
+
+def wait_for(condition, timeout=5):
+    """
+    Wait for the worker thread to reach a state.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def preview(monkeypatch):
+    """
+    A preview worker on a stub root, rendering with a stub render_card.
+    """
+    render = StubRender()
+    monkeypatch.setattr(card_maker_ui, "render_card", render)
+    root = StubRoot()
+    shown = []
+    worker = PreviewWorker(root, shown.append)
+    return worker, root, render, shown
+
+
+def test_preview_worker_delay(preview):
+    """
+    Test that requests wait for the debounce window, and that delay_ms=0 submits right away.
+    """
+    worker, root, render, shown = preview
+    worker.request({"name": "A"}, (10, 14))
+    worker.request({"name": "B"}, (10, 14), delay_ms=0)
+    assert [delay for name, delay in root.delays if name == "submit"] == [worker.delay_ms, 0]
+
+
+def test_preview_worker_never_renders_superseded_requests(preview):
+    """
+    Test that a request superseded before its window passed, or before the worker started it, is never
+    rendered.
+    """
+    worker, root, render, shown = preview
+    # Superseded within the debounce window: its submit is cancelled.
+    worker.request({"name": "A"}, (10, 14))
+    worker.request({"name": "B"}, (10, 14))
+    root.run("submit")
+    wait_for(lambda: worker.results.qsize() == 1)
+    assert render.rendered == ["B"]
+
+    # Superseded after it was submitted, while the worker was busy rendering another card.
+    render.started.clear()
+    render.release.clear()
+    worker.request({"name": "C"}, (10, 14), delay_ms=0)
+    root.run("submit")
+    assert render.started.wait(5)
+    worker.request({"name": "D"}, (10, 14))
+    root.run("submit")
+    worker.request({"name": "E"}, (10, 14))
+    render.release.set()
+    # The worker takes D, which is no longer current, before E is submitted.
+    wait_for(lambda: worker.pending is None)
+    root.run("submit")
+    wait_for(lambda: render.rendered[-1] == "E")
+    assert render.rendered == ["B", "C", "E"]
+
+
+def test_preview_worker_drops_results_stale_while_rendering(preview):
+    """
+    Test that a preview superseded while it renders is dropped.
+    """
+    worker, root, render, shown = preview
+    render.release.clear()
+    worker.request({"name": "A"}, (10, 14), delay_ms=0)
+    root.run("submit")
+    assert render.started.wait(5)
+    worker.request({"name": "B"}, (10, 14))
+    render.release.set()
+    root.run("submit")
+    wait_for(lambda: worker.results.qsize() == 1)
+    assert render.rendered == ["A", "B"]
+
+    root.run("poll_results")
+    assert shown == ["preview of B"]
+
+
+def test_preview_worker_shows_only_the_latest_result(preview):
+    """
+    Test that only the newest of several finished previews is shown, once.
+    """
+    worker, root, render, shown = preview
+    for count, name in enumerate(["A", "B"], start=1):
+        worker.request({"name": name}, (10, 14), delay_ms=0)
+        root.run("submit")
+        wait_for(lambda: worker.results.qsize() == count)
+
+    root.run("poll_results")
+    assert shown == ["preview of B"]
+    # Polling is scheduled again, and shows nothing new.
+    root.run("poll_results")
+    assert shown == ["preview of B"]
@@ -0,0 +1,193 @@
+#!/bin/python3
+import os
+import io
+import sys
+import zlib
+import pytest
+from PIL import Image
+
+sys.path.append('../')
+
+from compile_pdf import create_pdf
+from compile_pdf import load_deck
+from compile_pdf import get_print_run
+from compile_pdf import create_pdf_from_card_list
+from compile_pdf import write_pdf
+from compile_pdf import encode_print_image
+from compile_pdf import get_print_image_size
+from pdf_writer import StreamingPdfWriter
+
+from conftest import make_card_row
+from conftest import write_card_list
+from conftest import read_pdf_objects
+from conftest import get_pages
+from conftest import get_images
+
+
+@pytest.fixture
+def card_images(tmp_path):
+    """
+    Ten distinct small card images, one of them with transparent corners.
+    """
+    folder = tmp_path / "cards"
+    folder.mkdir()
+    for i in range(10):
+        img = Image.new("RGBA", (75, 105), (20 * i, 100, 200, 255))
+        if i == 0:
+            img.putpixel((0, 0), (0, 0, 0, 0))
+        img.save(folder / f"card{i}.png")
+    return folder
+
+
+def test_streaming_pdf_writer_structure():
+    """
+    Test that the writer produces a valid cross-reference table and page tree, and that an image can be
+    placed on several pages.
+    """
+    buffer = io.BytesIO()
+    with StreamingPdfWriter(buffer) as pdf:
+        image_id = pdf.add_image(1, 1, "flate", zlib.compress(b"\xff\x00\x00"))
+        pdf.add_page((612, 792), [(image_id, 36, 522, 180, 252), (image_id, 216, 522, 180, 252)])
+        pdf.add_page((612, 792), [(image_id, 36.5, 522, 180, 252)])
+    objects = read_pdf_objects(buffer.getvalue())
+    pages = get_pages(objects)
+    assert len(pages) == 2 and len(get_images(objects)) == 1
+    assert b"/Count 2" in objects[StreamingPdfWriter.PAGES_ID]
+    assert b"/MediaBox [0 0 612 792]" in pages[0]
+    assert any(b"q 180 0 0 252 36.5 522 cm" in body for body in objects.values())
+
+
+def test_streaming_pdf_writer_invalid_encoding():
+    """
+    Test that unsupported image encodings raise an error.
+    """
+    with pytest.raises(ValueError):
+        StreamingPdfWriter(io.BytesIO()).add_image(1, 1, "png", b"")
+
+
+def test_encode_print_image(card_images):
+    """
+    Test that cards are encoded at the print size, flattened onto white.
+    """
+    assert get_print_image_size(300) == (750, 1050)
+    width, height, encoding, data = encode_print_image(str(card_images / "card0.png"), dpi=30, encoding="flate")
+    assert (width, height, encoding) == (75, 105, "flate")
+    pixels = zlib.decompress(data)
+    assert len(pixels) == 75 * 105 * 3
+    assert pixels[:3] == b"\xff\xff\xff"
+
+    width, height, encoding, data = encode_print_image(str(card_images / "card1.png"), dpi=60)
+    assert Image.open(io.BytesIO(data)).size == (150, 210) == (width, height)
+    with pytest.raises(ValueError):
+        encode_print_image(str(card_images / "card1.png"), encoding="png")
+
+
+def test_create_pdf(card_images, tmp_path):
+    """
+    Test that ten cards are written to two pages, each image embedded once.
+    """
+    output_file = tmp_path / "cards.pdf"
+    create_pdf(str(card_images), str(output_file), "letter", dpi=30)
+    objects = read_pdf_objects(output_file.read_bytes())
+    assert len(get_pages(objects)) == 2
+    assert len(get_images(objects)) == 10
+    assert sorted(os.listdir(tmp_path)) == ["cards", "cards.pdf"]
+
+
+def test_write_pdf_shares_repeated_images(card_images, tmp_path):
+    """
+    Test that a card placed several times is stored once, and that a process pool writes the same PDF.
+    """
+    paths = [str(card_images / f"card{i % 3}.png") for i in range(12)]
+    output_file = tmp_path / "deck.pdf"
+    assert write_pdf(paths, str(output_file), "A4", dpi=30) == 12
+    objects = read_pdf_objects(output_file.read_bytes())
+    assert len(get_pages(objects)) == 2
+    assert len(get_images(objects)) == 3
+
+    pool_file = tmp_path / "deck_pool.pdf"
+    write_pdf(paths, str(pool_file), "A4", dpi=30, jobs=2)
+    assert pool_file.read_bytes() == output_file.read_bytes()
+
+
+def test_write_pdf_skips_bad_images(card_images, tmp_path):
+    """
+    Test that unreadable images are skipped every time they are placed.
+    """
+    bad_file = card_images / "bad.png"
+    bad_file.write_bytes(b"not an image")
+    paths = [str(bad_file), str(card_images / "card1.png"), str(bad_file)]
+    output_file = tmp_path / "cards.pdf"
+    assert write_pdf(paths, str(output_file), "letter", dpi=30) == 1
+    assert len(get_pages(read_pdf_objects(output_file.read_bytes()))) == 1
+
+    assert write_pdf([str(bad_file)], str(tmp_path / "none.pdf"), "letter", dpi=30) == 0
+    assert not (tmp_path / "none.pdf").exists()
+
+
+def test_write_pdf_removes_temp_file_on_error(card_images, tmp_path, monkeypatch):
+    """
+    Test that the partial PDF is removed, and an existing PDF kept, when writing fails part way.
+    """
+    output_file = tmp_path / "cards.pdf"
+    output_file.write_bytes(b"previous pdf")
+
+    def fail_on_second_page(self, page_size, placements):
+        if self.page_ids:
+            raise OSError("disk full")
+        self.page_ids.append(self.add_object("<< >>"))
+
+    monkeypatch.setattr(StreamingPdfWriter, "add_page", fail_on_second_page)
+    paths = [str(card_images / f"card{i}.png") for i in range(10)]
+    with pytest.raises(OSError):
+        write_pdf(paths, str(output_file), "letter", dpi=30)
+    assert sorted(os.listdir(tmp_path)) == ["cards", "cards.pdf"]
+    assert output_file.read_bytes() == b"previous pdf"
+
+
+def test_load_deck(tmp_path):
+    """
+    Test that deck counts default to one and repeated serial numbers are added up, in listed order.
+    """
+    deck_file = tmp_path / "deck.txt"
+    deck_file.write_text("# My deck\nS2;3\n\nS1\n S2 ; 2\n", encoding="utf-8")
+    assert list(load_deck(str(deck_file)).items()) == [("S2", 5), ("S1", 1)]
+
+    for line in ["S1;0", "S1;two", "S1;2;3", ";2"]:
+        deck_file.write_text(line + "\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_deck(str(deck_file))
+
+
+def test_get_print_run(tmp_path):
+    """
+    Test that cards are printed in card list order, or deck order, skipping unknown serial numbers.
+    """
+    card_list = write_card_list(tmp_path / "cards.csv", [make_card_row(f"Card {s}", s) for s in ["S1", "S2", "S3"]])
+    assert [(card["serial"], count) for card, count in get_print_run(card_list)] == [("S1", 1), ("S2", 1), ("S3", 1)]
+    print_run = get_print_run(card_list, {"S3": 2, "S9": 1, "S1": 4})
+    assert [(card["serial"], count) for card, count in print_run] == [("S3", 2), ("S1", 4)]
+
+
+def test_create_pdf_from_card_list(card_elements_folder, tmp_path):
+    """
+    Test that a deck renders only its own cards, on demand, and shares the images of repeated cards.
+    """
+    card_list = write_card_list(tmp_path / "cards.csv", [make_card_row(f"Card {s}", s) for s in ["S1", "S2", "S3"]])
+    deck_file = tmp_path / "deck.txt"
+    deck_file.write_text("S2;7\nS1;3\n", encoding="utf-8")
+    cards_folder = tmp_path / "cards"
+    output_file = tmp_path / "deck.pdf"
+
+    assert create_pdf_from_card_list(card_list, str(output_file), "letter", str(deck_file), str(cards_folder),
+                                     dpi=30) == 10
+    assert sorted(os.listdir(cards_folder)) == ["S1.png", "S2.png", "render_manifest.json"]
+    objects = read_pdf_objects(output_file.read_bytes())
+    assert len(get_pages(objects)) == 2
+    assert len(get_images(objects)) == 2
+
+    # Unchanged cards are not rendered again.
+    modified = os.stat(cards_folder / "S1.png").st_mtime_ns
+    create_pdf_from_card_list(card_list, str(output_file), "letter", str(deck_file), str(cards_folder), dpi=30)
+    assert os.stat(cards_folder / "S1.png").st_mtime_ns == modified
+    assert read_pdf_objects(output_file.read_bytes()) == objects
@@ -0,0 +1,574 @@
+#!/bin/python3
+import io
+import os
+import sys
+import csv
+import pytest
+from PIL import Image, ImageChops, ImageStat
+
+sys.path.append('../')
+
+import create_card
+from create_card import get_template_asset
+from create_card import get_template_file_names
+from create_card import preload_template_assets
+from create_card import create_base_card
+from create_card import get_frame_layer
+from create_card import load_card_art
+from create_card import get_card_art
+from create_card import get_font
+from create_card import preload_fonts
+from create_card import search_font_size
+from create_card import get_fitting_font_size
+from create_card import get_text_length
+from create_card import wrap_text_to_width
+from create_card import iter_card_rows
+from create_card import process_csv_to_cards
+from create_card import render_card
+from create_card import get_render_size
+from ttcg_tools import get_card_data_from_row
+from render_manifest import RenderManifest
+from ttcg_constants import DEFAULT_RENDER_MANIFEST_FILE
+from ttcg_constants import DEFAULT_REJECTED_CARDS_FILE
+
+from conftest import TEST_CARD_ELEMENTS_FOLDER
+from conftest import make_card_row
+from conftest import write_card_list
+
+
+@pytest.fixture
+def template_cache(card_elements_folder, monkeypatch):
+    """
+    Point the template cache at the repository templates and start each test with it empty.
+    """
+    monkeypatch.setattr(create_card, "TEMPLATE_ASSET_CACHE_SIZE", create_card.TEMPLATE_ASSET_CACHE_SIZE)
+    create_card.TEMPLATE_ASSET_BUFFER.clear()
+    create_card.FRAME_LAYER_BUFFER.clear()
+    yield create_card.TEMPLATE_ASSET_BUFFER
+    create_card.TEMPLATE_ASSET_BUFFER.clear()
+    create_card.FRAME_LAYER_BUFFER.clear()
+
+
+def test_get_template_asset_resized_rgba(template_cache):
+    """
+    Test that templates are converted to RGBA and resized to the requested size.
+    """
+    asset = get_template_asset("fire-50.png", 150, 210)
+    assert asset.mode == "RGBA"
+    assert asset.size == (150, 210)
+
+
+def test_get_template_asset_cached(template_cache):
+    """
+    Test that a template is only decoded once.
+    """
+    first = get_template_asset("1 star.png")
+    assert get_template_asset("1 star.png") is first
+    assert len(template_cache) == 1
+
+
+def test_get_template_asset_missing(template_cache):
+    """
+    Test that a missing template returns None and is remembered.
+    """
+    assert get_template_asset("missing.png") is None
+    assert len(template_cache) == 1
+
+
+def test_get_template_asset_lru_eviction(template_cache, monkeypatch):
+    """
+    Test that the least recently used template is evicted first.
+    """
+    monkeypatch.setattr(create_card, "TEMPLATE_ASSET_CACHE_SIZE", 2)
+    get_template_asset("1 star.png", 10, 10)
+    get_template_asset("2 star.png", 10, 10)
+    get_template_asset("1 star.png", 10, 10)
+    get_template_asset("3 star.png", 10, 10)
+    cached = [key[0] for key in template_cache]
+    assert cached == [f"{TEST_CARD_ELEMENTS_FOLDER}/1 star.png", f"{TEST_CARD_ELEMENTS_FOLDER}/3 star.png"]
+
+
+def test_preload_template_assets(template_cache):
+    """
+    Test that preloading loads every template create_base_card can use.
+    """
+    preload_template_assets(75, 105)
+    file_names = get_template_file_names()
+    assert len(template_cache) == len(file_names)
+    assert all(asset is not None for asset in template_cache.values())
+
+
+def test_create_base_card_uses_cache(template_cache):
+    """
+    Test that rendering a base card twice decodes its templates once and gives the same image.
+    """
+    first = create_base_card("Fire", 2, 75, 105, None, 50, "echo", "passive")
+    size = len(template_cache)
+    second = create_base_card("Fire", 2, 75, 105, None, 50, "echo", "passive")
+    assert len(template_cache) == size == 4
+    assert first.tobytes() == second.tobytes()
+
+
+def test_get_frame_layer_cached(template_cache):
+    """
+    Test that a frame is composed once per type, translucency, styles and level.
+    """
+    frame = get_frame_layer("Water", 1, 75, 105, 50, "counter", None)
+    assert get_frame_layer("Water", 1, 75, 105, 50, "counter", None) is frame
+    assert get_frame_layer("Water", 1, 75, 105, 50, "counter", "echo") is not frame
+    assert len(create_card.FRAME_LAYER_BUFFER) == 2
+
+
+def test_create_base_card_frame_not_shared(template_cache):
+    """
+    Test that drawing on a base card does not change the cached frame.
+    """
+    card = create_base_card("Water", 1, 75, 105, None, 50)
+    frame = get_frame_layer("Water", 1, 75, 105, 50)
+    assert card is not frame
+    card.paste((255, 0, 0, 255), (0, 0, 75, 105))
+    assert frame.getpixel((0, 0)) != (255, 0, 0, 255)
+
+
+def test_create_base_card_art_under_frame(template_cache, tmp_path):
+    """
+    Test that the card image is drawn under the frame.
+    """
+    art_file = str(tmp_path / "art.png")
+    Image.new("RGBA", (150, 300), (10, 200, 30, 255)).save(art_file)
+    frame = get_frame_layer("Fire", 3, 75, 105, 50)
+    card = create_base_card("Fire", 3, 75, 105, art_file, 50)
+    expected = Image.new("RGBA", (75, 105), (0, 0, 0, 0))
+    expected.paste((10, 200, 30, 255), (0, 0, 75, 105))
+    assert card.tobytes() == Image.alpha_composite(expected, frame).tobytes()
+
+
+@pytest.fixture
+def art_file(tmp_path, monkeypatch):
+    """
+    Write a large JPEG card art image and give each test an empty art cache.
+    """
+    monkeypatch.setattr(create_card, "ART_BUFFER", create_card.collections.OrderedDict())
+    monkeypatch.setattr(create_card, "ART_CACHE_FOLDER", None)
+    art_path = tmp_path / "art.jpeg"
+    Image.new("RGB", (1600, 2000), (200, 30, 30)).save(art_path, quality=90)
+    return str(art_path)
+
+
+def test_load_card_art_draft(art_file):
+    """
+    Test that JPEG art is decoded at a reduced size and resized to the requested width.
+    """
+    art = load_card_art(art_file, 375)
+    assert art.size == (375, 468)
+    assert art.mode == "RGBA"
+    assert abs(art.getpixel((100, 100))[0] - 200) <= 2
+
+
+def test_get_card_art_cached(art_file):
+    """
+    Test that unchanged art is only decoded once, and changed art is decoded again.
+    """
+    first = get_card_art(art_file, 375)
+    assert get_card_art(art_file, 375) is first
+    assert get_card_art(art_file, 187) is not first
+    stat = os.stat(art_file)
+    os.utime(art_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert get_card_art(art_file, 375) is not first
+
+
+def test_get_card_art_sidecar(art_file, tmp_path, monkeypatch):
+    """
+    Test that art stored in the art cache folder is reused without decoding the original.
+    """
+    monkeypatch.setattr(create_card, "ART_CACHE_FOLDER", str(tmp_path / "art_cache"))
+    first = get_card_art(art_file, 375)
+    assert len(os.listdir(tmp_path / "art_cache")) == 1
+    create_card.ART_BUFFER.clear()
+
+    def fail(image_file, width):
+        raise AssertionError("the original art was decoded")
+
+    monkeypatch.setattr(create_card, "load_card_art", fail)
+    assert get_card_art(art_file, 375).tobytes() == first.tobytes()
+
+
+def test_get_card_art_missing(art_file):
+    """
+    Test that missing art raises FileNotFoundError, which create_base_card skips.
+    """
+    with pytest.raises(FileNotFoundError):
+        get_card_art(art_file + ".missing")
+
+
+def test_get_font_cached():
+    """
+    Test that each (path, size) font is only loaded once.
+    """
+    font = get_font(23)
+    assert get_font(23) is font
+    assert get_font(24) is not font
+    assert font.size == 23
+
+
+def test_get_font_reset_in_new_process(monkeypatch):
+    """
+    Test that fonts loaded by another process are not reused.
+    """
+    font = get_font(23)
+    monkeypatch.setattr(create_card, "FONT_BUFFER_PID", -1)
+    assert get_font(23) is not font
+
+
+def test_get_font_missing_file():
+    """
+    Test that a missing font file falls back to the default font.
+    """
+    assert get_font(12, "missing_font.ttf") is not None
+
+
+def test_preload_fonts():
+    """
+    Test that preloading loads every size up to the largest text box size.
+    """
+    create_card.FONT_BUFFER.clear()
+    preload_fonts()
+    assert len(create_card.FONT_BUFFER) == max(create_card.CARD_TEXT_FONT_SIZES)
+
+
+@pytest.mark.parametrize("largest_fit", [1, 2, 3, 17, 29, 30])
+def test_search_font_size_binary(largest_fit):
+    """
+    Test that the binary search finds the largest fitting size.
+    """
+    tried = []
+    def fits(size):
+        tried.append(size)
+        return size <= largest_fit
+    assert search_font_size(fits, 30) == largest_fit
+    # The initial size is tried first, then the rest are binary searched.
+    assert tried[0] == 30
+    assert len(tried) <= 6
+
+
+def test_search_font_size_not_monotonic():
+    """
+    Test that sizes are tried from the top down when fitting is not monotonic.
+    """
+    fitting_sizes = {5, 12, 20}
+    assert search_font_size(lambda size: size in fitting_sizes, 30, monotonic=False) == 20
+    assert search_font_size(lambda size: False, 30, monotonic=False) == 1
+
+
+def test_search_font_size_small_initial_size():
+    """
+    Test that an initial size of 1 or less is used as is.
+    """
+    assert search_font_size(lambda size: True, 1) == 1
+    assert search_font_size(lambda size: True, 0) == 0
+
+
+def test_get_fitting_font_size_memo():
+    """
+    Test that each text box is only searched once.
+    """
+    create_card.FONT_FIT_BUFFER.clear()
+    calls = []
+    def fits(size):
+        calls.append(size)
+        return size <= 10
+    assert get_fitting_font_size(("test", "text"), fits, 30) == 10
+    count = len(calls)
+    assert get_fitting_font_size(("test", "text"), fits, 30) == 10
+    assert len(calls) == count
+
+
+def test_get_text_length_cached():
+    """
+    Test that text widths are measured once and match the font.
+    """
+    font = get_font(30)
+    width = get_text_length(font, "Destroy")
+    assert width == font.getlength("Destroy")
+    assert (font.path, font.size, "Destroy") in create_card.TEXT_LENGTH_BUFFER
+
+
+def test_wrap_text_to_width_fits():
+    """
+    Test that every wrapped line fits the width and no words are lost.
+    """
+    font = get_font(30)
+    text = "Destroy one rank 3 nature card you own to play one rank 4 nature card from your deck."
+    wrapped = wrap_text_to_width(text, font, 300)
+    assert len(wrapped.split("\n")) > 1
+    assert all(font.getlength(line) <= 300 for line in wrapped.split("\n"))
+    assert wrapped.split() == text.split()
+
+
+def test_wrap_text_to_width_greedy():
+    """
+    Test that a line is only broken when the next word does not fit.
+    """
+    font = get_font(30)
+    width = font.getlength("aa bb")
+    assert wrap_text_to_width("aa bb cc", font, width) == "aa bb\ncc"
+
+
+def test_wrap_text_to_width_long_word_and_newlines():
+    """
+    Test that an overlong word gets its own line and existing line breaks are kept.
+    """
+    font = get_font(30)
+    assert wrap_text_to_width("a Supercalifragilistic b", font, 50) == "a\nSupercalifragilistic\nb"
+    assert wrap_text_to_width("one\ntwo", font, 1000) == "one\ntwo"
+    assert wrap_text_to_width("", font, 100) == ""
+
+
+def test_render_card_in_memory(template_cache, tmp_path):
+    """
+    Test that render_card returns the same image create_card saves, without writing a file.
+    """
+    card_data = get_card_data_from_row(make_card_row("A", "S1"))
+    img = render_card(card_data)
+    assert img.size == (750, 1050)
+    assert img.mode == "RGBA"
+    output_file = create_card.create_card(card_data, str(tmp_path))
+    assert Image.open(output_file).tobytes() == img.tobytes()
+
+
+def test_render_card_encode(template_cache):
+    """
+    Test that render_card can return encoded bytes.
+    """
+    card_data = get_card_data_from_row(make_card_row("A", "S1"))
+    png = render_card(card_data, encode="PNG")
+    assert png.startswith(b"\x89PNG")
+    jpeg = render_card(card_data, encode="JPEG", quality=80)
+    assert jpeg.startswith(b"\xff\xd8")
+    assert Image.open(io.BytesIO(jpeg)).size == (750, 1050)
+
+
+def test_get_render_size():
+    """
+    Test that a render size is taken from the size, then the scale, then the full card size.
+    """
+    assert get_render_size() == (750, 1050)
+    assert get_render_size(scale=0.5) == (375, 525)
+    assert get_render_size((400, 580), scale=0.5) == (400, 580)
+    with pytest.raises(ValueError):
+        get_render_size(scale=0)
+
+
+def test_render_card_scaled(template_cache):
+    """
+    Test that a card rendered at a smaller scale closely matches a downscaled full size card.
+    """
+    card_data = get_card_data_from_row(make_card_row("A", "S1"))
+    small = render_card(card_data, scale=0.5)
+    assert small.size == (375, 525)
+    expected = render_card(card_data).resize(small.size, Image.Resampling.LANCZOS)
+    difference = ImageStat.Stat(ImageChops.difference(small, expected)).mean
+    assert max(difference) < 3
+    assert render_card(card_data, size=(400, 580)).size == (400, 580)
+
+
+@pytest.mark.parametrize("profile,image_format,mode", [("png", "PNG", "RGBA"),
+                                                      ("fast", "PNG", "RGBA"),
+                                                      ("small", "WEBP", "RGBA"),
+                                                      ("print", "JPEG", "RGB")])
+def test_create_card_output_profiles(template_cache, tmp_path, profile, image_format, mode):
+    """
+    Test that each output profile saves the card in its format, at 300 DPI.
+    """
+    card_data = get_card_data_from_row(make_card_row("A", "S1"))
+    output_file = create_card.create_card(card_data, str(tmp_path), profile=profile)
+    assert output_file.endswith("." + create_card.CARD_OUTPUT_PROFILES[profile]["extension"])
+    with Image.open(output_file) as img:
+        assert img.format == image_format
+        assert img.mode == mode
+        if image_format != "WEBP":
+            assert round(img.info["dpi"][0]) == 300
+        if profile != "print":
+            # Lossless profiles keep every visible pixel (WebP may change the colour of transparent ones).
+            expected = render_card(card_data)
+            saved = img.convert("RGBA")
+            assert create_card.flatten_card_image(saved, "JPEG").tobytes() == create_card.flatten_card_image(expected, "JPEG").tobytes()
+
+
+def test_create_card_invalid_profile(tmp_path):
+    """
+    Test that an unknown output profile raises an error.
+    """
+    card_data = get_card_data_from_row(make_card_row("A", "S1"))
+    with pytest.raises(ValueError):
+        create_card.create_card(card_data, str(tmp_path), profile="tiff")
+
+
+def test_process_csv_to_cards_profile_change(tmp_path):
+    """
+    Test that changing the output profile renders every card again and replaces the old images.
+    """
+    csv_file = write_card_list(tmp_path / "cards.csv", [make_card_row("A", "S1")])
+    output_folder = tmp_path / "out"
+    output_folder.mkdir()
+    process_csv_to_cards(csv_file, str(output_folder))
+    process_csv_to_cards(csv_file, str(output_folder), profile="print")
+    assert sorted(os.listdir(output_folder)) == ["S1.jpg", DEFAULT_RENDER_MANIFEST_FILE]
+    manifest = RenderManifest(str(output_folder / DEFAULT_RENDER_MANIFEST_FILE))
+    assert manifest.cards["S1"]["profile"] == "print"
+
+
+def test_iter_card_rows(tmp_path):
+    """
+    Test that rows are streamed with their line numbers.
+    """
+    csv_file = write_card_list(tmp_path / "cards.csv", [make_card_row("A", "S1"), make_card_row("B", "S2")])
+    assert [(line, row[0]) for line, row in iter_card_rows(csv_file)] == [(2, "A"), (3, "B")]
+
+
+def test_iter_card_rows_bad_header(tmp_path):
+    """
+    Test that a bad header raises an error.
+    """
+    csv_file = tmp_path / "cards.csv"
+    csv_file.write_text("NAME;TYPE\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_card_rows(str(csv_file)))
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_process_csv_to_cards_skips_bad_rows(tmp_path, jobs):
+    """
+    Test that a bad row is reported without stopping the rest of the batch.
+    """
+    rows = [make_card_row("A", "S1"), ["broken", "row"], make_card_row("B", "S2")]
+    csv_file = write_card_list(tmp_path / "cards.csv", rows)
+    output_folder = tmp_path / "out"
+    output_folder.mkdir()
+    failures = process_csv_to_cards(csv_file, str(output_folder), jobs=jobs)
+    assert [line for line, _ in failures] == [3]
+    assert sorted(os.listdir(output_folder)) == ["S1.png", "S2.png", DEFAULT_REJECTED_CARDS_FILE, DEFAULT_RENDER_MANIFEST_FILE]
+    with open(output_folder / DEFAULT_REJECTED_CARDS_FILE, encoding="utf-8") as f:
+        rejected = list(csv.reader(f, delimiter=";"))
+    assert rejected[0][:3] == ["LINE", "ERROR", "NAME"]
+    assert rejected[1][0] == "3" and rejected[1][2:] == ["broken", "row"]
+
+
+def test_process_csv_to_cards_render_error(tmp_path):
+    """
+    Test that a row that fails while rendering is rejected, and the reject file is removed once it renders.
+    """
+    bad_art = tmp_path / "bad_art.png"
+    bad_art.write_bytes(b"not an image")
+    bad_row = make_card_row("A", "S1")
+    bad_row[4] = str(bad_art)
+    csv_file = write_card_list(tmp_path / "cards.csv", [bad_row, make_card_row("B", "S2")])
+    output_folder = tmp_path / "out"
+    output_folder.mkdir()
+    reject_file = tmp_path / "rejected.csv"
+    failures = process_csv_to_cards(csv_file, str(output_folder), reject_file=str(reject_file))
+    assert [line for line, _ in failures] == [2]
+    assert reject_file.is_file()
+    assert os.path.isfile(output_folder / "S2.png")
+
+    write_card_list(tmp_path / "cards.csv", [make_card_row("A", "S1"), make_card_row("B", "S2")])
+    assert process_csv_to_cards(csv_file, str(output_folder), reject_file=str(reject_file)) == []
+    assert not reject_file.exists()
+    assert os.path.isfile(output_folder / "S1.png")
+
+
+def test_render_cards_pipelined(template_cache, tmp_path):
+    """
+    Test that the pipeline renders the same cards as create_card and passes failed jobs through.
+    """
+    jobs = [{"card_data": get_card_data_from_row(make_card_row(name, serial)), "error": None}
+            for name, serial in [("A", "S1"), ("B", "S2"), ("C", "S3")]]
+    jobs.insert(1, {"error": ValueError("bad row")})
+    finished = list(create_card.render_cards_pipelined(iter(jobs), str(tmp_path), writers=2, queue_size=1))
+    assert sorted(job["output"] for job in finished if job["error"] is None) == ["S1.png", "S2.png", "S3.png"]
+    assert [str(job["error"]) for job in finished if job["error"] is not None] == ["bad row"]
+    with Image.open(tmp_path / "S2.png") as img:
+        assert img.tobytes() == render_card(jobs[2]["card_data"]).tobytes()
+
+
+def render_twice(tmp_path, first_rows, second_rows, force=False):
+    """
+    Render a card list, then render a changed card list into the same folder.
+
+    Returns the modification times of the outputs after each run.
+    """
+    output_folder = tmp_path / "out"
+    output_folder.mkdir()
+    csv_file = write_card_list(tmp_path / "cards.csv", first_rows)
+    process_csv_to_cards(csv_file, str(output_folder))
+    first = {name: os.stat(output_folder / name).st_mtime_ns for name in os.listdir(output_folder)}
+    for name in first:
+        # Backdate the outputs so a re-render is visible in the modification time.
+        os.utime(output_folder / name, ns=(1, 1))
+    write_card_list(tmp_path / "cards.csv", second_rows)
+    process_csv_to_cards(csv_file, str(output_folder), force=force)
+    second = {name: os.stat(output_folder / name).st_mtime_ns for name in os.listdir(output_folder)}
+    return first, second
+
+
+def test_process_csv_to_cards_skips_unchanged(tmp_path):
+    """
+    Test that a second run only renders the cards that changed.
+    """
+    rows = [make_card_row("A", "S1"), make_card_row("B", "S2")]
+    changed_rows = [make_card_row("A", "S1"), make_card_row("B2", "S2")]
+    _, second = render_twice(tmp_path, rows, changed_rows)
+    assert second["S1.png"] == 1
+    assert second["S2.png"] != 1
+
+
+def test_process_csv_to_cards_force(tmp_path):
+    """
+    Test that force renders unchanged cards again.
+    """
+    rows = [make_card_row("A", "S1")]
+    _, second = render_twice(tmp_path, rows, rows, force=True)
+    assert second["S1.png"] != 1
+
+
+def test_process_csv_to_cards_removes_old_cards(tmp_path):
+    """
+    Test that the image of a card removed from the card list is deleted.
+    """
+    rows = [make_card_row("A", "S1"), make_card_row("B", "S2")]
+    _, second = render_twice(tmp_path, rows, rows[:1])
+    assert "S2.png" not in second
+    assert second["S1.png"] == 1
+
+
+def test_process_csv_to_cards_keeps_images_of_invalid_rows(tmp_path):
+    """
+    Test that a rendered card whose row becomes invalid keeps its last good image.
+    """
+    rows = [make_card_row("A", "S1"), make_card_row("B", "S2"), make_card_row("C", "S3")]
+    # An effect with a stray ';' adds a column, and corrupt card art fails to render.
+    broken_row = make_card_row("A", "S1")
+    broken_row[7] += ";"
+    bad_art = tmp_path / "bad_art.png"
+    bad_art.write_bytes(b"not an image")
+    bad_art_row = make_card_row("B", "S2")
+    bad_art_row[4] = str(bad_art)
+    _, second = render_twice(tmp_path, rows, [broken_row, bad_art_row])
+    assert second["S1.png"] == 1
+    assert second["S2.png"] == 1
+    # S3 was removed from the card list, but is kept while a row cannot be read.
+    assert second["S3.png"] == 1
+
+
+def test_process_csv_to_cards_rerenders_missing_output(tmp_path):
+    """
+    Test that a card whose image was deleted is rendered again.
+    """
+    rows = [make_card_row("A", "S1")]
+    output_folder = tmp_path / "out"
+    output_folder.mkdir()
+    csv_file = write_card_list(tmp_path / "cards.csv", rows)
+    process_csv_to_cards(csv_file, str(output_folder))
+    os.remove(output_folder / "S1.png")
+    process_csv_to_cards(csv_file, str(output_folder))
+    assert os.path.isfile(output_folder / "S1.png")
@@ -0,0 +1,150 @@
+#!/bin/python3
+import os
+import gc
+import sys
+import random
+import pytest
+
+sys.path.append('../')
+
+import generate_random_effects
+from generate_random_effects import compile_effect_template_pattern
+from generate_random_effects import load_effect_style_patterns
+from generate_random_effects import get_effect_weight_keys
+from generate_random_effects import get_card_list_counts
+from generate_random_effects import get_weighted_random_effect
+from generate_random_effects import ALIAS_TABLE_BUFFER
+
+from ttcg_tools import deduce_effect_style_from_effect_text
+from ttcg_constants import DEFAULT_CARD_LIST_FILE
+
+from conftest import make_card_row
+from conftest import write_card_list
+
+
+def make_effect_rows(effects):
+    """
+    Make one card list row per effect.
+    """
+    return [make_card_row(f"Card {i}", f"S{i}", effect) for i, effect in enumerate(effects)]
+
+
+@pytest.fixture(autouse=True)
+def empty_buffers():
+    """
+    Start each test with empty sampler buffers.
+    """
+    for buffer in (generate_random_effects.EFFECT_KEY_BUFFER, generate_random_effects.EFFECT_STYLE_PATTERN_BUFFER,
+                   generate_random_effects.CARD_LIST_COUNT_BUFFER, ALIAS_TABLE_BUFFER):
+        buffer.clear()
+    yield
+
+
+@pytest.fixture
+def template_file(tmp_path, monkeypatch):
+    """
+    Use a small effect template file for the 'template' signal.
+    """
+    path = tmp_path / "templates.txt"
+    path.write_text("Alpha <number> card(s).\nBeta <number> card(s).\n", encoding="utf-8")
+    compile_pattern = generate_random_effects.compile_effect_template_pattern
+    monkeypatch.setattr(generate_random_effects, "compile_effect_template_pattern",
+                        lambda template_file=None: compile_pattern(str(path)))
+    return str(path)
+
+
+def test_compile_effect_template_pattern(tmp_path):
+    """
+    Test that effects are matched to the template they were generated from, with optional plurals.
+    """
+    path = tmp_path / "templates.txt"
+    path.write_text("Alpha <number> card(s).\nBeta <number> card(s).\n", encoding="utf-8")
+    pattern, templates = compile_effect_template_pattern(str(path))
+    assert templates == ["Alpha <number> card(s).", "Beta <number> card(s)."]
+    assert templates[pattern.fullmatch("beta 1 card.").lastindex - 1] == "Beta <number> card(s)."
+    assert templates[pattern.fullmatch("Alpha 3 cards.").lastindex - 1] == "Alpha <number> card(s)."
+    assert pattern.fullmatch("Gamma 1 card.") is None
+    assert compile_effect_template_pattern(str(tmp_path / "missing.txt")) == (None, [])
+
+
+def test_load_effect_style_patterns_matches_deduced_style(monkeypatch):
+    """
+    Test that the buffered style patterns give the same style as deduce_effect_style_from_effect_text.
+    """
+    monkeypatch.chdir('..')
+    style_patterns = load_effect_style_patterns()
+    assert load_effect_style_patterns() is style_patterns
+
+    effects = []
+    with open(DEFAULT_CARD_LIST_FILE, 'r', encoding='utf-8') as f:
+        for line in list(f)[1:]:
+            effects.extend(effect for effect in line.split(';')[7:9] if effect)
+    assert effects
+    keys = get_effect_weight_keys(effects, "style")
+    assert keys == [deduce_effect_style_from_effect_text(effect) for effect in effects]
+
+
+def test_get_card_list_counts_recounted_on_change(tmp_path, template_file):
+    """
+    Test that the counts are buffered, and recounted when the card list's modification time changes.
+    """
+    rows = make_effect_rows(["Alpha 1 card.", "Alpha 2 cards.", "Beta 1 card."])
+    card_list = write_card_list(tmp_path / "cards.csv", rows)
+    counts = get_card_list_counts("template", card_list)
+    assert counts == {"Alpha <number> card(s).": 2, "Beta <number> card(s).": 1}
+
+    # The same modification time keeps the buffered counts.
+    stat = os.stat(card_list)
+    write_card_list(tmp_path / "cards.csv", make_effect_rows(["Beta 1 card."]))
+    os.utime(card_list, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert get_card_list_counts("template", card_list) is counts
+
+    os.utime(card_list, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert get_card_list_counts("template", card_list) == {"Beta <number> card(s).": 1}
+    assert get_card_list_counts("template", str(tmp_path / "missing.csv")) == {}
+
+
+def test_get_weighted_random_effect_favors_underused_templates(tmp_path, template_file):
+    """
+    Test that effects of a template used by many cards are drawn less often.
+    """
+    rows = make_effect_rows(["Alpha 1 card.", "Alpha 2 cards.", "Alpha 3 cards."])
+    card_list = write_card_list(tmp_path / "cards.csv", rows)
+    values = ["Alpha 4 cards.", "Alpha 5 cards.", "Beta 1 card."]
+    random.seed(1)
+    draws = [get_weighted_random_effect(values, card_list_file=card_list) for _ in range(3000)]
+    # Alpha effects weigh 1/4 each and the Beta effect 1, so the Beta effect is drawn 2/3 of the time.
+    assert 0.6 < draws.count("Beta 1 card.") / len(draws) < 0.73
+
+    # Once the card list uses Beta more, the weights are rebuilt.
+    write_card_list(tmp_path / "cards.csv", make_effect_rows(["Beta 1 card."] * 7))
+    os.utime(card_list, ns=(0, os.stat(card_list).st_mtime_ns + 10 ** 9))
+    draws = [get_weighted_random_effect(values, card_list_file=card_list) for _ in range(3000)]
+    # Now each Alpha effect weighs 1 and the Beta effect 1/8.
+    assert draws.count("Beta 1 card.") / len(draws) < 0.1
+
+    with pytest.raises(ValueError):
+        get_weighted_random_effect(values, signal="color", card_list_file=card_list)
+
+
+def test_get_weighted_random_effect_not_reused_for_new_list(tmp_path, template_file):
+    """
+    Test that an alias table is never reused for another effect list, even one with a reused id().
+    """
+    card_list = write_card_list(tmp_path / "cards.csv", make_effect_rows(["Alpha 1 card."]))
+    old_values = ["Alpha 4 cards."]
+    assert get_weighted_random_effect(old_values, card_list_file=card_list) == "Alpha 4 cards."
+    del old_values
+    gc.collect()
+
+    # Tables of a previous list are dropped when a new list is used.
+    new_values = ["Beta 2 cards."]
+    assert get_weighted_random_effect(new_values, card_list_file=card_list) == "Beta 2 cards."
+    assert all(entry["source"] is new_values for entry in ALIAS_TABLE_BUFFER.values())
+
+    # A buffered table whose key has the id() of a new list, but was built for another list, is rebuilt.
+    reused_values = ["Beta 3 cards."]
+    stale_key = (id(reused_values), "template", card_list, (), ())
+    ALIAS_TABLE_BUFFER[stale_key] = dict(ALIAS_TABLE_BUFFER[next(iter(ALIAS_TABLE_BUFFER))])
+    assert get_weighted_random_effect(reused_values, card_list_file=card_list) == "Beta 3 cards."
+    assert ALIAS_TABLE_BUFFER[stale_key]["source"] is reused_values
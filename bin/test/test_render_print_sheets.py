@@ -0,0 +1,138 @@
+#!/bin/python3
+import os
+import sys
+import pytest
+from PIL import Image
+
+sys.path.append('../')
+
+import create_card
+import render_print_sheets as render_print_sheets_module
+from render_print_sheets import get_sheet_layout
+from render_print_sheets import render_sheet
+from render_print_sheets import render_print_sheets
+from ttcg_tools import get_card_data_from_row
+
+from conftest import make_card_row
+from conftest import write_card_list
+from conftest import read_pdf_objects
+from conftest import get_pages
+from conftest import get_images
+
+pytestmark = pytest.mark.usefixtures("card_elements_folder")
+
+
+def test_get_sheet_layout_letter():
+    """
+    Test that the sheet layout matches the compile_pdf grid at 300 DPI.
+    """
+    layout = get_sheet_layout("letter", 300)
+    assert layout["page_pixels"] == (2550, 3300)
+    assert layout["card_pixels"] == (750, 1050)
+    assert layout["positions"][0] == (150, 75)
+    assert layout["positions"][8] == (1650, 2175)
+
+
+def test_render_sheet():
+    """
+    Test that cards are drawn in their grid slots on a white sheet.
+    """
+    layout = get_sheet_layout("letter", 100)
+    cards = [(2, get_card_data_from_row(make_card_row("A", "S1")))]
+    sheet = render_sheet(cards, layout)
+    assert sheet.size == layout["page_pixels"]
+    assert sheet.getpixel((1, 1)) == (255, 255, 255)
+    x, y = layout["positions"][0]
+    expected = Image.new("RGB", layout["card_pixels"], (255, 255, 255))
+    card = create_card.render_card(cards[0][1], size=layout["card_pixels"])
+    expected.paste(card, (0, 0), card)
+    assert sheet.crop((x, y, x + card.width, y + card.height)).tobytes() == expected.tobytes()
+    # The second slot is empty.
+    assert sheet.getpixel(layout["positions"][1]) == (255, 255, 255)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_print_sheets_images(tmp_path, jobs):
+    """
+    Test that one image is written per nine cards, and bad rows are skipped.
+    """
+    rows = [make_card_row(f"Card {i}", f"S{i}") for i in range(10)]
+    rows.insert(3, ["broken", "row"])
+    csv_file = write_card_list(tmp_path / "cards.csv", rows)
+    sheets, failures = render_print_sheets(csv_file, str(tmp_path / "sheets"), dpi=50, sheet_format="png", jobs=jobs)
+    assert sheets == 2
+    assert [line for line, _ in failures] == [5]
+    assert sorted(os.listdir(tmp_path / "sheets")) == ["sheet-001.png", "sheet-002.png"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_print_sheets_skips_unrenderable_cards(tmp_path, jobs):
+    """
+    Test that a card that fails to render is reported and its slot left blank, without stopping the run.
+    """
+    bad_art = tmp_path / "bad.png"
+    bad_art.write_bytes(b"not an image")
+    rows = [make_card_row(f"Card {i}", f"S{i}") for i in range(3)]
+    rows[1][4] = str(bad_art)
+    csv_file = write_card_list(tmp_path / "cards.csv", rows)
+    sheets, failures = render_print_sheets(csv_file, str(tmp_path / "sheets"), dpi=50, sheet_format="png", jobs=jobs)
+    assert sheets == 1
+    assert [line for line, _ in failures] == [3]
+
+    layout = get_sheet_layout("letter", 50)
+    with Image.open(tmp_path / "sheets" / "sheet-001.png") as sheet:
+        x, y = layout["positions"][1]
+        width, height = layout["card_pixels"]
+        assert sheet.convert("RGB").crop((x, y, x + width, y + height)).getcolors() == [(width * height, (255, 255, 255))]
+        assert sheet.getpixel(layout["positions"][0]) != (255, 255, 255)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_print_sheets_pdf(tmp_path, jobs):
+    """
+    Test that one full page PDF page is streamed per sheet, and that the output replaces an existing PDF.
+    """
+    rows = [make_card_row(f"Card {i}", f"S{i}") for i in range(10)]
+    csv_file = write_card_list(tmp_path / "cards.csv", rows)
+    output_file = tmp_path / "sheets.pdf"
+    output_file.write_bytes(b"previous pdf")
+    sheets, _ = render_print_sheets(csv_file, str(output_file), dpi=50, jobs=jobs)
+    assert sheets == 2
+
+    objects = read_pdf_objects(output_file.read_bytes())
+    pages = get_pages(objects)
+    assert len(pages) == 2 and len(get_images(objects)) == 2
+    assert all(b"/MediaBox [0 0 612 792]" in page for page in pages)
+    layout = get_sheet_layout("letter", 50)
+    width, height = layout["page_pixels"]
+    assert all(f"/Width {width} /Height {height}".encode() in image for image in get_images(objects))
+    assert any(b"q 612 0 0 792 0 0 cm" in body for body in objects.values())
+    assert sorted(os.listdir(tmp_path)) == ["cards.csv", "sheets.pdf"]
+
+
+def test_render_print_sheets_pdf_removes_temp_file_on_error(tmp_path, monkeypatch):
+    """
+    Test that the partial PDF is removed, and an existing PDF kept, when rendering fails part way.
+    """
+    csv_file = write_card_list(tmp_path / "cards.csv", [make_card_row(f"Card {i}", f"S{i}") for i in range(10)])
+    output_file = tmp_path / "sheets.pdf"
+    output_file.write_bytes(b"previous pdf")
+
+    encode_sheet = render_print_sheets_module.encode_sheet
+    encoded = []
+
+    def fail_on_second_sheet(cards, layout, image_format):
+        if encoded:
+            raise OSError("disk full")
+        encoded.append(cards)
+        return encode_sheet(cards, layout, image_format)
+
+    monkeypatch.setattr(render_print_sheets_module, "encode_sheet", fail_on_second_sheet)
+    with pytest.raises(OSError):
+        render_print_sheets(csv_file, str(output_file), dpi=50)
+    assert sorted(os.listdir(tmp_path)) == ["cards.csv", "sheets.pdf"]
+    assert output_file.read_bytes() == b"previous pdf"
+
+    empty_csv = write_card_list(tmp_path / "empty.csv", [])
+    assert render_print_sheets(empty_csv, str(tmp_path / "none.pdf"), dpi=50) == (0, [])
+    assert not (tmp_path / "none.pdf").exists()
@@ -0,0 +1,240 @@
+#!/bin/python3
+import os
+import sys
+import csv
+import tempfile
+import pytest
+
+sys.path.append('../')
+
+from ttcg_tools import get_card_data_from_row
+from ttcg_tools import get_number_id
+from serial_engine import get_serial_prefix
+from serial_engine import get_serial_prefixes
+from serial_engine import assign_pad_bits
+from serial_engine import regenerate_serials
+from serial_engine import decode_serial
+from serial_engine import get_stat_range
+from serial_engine import SerialIndex
+
+from ttcg_constants import CHARACTERS
+from ttcg_constants import DEFAULT_CARD_LIST_FILE
+
+
+def load_card_list():
+    """
+    Load the card data of every card in the repository card list.
+    """
+    with open(os.path.join('..', DEFAULT_CARD_LIST_FILE), 'r', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=';')
+        next(reader)
+        return [get_card_data_from_row(row) for row in reader]
+
+
+@pytest.fixture
+def unit_card():
+    return {
+        'name': 'Baby Fire Tethyr',
+        'type': 'Fire',
+        'subtype': 'Aquatic',
+        'level': '1',
+        'attack': '0',
+        'defense': '0',
+        'effect1': 'Until your next turn, all aquatic cards you control become rank 2.',
+        'effect1_style': 'echo',
+        'effect2': 'You can rank up this card using a water card.',
+        'effect2_style': 'passive',
+        'rarity': '0',
+        'serial': 'B104dG00U8Y500'
+    }
+
+
+def test_get_serial_prefix_unit(unit_card):
+    """
+    Test that the prefix matches the saved serial number without its pad bit.
+    """
+    assert get_serial_prefix(unit_card) == 'B104dG00U8Y50'
+
+
+def test_get_serial_prefix_accepts_int_level(unit_card):
+    """
+    Test that the level and stats may be given as numbers, as the UI does.
+    """
+    unit_card['level'] = 1
+    assert get_serial_prefix(unit_card) == 'B104dG00U8Y50'
+
+
+def test_get_serial_prefix_spell(unit_card):
+    """
+    Test that spell stats are measured relative to +/- level*10.
+    """
+    unit_card['attack'] = '+10'
+    unit_card['defense'] = '-0'
+    prefix = get_serial_prefix(unit_card)
+    assert prefix[6:8] == get_number_id(20, 1, per_level_val=20) + get_number_id(10, 1, per_level_val=20)
+
+
+def test_get_serial_prefix_no_effects(unit_card):
+    """
+    Test that empty effects are encoded as '0'.
+    """
+    unit_card['effect1'] = ''
+    unit_card['effect2'] = ''
+    assert get_serial_prefix(unit_card) == 'B104dG0008050'
+
+
+def test_get_serial_prefixes_matches_card_list():
+    """
+    Test that the card list serials are rebuilt exactly (other than the pad bit).
+    """
+    cards = load_card_list()
+    prefixes = get_serial_prefixes(cards)
+    matching = [card for card, prefix in zip(cards, prefixes) if card['serial'][:-1] == prefix]
+    # Fireback Salamander was saved before its subtype was changed.
+    assert len(matching) >= len(cards) - 1
+
+
+def test_get_serial_prefixes_process_pool():
+    """
+    Test that a process pool builds the same prefixes in the same order.
+    """
+    cards = load_card_list()
+    assert get_serial_prefixes(cards, jobs=2) == get_serial_prefixes(cards)
+
+
+def test_assign_pad_bits_new_cards():
+    """
+    Test that cards sharing a prefix get consecutive pad bits.
+    """
+    assert assign_pad_bits(['A1', 'A1', 'B2']) == ['A10', 'A11', 'B20']
+
+
+def test_assign_pad_bits_keeps_current_serials():
+    """
+    Test that cards keep a serial that still matches, and new cards avoid it.
+    """
+    serials = assign_pad_bits(['A1', 'A1'], current_serials=['', 'A10'])
+    assert serials == ['A11', 'A10']
+
+
+def test_assign_pad_bits_duplicate_current_serials():
+    """
+    Test that only the first card with a duplicated serial keeps it.
+    """
+    serials = assign_pad_bits(['A1', 'A1'], current_serials=['A10', 'A10'])
+    assert serials == ['A10', 'A11']
+
+
+def test_assign_pad_bits_reserved_serials():
+    """
+    Test that reserved serials are never assigned.
+    """
+    serials = assign_pad_bits(['A1', 'A1'], reserved_serials={'A10', 'A12'})
+    assert serials == ['A11', 'A13']
+
+
+def test_assign_pad_bits_exhausted():
+    """
+    Test that running out of pad bits raises an error.
+    """
+    with pytest.raises(ValueError):
+        assign_pad_bits(['A1'] * (len(CHARACTERS) + 1))
+
+
+def test_regenerate_serials_reports_changes(unit_card):
+    """
+    Test that only changed serials are reported, and retired serials are skipped.
+    """
+    changed_card = dict(unit_card, level='2', serial='B104dG00U8Y501')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        serial_list = os.path.join(tmp_dir, 'serials.txt')
+        with open(serial_list, 'w') as f:
+            f.write('B104dG00U8Y500\nB204dG00U8Y500\n')
+        serials, changes = regenerate_serials([unit_card, changed_card], serial_list)
+    assert serials[0] == 'B104dG00U8Y500'
+    assert serials[1] == 'B204dG00U8Y501'
+    assert changes == [(1, 'Baby Fire Tethyr', 'B104dG00U8Y501', 'B204dG00U8Y501')]
+
+
+def test_decode_serial_unit():
+    """
+    Test decoding every field of a unit serial number.
+    """
+    decoded = decode_serial('B104dG00U8Y500')
+    assert decoded['name_initial'] == 'B'
+    assert decoded['level'] == 1
+    assert decoded['types'] == ('aquatic', 'fire')
+    assert decoded['type'] == 'fire'
+    assert decoded['subtypes'] == ('aquatic',)
+    assert not decoded['is_spell']
+    assert decoded['attack_range'][0] == 0
+    assert decoded['effect1_initial'] == 'U'
+    assert decoded['effect1_style'] == 'echo'
+    assert decoded['effect2_initial'] == 'Y'
+    assert decoded['effect2_style'] == 'passive'
+    assert decoded['rarity'] == '0'
+    assert decoded['pad_bit'] == '0'
+    assert decoded['prefix'] == 'B104dG00U8Y50'
+
+
+def test_decode_serial_matches_card_list():
+    """
+    Test that decoding every card list serial recovers the card attributes it encodes.
+    """
+    for card in load_card_list():
+        decoded = decode_serial(card['serial'])
+        assert decoded['name_initial'] == card['name'][0].capitalize()
+        assert decoded['level'] == int(card['level'])
+        assert decoded['type'] == card['type'].lower()
+        assert decoded['effect1_initial'] == card['effect1'][0]
+        minimum, maximum = decoded['attack_range']
+        assert minimum <= abs(int(card['attack'])) and (maximum is None or abs(int(card['attack'])) <= maximum)
+
+
+def test_decode_serial_invalid():
+    """
+    Test that malformed serial numbers raise an error.
+    """
+    with pytest.raises(ValueError):
+        decode_serial('B104')
+    with pytest.raises(ValueError):
+        decode_serial('BX04dG00U8Y500')
+
+
+def test_get_stat_range_top_segment_unbounded():
+    """
+    Test that the last stat identifier has no maximum, as larger values are clamped into it.
+    """
+    assert get_stat_range(CHARACTERS[-1], 1, False)[1] is None
+    assert get_stat_range(CHARACTERS[0], 1, False) == (0, 500 / len(CHARACTERS))
+
+
+def test_serial_index_query():
+    """
+    Test querying the serial index by prefix and fields.
+    """
+    index = SerialIndex.from_card_list(os.path.join('..', DEFAULT_CARD_LIST_FILE))
+    assert 'B104dG00U8Y500' in index
+    assert index.get_card('B104dG00U8Y500')['name'] == 'Baby Fire Tethyr'
+    assert index.query('S2') == index.with_prefix('S2')
+    assert all(serial.startswith('S2') for serial in index.query('S2'))
+
+    matches = index.query(level=2, types=['Fire', 'Aquatic'])
+    expected = sorted(card['serial'] for card in index.cards.values()
+                      if card['level'] == '2' and card['type'] == 'Fire' and card['subtype'] == 'Aquatic')
+    assert matches and matches == expected
+
+    passive = index.query(has_types=['Aquatic'], effect2_style='passive')
+    assert passive and all(index.get_card(serial)['effect2_style'] == 'passive' for serial in passive)
+    assert all('Aquatic' in index.get_card(serial)['subtype'] for serial in passive)
+
+    assert index.query(type='spell') == sorted(card['serial'] for card in index.cards.values()
+                                               if card['type'] == 'Spell')
+
+
+def test_serial_index_query_unknown_field():
+    """
+    Test that querying an unknown field raises an error.
+    """
+    with pytest.raises(ValueError):
+        SerialIndex(['B104dG00U8Y500']).query(colour='red')
@@ -1,7 +1,11 @@
 #!/bin/python3
 import os
 import sys
+import math
+import json
+import socket
 import tempfile
+import subprocess
 import pytest
 import argparse
 from unittest.mock import mock_open, patch
@@ -22,11 +26,25 @@ from ttcg_tools import text_in_placeholder_string
 from ttcg_tools import deduce_effect_style_from_effect_text
 from ttcg_tools import has_at_most_one_from_source
 from ttcg_tools import get_sequence_combinations
+from ttcg_tools import iter_sequence_combinations
 from ttcg_tools import get_combination_id
+from ttcg_tools import get_combination_from_id
+from ttcg_tools import get_sequence_rank
+from ttcg_tools import get_sequence_from_rank
+from ttcg_tools import baseN_to_int
 #from ttcg_tools import get_number_id
 from ttcg_tools import get_index_in_baseN
 from ttcg_tools import sn_in_list
 from ttcg_tools import save_sn_to_list
+from ttcg_tools import SerialRegistry
+from ttcg_tools import get_serial_registry
+from ttcg_tools import append_csv_row
+from ttcg_tools import card_list_has_serial
+from ttcg_tools import journal_card_begin
+from ttcg_tools import journal_card_commit
+from ttcg_tools import recover_card_journal
+from ttcg_tools import build_alias_table
+from ttcg_tools import draw_from_alias_table
 
 
 def mock_get_sequence_combinations(item_list, check_types=True, max_output_size=6):
@@ -52,21 +70,19 @@ def test_get_combination_id_basic():
     """
     Test basic ID generation.
     """
-    with patch("ttcg_tools.get_sequence_combinations", side_effect=mock_get_sequence_combinations):
-        with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):  # Base-16
-            with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False):
-                result = get_combination_id("a,b", ["a", "b", "c"], num_digits=4)
-                print(f"Test result: {result}")
+    with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):  # Base-16
+        with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False):
+            result = get_combination_id("a,b", ["a", "b", "c"], num_digits=4, check_types=False)
+            print(f"Test result: {result}")
     assert result == "0001"  # Index 1: ["a", "b"] in [["a"], ["a", "b"], ...]
 
 def test_get_combination_id_single_item():
     """
     Test ID for a single item.
     """
-    with patch("ttcg_tools.get_sequence_combinations", side_effect=mock_get_sequence_combinations):
-        with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):
-            with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False):
-                result = get_combination_id("b", ["a", "b", "c"], num_digits=4)
+    with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):
+        with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False):
+            result = get_combination_id("b", ["a", "b", "c"], num_digits=4, check_types=False)
     assert result == "0004"  # Index 4: [['a'], ['a', 'b'], ['a', 'b', 'c'], ['a', 'c'], ...]
 
 
@@ -77,7 +93,7 @@ def test_get_combination_id_print_combos():
     with patch("ttcg_tools.get_sequence_combinations", side_effect=mock_get_sequence_combinations):
         with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):
             with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False) as mock_print_sequences:
-                result = get_combination_id("a,c", ["a", "b", "c"], num_digits=4, print_combos=True)
+                result = get_combination_id("a,c", ["a", "b", "c"], num_digits=4, print_combos=True, check_types=False)
                 assert result == "0003"  # Index 3: [['a'], ['a', 'b'], ['a', 'b', 'c'], ['a', 'c'], ...]
 
 
@@ -85,10 +101,9 @@ def test_get_combination_id_case_insensitive():
     """
     Test case-insensitive matching.
     """
-    with patch("ttcg_tools.get_sequence_combinations", side_effect=mock_get_sequence_combinations):
-        with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):
-            with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False):
-                result = get_combination_id("A,B", ["a", "b", "c"], num_digits=4)
+    with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):
+        with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False):
+            result = get_combination_id("A,B", ["a", "b", "c"], num_digits=4, check_types=False)
     assert result == "0001"  # Index 1: ["a", "b"]
 
 
@@ -96,13 +111,79 @@ def test_get_combination_id_zero_index():
     """
     Test index 0 with padding.
     """
-    with patch("ttcg_tools.get_sequence_combinations", return_value=[["x"], ["y"]]):
-        with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):
-            with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False):
-                result = get_combination_id("x", ["x", "y"], num_digits=4)
+    with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):
+        with patch("ttcg_tools.PRINT_ALL_SEQUENCES", False):
+            result = get_combination_id("x", ["x", "y"], num_digits=4, check_types=False)
     assert result == "0000"  # Index 0
 
 
+def test_get_combination_id_known_serials():
+    """
+    Test IDs for the real type list match the IDs used in existing serial numbers.
+    """
+    assert get_combination_id("Fire, Aquatic", ttcg_constants.ALL_TYPES_LIST_LOWER) == "04dG"
+    assert get_combination_id("Fire, Dragon, Fairy", ttcg_constants.ALL_TYPES_LIST_LOWER) == "0AC0"
+
+
+def test_get_combination_id_invalid_combination():
+    """
+    Test that combinations without exactly one type are rejected.
+    """
+    with pytest.raises(ValueError):
+        get_combination_id("Fire, Water", ttcg_constants.ALL_TYPES_LIST_LOWER)
+    with pytest.raises(ValueError):
+        get_combination_id("Dragon", ttcg_constants.ALL_TYPES_LIST_LOWER)
+
+
+def test_get_combination_from_id_round_trip():
+    """
+    Test decoding a combination ID returns the original items.
+    """
+    combination_id = get_combination_id("Fire, Dragon, Fairy", ttcg_constants.ALL_TYPES_LIST_LOWER)
+    assert get_combination_from_id(combination_id, ttcg_constants.ALL_TYPES_LIST_LOWER) == ["dragon", "fairy", "fire"]
+
+
+@pytest.mark.parametrize("check_types", [False, True])
+@pytest.mark.parametrize("max_output_size", [1, 2, 3, 4])
+def test_get_sequence_rank_matches_combinations(check_types, max_output_size):
+    """
+    Test that ranking and unranking agree with the order of get_sequence_combinations.
+    """
+    items = ["a", "b", "c", "d", "e"]
+    with patch("ttcg_tools.TYPE_LIST_LOWER", ["b", "t1", "zz"]):
+        with patch.dict("ttcg_tools.ALL_SEQUENCE_BUFFER", clear=True):
+            with patch("ttcg_tools.output_text"):
+                combinations = get_sequence_combinations(items, check_types, max_output_size)
+        for index, combination in enumerate(combinations):
+            assert get_sequence_rank(combination, items, check_types, max_output_size) == index
+            assert get_sequence_from_rank(index, items, check_types, max_output_size) == combination
+        with pytest.raises(ValueError):
+            get_sequence_from_rank(len(combinations), items, check_types, max_output_size)
+
+
+def test_get_sequence_rank_all_types_size():
+    """
+    Test the last combination of the real type list ranks at the end of the combinations.
+    """
+    # 9 types, each with up to five of the 14 subtypes.
+    total = 9 * sum(math.comb(14, a) for a in range(6))
+    last = get_sequence_from_rank(total - 1, ttcg_constants.ALL_TYPES_LIST_LOWER)
+    assert get_sequence_rank(last, ttcg_constants.ALL_TYPES_LIST_LOWER) == total - 1
+    with pytest.raises(ValueError):
+        get_sequence_from_rank(total, ttcg_constants.ALL_TYPES_LIST_LOWER)
+
+
+def test_baseN_to_int():
+    """
+    Test decoding base-N strings.
+    """
+    with patch("ttcg_tools.CHARACTERS", "0123456789ABCDEF"):
+        assert baseN_to_int("0000", 16) == 0
+        assert baseN_to_int("00FF", 16) == 255
+        with pytest.raises(ValueError):
+            baseN_to_int("0G", 16)
+
+
 def test_get_sequence_combinations_no_check_types():
     """
     Test combinations without type checking.
@@ -140,8 +221,7 @@ def test_get_sequence_combinations_max_output_size():
     result = get_sequence_combinations(["a", "b", "c"], check_types=False, max_output_size=2)
     expected = sorted([
         ["a"], ["b"], ["c"],
-        ["a", "b"], ["a", "c"], ["b", "c"],
-        ["a", "b", "c"]  # Reflects actual behavior
+        ["a", "b"], ["a", "c"], ["b", "c"]
     ])
     assert result == expected
 
@@ -158,6 +238,18 @@ def test_get_sequence_combinations_buffer_hit():
         mock_output.assert_not_called()
 
 
+def test_get_sequence_combinations_buffer_keyed_by_options():
+    """
+    Test that the buffer does not mix up outputs for different options on the same items.
+    """
+    input_list = ["p", "q", "r"]
+    with patch.dict("ttcg_tools.ALL_SEQUENCE_BUFFER", clear=True):
+        large = get_sequence_combinations(input_list, check_types=False, max_output_size=3)
+        small = get_sequence_combinations(input_list, check_types=False, max_output_size=1)
+    assert ["p", "q", "r"] in large
+    assert small == [["p"], ["q"], ["r"]]
+
+
 def test_get_sequence_combinations_empty_list():
     """
     Test handling an empty input list.
@@ -199,6 +291,26 @@ def test_get_sequence_combinations_type_check_restriction():
     assert not any(len([x for x in combo if x in mock_type_list]) > 1 for combo in result)
 
 
+def test_iter_sequence_combinations_streams_in_order():
+    """
+    Test that combinations are streamed lazily in the same order as the original list-building method.
+    """
+    items = ["e", "d", "c", "b", "a"]
+    stream = iter_sequence_combinations(items, check_types=False, max_output_size=3)
+    assert next(stream) == ["a"]
+    assert next(stream) == ["a", "b"]
+    assert [["a"], ["a", "b"]] + list(stream) == mock_get_sequence_combinations(items, max_output_size=3)
+
+
+def test_iter_sequence_combinations_all_types_size():
+    """
+    Test the number of combinations generated for the real type list.
+    """
+    combinations = list(iter_sequence_combinations(ttcg_constants.ALL_TYPES_LIST_LOWER))
+    assert len(combinations) == 9 * sum(math.comb(14, a) for a in range(6))
+    assert combinations == sorted(combinations)
+
+
 # Mock data for VALID_OVERLAY_STYLES
 VALID_OVERLAY_STYLES = ['fire', 'water', 'earth']
 
@@ -1099,3 +1211,239 @@ def test_save_sn_to_list_special_characters():
         result = save_sn_to_list("SN#@$%^", "test_file.txt")
         assert result == True
         mock_file().write.assert_called_once_with("SN#@$%^\n")
+
+
+def test_serial_registry_loads_once():
+    """
+    Test that the registry indexes the file once and answers lookups from memory.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "serials.txt")
+        with open(filename, "w") as f:
+            f.write("ABC0\nABC1\n\nXYZ0\n")
+        registry = SerialRegistry(filename)
+        with patch("builtins.open", side_effect=AssertionError("file re-read")):
+            assert "ABC1" in registry
+            assert " XYZ0 " in registry
+            assert "ABC2" not in registry
+            assert registry.next_pad_bit("ABC") == "2"
+            assert registry.next_pad_bit("XYZ") == "1"
+            assert registry.next_pad_bit("NEW") == "0"
+        assert len(registry) == 3
+
+
+def test_serial_registry_add():
+    """
+    Test that added serial numbers are appended to the file and indexed.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "serials.txt")
+        registry = SerialRegistry(filename)
+        assert registry.next_pad_bit("ABC") == "0"
+        assert registry.add("ABC0")
+        assert registry.add("ABC0")  # Already saved, not appended twice.
+        assert registry.next_pad_bit("ABC") == "1"
+        with open(filename) as f:
+            assert f.read() == "ABC0\n"
+
+
+def test_serial_registry_detects_external_edits():
+    """
+    Test that the registry reloads when the file is changed by something else.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "serials.txt")
+        with open(filename, "w") as f:
+            f.write("ABC0\n")
+        registry = SerialRegistry(filename)
+        with open(filename, "a") as f:
+            f.write("ABC1\n")
+        assert "ABC1" in registry
+        assert registry.next_pad_bit("ABC") == "2"
+
+
+def test_serial_registry_pad_bits_exhausted():
+    """
+    Test that an error is raised when every pad bit is used.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "serials.txt")
+        with open(filename, "w") as f:
+            f.writelines(f"ABC{c}\n" for c in ttcg_constants.CHARACTERS)
+        registry = SerialRegistry(filename)
+        with pytest.raises(ValueError):
+            registry.next_pad_bit("ABC")
+
+
+def test_get_serial_registry_shared():
+    """
+    Test that the same registry is returned for the same file.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "serials.txt")
+        assert get_serial_registry(filename) is get_serial_registry(filename)
+
+
+def reserve_serials_in_process(filename, count, queue):
+    """
+    Helper for test_serial_registry_reserve_concurrent: reserve serials from a separate process.
+    """
+    registry = SerialRegistry(filename)
+    queue.put([registry.reserve("ABC") for _ in range(count)])
+
+
+def test_serial_registry_reserve_concurrent():
+    """
+    Test that processes reserving the same prefix at once never get the same serial number.
+    """
+    import multiprocessing
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "serials.txt")
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=reserve_serials_in_process, args=(filename, 10, queue))
+                     for _ in range(3)]
+        for process in processes:
+            process.start()
+        reserved = [serial for _ in processes for serial in queue.get(timeout=30)]
+        for process in processes:
+            process.join()
+        assert len(reserved) == len(set(reserved)) == 30
+        with open(filename) as f:
+            assert sorted(line.strip() for line in f) == sorted(reserved)
+
+
+def test_append_csv_row_writes_header_once():
+    """
+    Test that the header is only written to a new file.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, "cards.csv")
+        assert append_csv_row(filename, ["a", "b"], ["H1", "H2"])
+        assert append_csv_row(filename, ["c", "d"], ["H1", "H2"])
+        with open(filename) as f:
+            assert f.read().splitlines() == ["H1;H2", "a;b", "c;d"]
+
+
+def test_recover_card_journal_finishes_uncommitted_saves():
+    """
+    Test that a save interrupted after journaling is completed on recovery, and committed saves are not repeated.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        journal = os.path.join(temp_dir, "journal.log")
+        serials = os.path.join(temp_dir, "serials.txt")
+        cards = os.path.join(temp_dir, "cards.csv")
+        header = ttcg_constants.CARD_LIST_HEADER
+        done_row = ["Done"] + [""] * 8 + ["D0"] + [""] * 4
+        lost_row = ["Lost"] + [""] * 8 + ["L0"] + [""] * 4
+        
+        append_csv_row(cards, done_row, header)
+        journal_card_begin(journal, "D0", done_row, cards)
+        journal_card_commit(journal, "D0")
+        journal_card_begin(journal, "L0", lost_row, cards)  # Crash before the row was written.
+        with open(journal, "a") as f:
+            f.write('{"op": "beg')  # Torn write.
+        
+        assert recover_card_journal(journal, serials) == ["L0"]
+        assert card_list_has_serial(cards, "D0")
+        assert card_list_has_serial(cards, "L0")
+        assert "L0" in SerialRegistry(serials)
+        with open(journal) as f:
+            assert f.read() == ""
+        assert recover_card_journal(journal, serials) == []
+        with open(cards) as f:
+            assert len(f.read().splitlines()) == 3
+
+
+def test_recover_card_journal_skips_running_saves():
+    """
+    Test that saves of sessions that are still running (or on another machine) are neither replayed nor
+    cleared, while saves of finished sessions are recovered.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        journal = os.path.join(temp_dir, "journal.log")
+        serials = os.path.join(temp_dir, "serials.txt")
+        cards = os.path.join(temp_dir, "cards.csv")
+        finished_pid = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished_pid.wait()
+        host = socket.gethostname()
+        entries = {
+            "R0": {"pid": os.getppid(), "host": host},           # Another session, still saving.
+            "H0": {"pid": finished_pid.pid, "host": "elsewhere"},  # Another machine.
+            "F0": {"pid": finished_pid.pid, "host": host},         # A session that died mid-save.
+            "O0": {},                                             # Journaled without a session.
+        }
+        with open(journal, "w") as f:
+            for serial, session in entries.items():
+                row = [serial] + [""] * 8 + [serial] + [""] * 4
+                entry = dict(session, op="begin", serial=serial, row=row, card_list=cards)
+                f.write(json.dumps(entry) + "\n")
+        
+        assert recover_card_journal(journal, serials) == ["F0", "O0"]
+        assert not card_list_has_serial(cards, "R0")
+        assert not card_list_has_serial(cards, "H0")
+        with open(journal) as f:
+            assert [json.loads(line)["serial"] for line in f] == ["R0", "H0"]
+        
+        # Once the running save commits, the journal is cleared of it.
+        journal_card_commit(journal, "R0")
+        assert recover_card_journal(journal, serials) == []
+        with open(journal) as f:
+            assert [json.loads(line)["serial"] for line in f] == ["H0"]
+
+
+def test_build_alias_table_empty():
+    """
+    Test that an empty weight list produces an empty table.
+    """
+    assert build_alias_table([]) == ([], [])
+
+
+def test_build_alias_table_negative_weight():
+    """
+    Test that negative weights are rejected.
+    """
+    with pytest.raises(ValueError):
+        build_alias_table([1, -1])
+
+
+def test_build_alias_table_all_zero_weights():
+    """
+    Test that all-zero weights fall back to a uniform table.
+    """
+    probabilities, aliases = build_alias_table([0, 0, 0])
+    assert probabilities == [1.0, 1.0, 1.0]
+    assert aliases == [0, 1, 2]
+
+
+def test_build_alias_table_preserves_distribution():
+    """
+    Test that the table encodes exactly the normalized input weights.
+    """
+    weights = [1, 2, 3, 4]
+    probabilities, aliases = build_alias_table(weights)
+    n = len(weights)
+    recovered = [0.0] * n
+    for i in range(n):
+        recovered[i] += probabilities[i] / n
+        recovered[aliases[i]] += (1 - probabilities[i]) / n
+    for w, r in zip(weights, recovered):
+        assert r == pytest.approx(w / sum(weights))
+
+
+def test_draw_from_alias_table_zero_weight_never_drawn():
+    """
+    Test that items with zero weight are never drawn.
+    """
+    import random
+    rng = random.Random(1234)
+    table = build_alias_table([0, 5, 0, 1])
+    draws = {draw_from_alias_table(table, rng) for _ in range(1000)}
+    assert draws == {1, 3}
+
+
+def test_draw_from_alias_table_empty():
+    """
+    Test that drawing from an empty table raises an error.
+    """
+    with pytest.raises(ValueError):
+        draw_from_alias_table(([], []))
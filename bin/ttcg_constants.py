@@ -11,12 +11,50 @@ ALL_TYPES_LIST_LOWER = [l.lower() for l in ALL_TYPES_LIST]
 VALID_OVERLAY_POSITIONS = ["top", "bottom"]
 VALID_OVERLAY_STYLES = [None, "continuous", "counter", "primed", "latent", "passive", "equip", "overload", "echo", "surge"]
 
+# Valid signals for weighting randomly generated effects (see generate_random_effects.get_weighted_random_effect).
+VALID_EFFECT_WEIGHT_SIGNALS = ["template", "style"]
+
 # Valid translucent values for card art.
 VALID_TRANSLUCENT_VALUES = [30, 50, 60, 75, 100]
 
 # Base card values
 DEFAULT_CARD_WIDTH = 750
 DEFAULT_CARD_HEIGHT = 1050
+VALID_CARD_LEVELS = [1, 2, 3, 4, 5]
+
+# The maximum number of resized card template images (see create_card.get_template_asset) kept in memory.
+DEFAULT_TEMPLATE_ASSET_CACHE_SIZE = 96
+
+# The maximum number of precomposed card frames (see create_card.get_frame_layer) kept in memory.
+DEFAULT_FRAME_LAYER_CACHE_SIZE = 32
+
+# The maximum number of fitted text box font sizes (see create_card.get_fitting_font_size) kept in memory.
+DEFAULT_FONT_FIT_CACHE_SIZE = 4096
+
+# The maximum number of measured word widths (see create_card.get_text_length) kept in memory.
+DEFAULT_TEXT_LENGTH_CACHE_SIZE = 65536
+
+# The maximum number of decoded and resized card art images (see create_card.get_card_art) kept in memory.
+DEFAULT_ART_CACHE_SIZE = 32
+
+# The number of cards waiting between each stage of the render pipeline (see create_card.render_cards_pipelined),
+# and the number of threads encoding and writing cards.
+DEFAULT_RENDER_QUEUE_SIZE = 4
+DEFAULT_RENDER_WRITER_THREADS = 2
+
+# Output profiles for saved card images (see create_card.save_card_image). Each one gives the Pillow image
+# format, file extension and Image.save options. "png" is Pillow's default PNG encoding, "fast" trades a
+# little file size for a much quicker PNG encode, "small" is lossless WebP and "print" is a flattened RGB JPEG.
+CARD_OUTPUT_PROFILES = {
+    "png": {"format": "PNG", "extension": "png", "save_options": {}},
+    "fast": {"format": "PNG", "extension": "png", "save_options": {"compress_level": 1}},
+    "small": {"format": "WEBP", "extension": "webp", "save_options": {"lossless": True}},
+    "print": {"format": "JPEG", "extension": "jpg", "save_options": {"quality": 95, "subsampling": 0}}
+}
+DEFAULT_CARD_OUTPUT_PROFILE = "png"
+
+# The resolution stored in saved card images (750x1050 pixels is 2.5" x 3.5" at 300 DPI).
+CARD_OUTPUT_DPI = 300
 
 # Card List values.
 CARD_LIST_HEADER = ["NAME", "TYPE", "SUBTYPES", "LEVEL", "IMAGE", "ATTACK", "DEFENSE", "EFFECT1", "EFFECT2", "SERIAL", "RARITY", "TRANSPARENCY", "EFFECT1_STYLE", "EFFECT2_STYLE"]
@@ -34,9 +72,14 @@ DEFAULT_PHRASES_TO_REPLACE_FILE = "placeholders/phrase_replacements.txt"
 EFFECT_STYLE_TEXT_FOLDER = "effect_style_text"
 DEFAULT_CARD_ELEMENTS_FOLDER = "../images/card pngs"
 DEFAULT_SERIAL_LIST_FILE = "card_list/serials.txt"
+DEFAULT_CARD_JOURNAL_FILE = "card_list/journal.log"
 DEFAULT_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
 DEFAULT_GENERATED_CARDS_FOLDER = "../images/generated_cards"
 DEFAULT_GENERATED_CARDS_PDF = "../images/generated_cards/output.pdf"
+DEFAULT_RENDER_MANIFEST_FILE = "render_manifest.json"
+DEFAULT_REJECTED_CARDS_FILE = "rejected_cards.csv"
+DEFAULT_CACHE_FOLDER = "cache"
+DEFAULT_ART_CACHE_FOLDER = "cache/art"
 
 # Characters to be used in serial number generation. These are all values that show up nicely without 
 # having to worry about what letters are what or the font effecting the serial number display size.
@@ -2,18 +2,33 @@ import os
 import sys
 import re
 import itertools
+import json
+import math
+import random
+import contextlib
+import csv
+import io
+import socket
 from tqdm import tqdm
 
+# Advisory file locking is only available on Unix-like systems.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 # Import some constants from the ttxg_constants file.
 from ttcg_constants import VALID_OVERLAY_STYLES
 from ttcg_constants import DEFAULT_PLACEHOLDERS_FOLDER
 from ttcg_constants import EFFECT_STYLE_TEXT_FOLDER
 from ttcg_constants import TYPE_LIST_LOWER
 from ttcg_constants import CHARACTERS
+from ttcg_constants import CARD_LIST_HEADER
 
 
 # Global variables used by these methods.
 ALL_SEQUENCE_BUFFER = {}
+SERIAL_REGISTRY_BUFFER = {}
 PRINT_ALL_SEQUENCES = False
 
 
@@ -420,6 +435,70 @@ def has_at_most_one_from_source(source_list, target_list, num_of_matches=1):
     return matches == num_of_matches
 
 
+def iter_sequence_combinations(current_list, check_types=True, max_output_size=6):
+    """
+    Stream all unique sorted combinations of items from the given list in sorted (lexicographic) order.
+    
+    Combinations are built depth first by extending a prefix with every item that sorts after its last
+    item, so a prefix is always yielded before its extensions and the output never has to be sorted.
+    
+    Args:
+        current_list (list): List of items to generate combinations from.
+        check_types (bool): This check will enable a check to make sure only one type from 
+            TYPE_LIST_LOWER exists in the output. This is used for SN generation and other places.
+        max_output_size (int): The maximum size for the output items to be.
+    
+    Yields:
+        list: The next sorted combination.
+    """
+    items, is_type = get_sequence_universe(current_list, check_types)
+    
+    # Number of type items at or after each index, used to stop early when no type can be added.
+    types_from = [0] * (len(items) + 1)
+    for i in range(len(items) - 1, -1, -1):
+        types_from[i] = types_from[i + 1] + is_type[i]
+    
+    prefix = []
+    
+    def extend(num_types, start):
+        if prefix and (not check_types or num_types == 1):
+            yield list(prefix)
+        if prefix and len(prefix) >= max_output_size:
+            return
+        for index in range(start, len(items)):
+            if check_types:
+                if num_types == 0 and types_from[index] == 0:
+                    break  # No type left to complete this prefix with.
+                if num_types + is_type[index] > 1:
+                    continue  # There can only ever be one item from TYPE_LIST_LOWER in the output.
+            prefix.append(items[index])
+            yield from extend(num_types + is_type[index], index + 1)
+            prefix.pop()
+    
+    yield from extend(0, 0)
+
+
+def get_sequence_buffer_key(current_list, check_types=True, max_output_size=6):
+    """
+    Get the key used to buffer the output of get_sequence_combinations.
+    
+    The key holds everything the output depends on: the normalized item list, check_types,
+    max_output_size and TYPE_LIST_LOWER.
+    
+    Args:
+        current_list (list): List of items to generate combinations from.
+        check_types (bool): Same as get_sequence_combinations.
+        max_output_size (int): Same as get_sequence_combinations.
+    
+    Returns:
+        tuple: A key identifying the combinations.
+    """
+    return (tuple(sorted(set(cl.lower().strip() for cl in current_list))), 
+            bool(check_types), 
+            max_output_size, 
+            tuple(TYPE_LIST_LOWER))
+
+
 def get_sequence_combinations(current_list, check_types=True, max_output_size=6):
     """
     Generate all unique sorted combinations of items from the given list.
@@ -437,55 +516,180 @@ def get_sequence_combinations(current_list, check_types=True, max_output_size=6)
     current_list = sorted(set(cl.lower().strip() for cl in current_list)) 
     
     # check if the data is already in the buffer.
-    item_tuple = tuple(current_list)
-    if item_tuple in ALL_SEQUENCE_BUFFER:
-        return ALL_SEQUENCE_BUFFER[item_tuple]
-    
-    output_text("Calling get_sequence_combinations... This may take some time!", "warning")
+    buffer_key = get_sequence_buffer_key(current_list, check_types, max_output_size)
+    if buffer_key in ALL_SEQUENCE_BUFFER:
+        return ALL_SEQUENCE_BUFFER[buffer_key]
     
-    # Create the initial list to parse. if check_types is on, we assume that the new_list will
-    # only contain individual lists with one of the main TYPES.
-    list_to_parse = current_list
-    if check_types:
-        new_list = [[c] for c in TYPE_LIST_LOWER]
-    else:
-        new_list = [[c] for c in current_list]
-    
-    # Loop over the data and generate combinations.
-    while len(list_to_parse) > 0:
-        for i, item in enumerate(list_to_parse):
-            additions_list = []
-            for i2, item2 in enumerate(new_list):
-                if len(item2) >= max_output_size:
-                    continue
-                if item not in item2:
-                    new_item = sorted([item] + [x for x in item2])
-                    if new_item not in new_list:
-                        if check_types:
-                            # Check against types list: there can only ever be one item from 
-                            # TYPE_LIST_LOWER in the output.
-                            if has_at_most_one_from_source(TYPE_LIST_LOWER, new_item):
-                                additions_list.append(new_item)
-                        else:
-                            additions_list.append(new_item)
-            new_list = new_list + additions_list
-            list_to_parse = list_to_parse[1:]
-            
-    # Sort and return the output as well as adding it to the buffer.
-    sorted_output = sorted(new_list)
-    ALL_SEQUENCE_BUFFER[item_tuple] = sorted_output
+    # Generate the combinations (already in sorted order) and add them to the buffer.
+    sorted_output = list(iter_sequence_combinations(current_list, check_types, max_output_size))
+    ALL_SEQUENCE_BUFFER[buffer_key] = sorted_output
     return sorted_output
 
 
-def get_combination_id(input_string, item_list, num_digits=4, print_combos=False, N=len(CHARACTERS)):
+def get_sequence_universe(current_list, check_types=True):
+    """
+    Get the sorted items and type flags that get_sequence_combinations builds its combinations from.
+
+    Args:
+        current_list (list): List of items to generate combinations from.
+        check_types (bool): True if combinations must contain exactly one type from TYPE_LIST_LOWER.
+
+    Returns:
+        tuple: (items, is_type) where items is the sorted list of unique, lowercase items and is_type
+            is a list of bools marking which of those items are in TYPE_LIST_LOWER.
+    """
+    items = set(cl.lower().strip() for cl in current_list)
+    if check_types:
+        # The types always seed the combinations, even if they are not in the input list.
+        items.update(TYPE_LIST_LOWER)
+    items = sorted(items)
+    type_set = set(TYPE_LIST_LOWER) if check_types else set()
+    return items, [item in type_set for item in items]
+
+
+def count_sequence_completions(num_types, size, types_left, others_left, check_types=True, max_output_size=6):
+    """
+    Count the combinations from get_sequence_combinations that start with a given prefix.
+
+    The prefix is described by how many types it contains and its size, and the items that can still
+    follow it (those sorting after its last item) by how many are types and how many are not.
+
+    Args:
+        num_types (int): Number of TYPE_LIST_LOWER items in the prefix.
+        size (int): Number of items in the prefix.
+        types_left (int): Number of type items that may still be added after the prefix.
+        others_left (int): Number of non-type items that may still be added after the prefix.
+        check_types (bool): True if combinations must contain exactly one type.
+        max_output_size (int): The maximum size of a combination.
+
+    Returns:
+        int: The number of valid combinations equal to or extending the prefix.
+    """
+    if size > max_output_size:
+        return 0
+    if check_types:
+        if num_types > 1:
+            return 0
+        if num_types == 1:
+            return sum(math.comb(others_left, a) for a in range(max_output_size - size + 1))
+        return types_left * sum(math.comb(others_left, a) for a in range(max_output_size - size))
+    total = sum(math.comb(types_left + others_left, a) for a in range(max_output_size - size + 1))
+    # The empty combination is never part of the output.
+    return total - 1 if size == 0 else total
+
+
+def get_sequence_rank(input_items, current_list, check_types=True, max_output_size=6):
+    """
+    Get the index of a combination in the output of get_sequence_combinations without generating it.
+
+    This uses combinatorial number system arithmetic over the sorted items: for every item in the
+    combination, it counts all combinations that sort before it by taking a smaller item at that position
+    (or by stopping early), so the result is identical to get_sequence_combinations(...).index(...).
+
+    Args:
+        input_items (list): The combination to rank (any order and case).
+        current_list (list): List of items the combinations are generated from.
+        check_types (bool): Same as get_sequence_combinations.
+        max_output_size (int): Same as get_sequence_combinations.
+
+    Returns:
+        int: The index of the combination.
+
+    Raises:
+        ValueError: If input_items is not one of the combinations.
+    """
+    items, is_type = get_sequence_universe(current_list, check_types)
+    combination = sorted(set(i.lower().strip() for i in input_items))
+    positions = {item: i for i, item in enumerate(items)}
+    if (not combination or len(combination) > max_output_size
+            or any(item not in positions for item in combination)
+            or (check_types and sum(is_type[positions[item]] for item in combination) != 1)):
+        raise ValueError(f"{combination} is not a valid combination of {items}")
+
+    # Number of type items at or after each index, used to count the items left after a prefix.
+    types_from = [0] * (len(items) + 1)
+    for i in range(len(items) - 1, -1, -1):
+        types_from[i] = types_from[i + 1] + is_type[i]
+
+    rank = 0
+    num_types, size, start = 0, 0, 0
+    for n, item in enumerate(combination):
+        index = positions[item]
+        # Every combination taking a smaller item at this position sorts first.
+        for other in range(start, index):
+            rank += count_sequence_completions(num_types + is_type[other], size + 1,
+                                               types_from[other + 1], len(items) - other - 1 - types_from[other + 1],
+                                               check_types, max_output_size)
+        num_types += is_type[index]
+        size += 1
+        start = index + 1
+        # A valid prefix is itself a combination and sorts before its extensions.
+        if n < len(combination) - 1 and count_sequence_completions(num_types, size, 0, 0, check_types, max_output_size):
+            rank += 1
+
+    return rank
+
+
+def get_sequence_from_rank(rank, current_list, check_types=True, max_output_size=6):
+    """
+    Get the combination at an index of the output of get_sequence_combinations without generating it.
+    This is the inverse of get_sequence_rank.
+
+    Args:
+        rank (int): The index of the combination.
+        current_list (list): List of items the combinations are generated from.
+        check_types (bool): Same as get_sequence_combinations.
+        max_output_size (int): Same as get_sequence_combinations.
+
+    Returns:
+        list: The sorted combination at the index.
+
+    Raises:
+        ValueError: If rank is out of range.
+    """
+    items, is_type = get_sequence_universe(current_list, check_types)
+    if rank < 0:
+        raise ValueError(f"Combination index {rank} is out of range")
+
+    types_from = [0] * (len(items) + 1)
+    for i in range(len(items) - 1, -1, -1):
+        types_from[i] = types_from[i + 1] + is_type[i]
+
+    combination = []
+    num_types, start = 0, 0
+    while True:
+        # The prefix itself is the first combination starting with it.
+        if combination and count_sequence_completions(num_types, len(combination), 0, 0, check_types, max_output_size):
+            if rank == 0:
+                return combination
+            rank -= 1
+        for index in range(start, len(items)):
+            count = count_sequence_completions(num_types + is_type[index], len(combination) + 1,
+                                               types_from[index + 1], len(items) - index - 1 - types_from[index + 1],
+                                               check_types, max_output_size)
+            if rank < count:
+                combination.append(items[index])
+                num_types += is_type[index]
+                start = index + 1
+                break
+            rank -= count
+        else:
+            raise ValueError("Combination index is out of range")
+
+
+def get_combination_id(input_string, item_list, num_digits=4, print_combos=False, N=len(CHARACTERS), check_types=True):
     """
     Generate a unique combination ID for a given input string based on predefined item combinations.
     
+    The ID is the index of the combination in get_sequence_combinations(item_list), computed directly
+    with get_sequence_rank so the full list of combinations never has to be generated.
+    
     Args:
         input_string (str): Comma-separated string of input items.
         item_list (list): List of available items to match against.
         num_digits (int, optional): Number of digits for the generated ID. Defaults to 3.
         print_combos (bool, optional): Whether to print all generated combinations. Defaults to False.
+        check_types (bool, optional): Same as get_sequence_combinations. Defaults to True.
     
     Returns:
         str: A unique base-N encoded combination ID.
@@ -499,15 +703,13 @@ def get_combination_id(input_string, item_list, num_digits=4, print_combos=False
     item_list = sorted(i.lower().strip() for i in item_list)
     input_items = sorted([s.strip().lower() for s in input_string.split(",")])    
     
-    all_combinations = get_sequence_combinations(item_list)
-
     # Use PRINT_ALL_SEQUENCES to prevent printing this multiple times.
     if not PRINT_ALL_SEQUENCES and print_combos:
-        for combo in all_combinations:
+        for combo in get_sequence_combinations(item_list, check_types):
             output_text(f"{combo}", "note")
         PRINT_ALL_SEQUENCES = True
         
-    index = all_combinations.index(input_items)
+    index = get_sequence_rank(input_items, item_list, check_types)
     
     # Fixed base-N conversion: encode full number, then truncate if needed
     result = ""
@@ -523,6 +725,48 @@ def get_combination_id(input_string, item_list, num_digits=4, print_combos=False
     elif len(result) > num_digits:
         ValueError(f"ERROR: Not enough digits assigned for combinations.")
     return result
+
+
+def get_combination_from_id(combination_id, item_list, N=len(CHARACTERS), check_types=True):
+    """
+    Decode a combination ID created by get_combination_id back into its items.
+    
+    Args:
+        combination_id (str): The base-N encoded combination ID.
+        item_list (list): List of available items the ID was generated from.
+        N (int): The base used for the ID.
+        check_types (bool, optional): Same as get_sequence_combinations. Defaults to True.
+    
+    Returns:
+        list: The sorted, lowercase items of the combination.
+    
+    Raises:
+        ValueError: If the ID contains invalid characters or is out of range.
+    """
+    return get_sequence_from_rank(baseN_to_int(combination_id, N), item_list, check_types)
+
+
+def baseN_to_int(value, N=len(CHARACTERS)):
+    """
+    Convert a base-N string written with CHARACTERS back into an integer.
+    
+    Args:
+        value (str): The base-N string (e.g., '04dG').
+        N (int): The base to use for the conversion.
+    
+    Returns:
+        int: The decoded integer.
+    
+    Raises:
+        ValueError: If value contains a character that is not a valid base-N digit.
+    """
+    result = 0
+    for char in value:
+        digit = CHARACTERS.find(char)
+        if digit < 0 or digit >= N:
+            raise ValueError(f"Invalid base-{N} character '{char}' in '{value}'")
+        result = result * N + digit
+    return result
     
     
 
@@ -627,13 +871,14 @@ def sn_in_list(serial_number, filename):
         return False
         
         
-def save_sn_to_list(serial_number, filename):
+def save_sn_to_list(serial_number, filename, durable=False):
     """
     Save a serial number to a text file, appending it as a new line.
     
     Args:
         serial_number (str): The serial number to save
         filename (str): Path to the file containing serial numbers
+        durable (bool): True to fsync the file so the serial number survives a crash.
         
     Returns:
         bool: True if save was successful, False otherwise
@@ -645,7 +890,554 @@ def save_sn_to_list(serial_number, filename):
     try:
         with open(filename, 'a') as file:  # 'a' mode appends to end of file
             file.write(f"{serial_number}\n")  # Add newline to maintain one SN per line
+            if durable:
+                file.flush()
+                os.fsync(file.fileno())
         return True
     except IOError as e:
         output_text(f"Saving serial number to file: {e}", "error")
         return False
+
+
+
+@contextlib.contextmanager
+def locked_file(filename):
+    """
+    Hold an exclusive advisory lock for a file while the with-block runs.
+    
+    The lock is taken on a separate '<filename>.lock' file, so the locked file itself can still be
+    replaced atomically. Every process that reads-then-writes a shared file (serial list, card list,
+    journal) should hold this lock. Locks are not re-entrant, so never nest locks on the same file.
+    On platforms without fcntl (Windows) no lock is taken.
+    
+    Args:
+        filename (str): The file to lock.
+    """
+    lock_path = f"{filename}.lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def append_csv_row(filename, row, header=None):
+    """
+    Append one semicolon-delimited row to a CSV file under an exclusive lock.
+    
+    The row is written with a single write call and fsync'd, so concurrent writers can never
+    interleave partial rows. The header is written first if the file does not exist or is empty.
+    
+    Args:
+        filename (str): Path to the CSV file.
+        row (list): The row values.
+        header (list, optional): The header to write to a new file.
+    
+    Returns:
+        bool: True if the row was saved, False otherwise.
+    """
+    try:
+        with locked_file(filename):
+            return write_csv_row(filename, row, header)
+    except IOError as e:
+        output_text(f"Saving row to {filename}: {e}", "error")
+        return False
+
+
+def write_csv_row(filename, row, header=None):
+    """
+    Append one semicolon-delimited row to a CSV file (the caller holds the file's lock, see append_csv_row).
+    
+    Args:
+        filename (str): Path to the CSV file.
+        row (list): The row values.
+        header (list, optional): The header to write to a new file.
+    
+    Returns:
+        bool: True if the row was saved, False otherwise.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';')
+    try:
+        if header is not None and (not os.path.isfile(filename) or os.path.getsize(filename) == 0):
+            writer.writerow(header)
+        writer.writerow(row)
+        with open(filename, 'a', newline='', encoding='utf-8') as f:
+            f.write(buffer.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+    except IOError as e:
+        output_text(f"Saving row to {filename}: {e}", "error")
+        return False
+
+
+def write_file_atomically(filename, text):
+    """
+    Replace the contents of a file so readers only ever see the old or the new contents.
+    
+    Args:
+        filename (str): Path to the file to replace.
+        text (str): The new contents.
+    """
+    temp_path = f"{filename}.tmp{os.getpid()}"
+    with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, filename)
+
+
+def get_card_data_from_row(row):
+    """
+    Convert a card list row into the card_data dictionary used by create_card and the serial engine.
+
+    Args:
+        row (list of str): A card list row with the columns of CARD_LIST_HEADER, in order.
+
+    Returns:
+        dict: The card data keyed by name, type, subtype, level, image, attack, defense, effect1, effect2,
+              serial, rarity, translucency, effect1_style and effect2_style.
+
+    Raises:
+        ValueError: If the row has the wrong number of columns.
+    """
+    if len(row) != len(CARD_LIST_HEADER):
+        raise ValueError(f"Row has {len(row)} columns, expected {len(CARD_LIST_HEADER)}")
+
+    name, card_type, subtypes, level, image, attack, defense, effect1, effect2, serial, rarity, translucency, effect1_style, effect2_style = row
+    return {
+        "name": name,
+        "type": card_type,
+        "subtype": subtypes if subtypes else "",
+        "level": level,
+        "image": image,
+        "attack": attack,
+        "defense": defense,
+        "effect1": effect1,
+        "effect2": effect2,
+        "serial": serial,
+        "rarity": rarity,
+        "translucency": translucency,
+        "effect1_style": effect1_style,
+        "effect2_style": effect2_style
+    }
+
+
+def card_list_has_serial(card_list_file, serial_number):
+    """
+    Check if any card in a card list CSV has the given serial number.
+    
+    Args:
+        card_list_file (str): Path to the semicolon-delimited card list.
+        serial_number (str): The serial number to look for.
+    
+    Returns:
+        bool: True if a row has the serial number in its SERIAL column, False otherwise.
+    """
+    try:
+        with open(card_list_file, 'r', newline='', encoding='utf-8') as f:
+            return any(row.get("SERIAL", "").strip() == serial_number 
+                       for row in csv.DictReader(f, delimiter=';'))
+    except FileNotFoundError:
+        return False
+
+
+def journal_card_begin(journal_file, serial_number, row, card_list_file):
+    """
+    Record that a card row is about to be appended to a card list.
+    
+    Together with journal_card_commit, this makes saving a card recoverable: if the process dies
+    between reserving a serial number and writing the card row, recover_card_journal finishes the save.
+    The entry records this process's id and host, so recovery never replays a save that is still running.
+    
+    Args:
+        journal_file (str): Path to the append-only journal.
+        serial_number (str): The (already reserved) serial number of the card.
+        row (list): The card row to be appended.
+        card_list_file (str): The card list the row is appended to.
+    """
+    entry = {"op": "begin", "serial": serial_number, "row": [str(r) for r in row], "card_list": card_list_file,
+             "pid": os.getpid(), "host": socket.gethostname()}
+    append_journal_entry(journal_file, entry)
+
+
+def journal_card_commit(journal_file, serial_number):
+    """
+    Record that the card row for a serial number was fully written.
+    
+    Args:
+        journal_file (str): Path to the append-only journal.
+        serial_number (str): The serial number passed to journal_card_begin.
+    """
+    append_journal_entry(journal_file, {"op": "commit", "serial": serial_number})
+
+
+def append_journal_entry(journal_file, entry):
+    """
+    Append one JSON entry to the journal and fsync it.
+    """
+    with locked_file(journal_file):
+        with open(journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def is_process_running(pid):
+    """
+    Check if a process with the given id is running on this machine.
+    
+    Args:
+        pid (int): The process id.
+    
+    Returns:
+        bool: True if the process exists.
+    """
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows, so ask for its exit code instead.
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_journal_save_running(entry):
+    """
+    Check if the save recorded by a journal "begin" entry may still be running in another session.
+    
+    Saves journaled on another machine are assumed to be running, as only that machine can tell.
+    Entries from this process id are from an earlier process that had the same id, as recovery runs
+    before this process saves anything.
+    
+    Args:
+        entry (dict): The journal entry (see journal_card_begin).
+    
+    Returns:
+        bool: True if the save must not be replayed.
+    """
+    pid = entry.get("pid")
+    if pid is None:
+        return False  # Journaled before sessions were recorded.
+    if entry.get("host") != socket.gethostname():
+        return True
+    return pid != os.getpid() and is_process_running(pid)
+
+
+def read_pending_journal_entries(journal_file):
+    """
+    Read the "begin" entries of a journal that have no matching "commit" (the caller holds the journal lock).
+    
+    Args:
+        journal_file (str): Path to the append-only journal.
+    
+    Returns:
+        dict: The pending entries keyed by serial number, in journal order.
+    """
+    pending = {}
+    try:
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A torn final line from a crash mid-write.
+                if entry.get("op") == "begin":
+                    pending[entry["serial"]] = entry
+                elif entry.get("op") == "commit":
+                    pending.pop(entry.get("serial"), None)
+    except FileNotFoundError:
+        pass
+    return pending
+
+
+def recover_card_journal(journal_file, serial_list_file):
+    """
+    Finish any card saves that were started but not committed by a session that is no longer running.
+    
+    For each unfinished save, the serial number is added to the serial list and the card row is
+    appended to its card list unless a row with that serial number already exists. Saves that are
+    still running in another session (see is_journal_save_running) are left in the journal; every
+    other entry is cleared.
+    
+    The journal lock is never held while the card list is locked, as saving a card takes the card list
+    lock before the journal lock.
+    
+    Args:
+        journal_file (str): Path to the append-only journal.
+        serial_list_file (str): Path to the serial list file.
+    
+    Returns:
+        list: The serial numbers of the recovered cards.
+    """
+    if not os.path.isfile(journal_file):
+        return []
+    
+    with locked_file(journal_file):
+        pending = read_pending_journal_entries(journal_file)
+    interrupted = {serial_number: entry for serial_number, entry in pending.items()
+                   if not is_journal_save_running(entry)}
+    
+    recovered = []
+    for serial_number, entry in interrupted.items():
+        get_serial_registry(serial_list_file).add(serial_number)
+        with locked_file(entry["card_list"]):
+            if not card_list_has_serial(entry["card_list"], serial_number):
+                write_csv_row(entry["card_list"], entry["row"], CARD_LIST_HEADER)
+        output_text(f"Recovered unfinished save of card {serial_number}", "warning")
+        recovered.append(serial_number)
+    
+    # Only the saves still running elsewhere are kept (they may have been committed in the meantime).
+    with locked_file(journal_file):
+        running = [entry for serial_number, entry in read_pending_journal_entries(journal_file).items()
+                   if serial_number not in interrupted]
+        write_file_atomically(journal_file, "".join(json.dumps(entry) + "\n" for entry in running))
+    return recovered
+
+
+class SerialRegistry:
+    """
+    An in-memory index of the serial numbers stored in a serial list file.
+
+    The file is read once into a set of serials and a map of serial prefix (the serial without its pad bit)
+    to the pad bits already used for it, so membership checks and finding the next free pad bit are O(1)
+    no matter how many cards exist. The file's modification time and size are checked before each lookup,
+    and the index is reloaded if the file was edited outside of the registry.
+    """
+
+    def __init__(self, filename):
+        """
+        Create a registry for a serial list file (which does not need to exist yet).
+
+        Args:
+            filename (str): Path to the file containing one serial number per line.
+        """
+        self.filename = filename
+        self.serials = set()
+        self.pad_bits = {}
+        self.file_state = None
+        self.reload()
+
+    def get_file_state(self):
+        """
+        Get the (mtime, size) of the serial list file, or None if it does not exist.
+        """
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self):
+        """
+        Re-read every serial number from the serial list file.
+        """
+        self.serials = set()
+        self.pad_bits = {}
+        self.file_state = self.get_file_state()
+        try:
+            with open(self.filename, 'r') as file:
+                for line in file:
+                    self.index_serial(line.strip())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            output_text(f"Error reading serial number list: {e}", "error")
+
+    def refresh(self):
+        """
+        Reload the serial numbers if the serial list file changed since it was last read.
+        """
+        if self.get_file_state() != self.file_state:
+            self.reload()
+
+    def index_serial(self, serial_number):
+        """
+        Add a serial number to the in-memory index only.
+        """
+        if not serial_number:
+            return
+        self.serials.add(serial_number)
+        self.pad_bits.setdefault(serial_number[:-1], set()).add(serial_number[-1])
+
+    def __contains__(self, serial_number):
+        self.refresh()
+        return serial_number.strip() in self.serials
+
+    def __len__(self):
+        self.refresh()
+        return len(self.serials)
+
+    def next_pad_bit(self, serial_prefix):
+        """
+        Get the first pad bit (in CHARACTERS order) not yet used for a serial number prefix.
+
+        Args:
+            serial_prefix (str): The serial number without its pad bit.
+
+        Returns:
+            str: The pad bit character.
+
+        Raises:
+            ValueError: If every pad bit is already used for this prefix.
+        """
+        self.refresh()
+        used = self.pad_bits.get(serial_prefix, ())
+        for pad_bit in CHARACTERS:
+            if pad_bit not in used:
+                return pad_bit
+        raise ValueError("No unique serial number available - all padding options exhausted")
+
+    def add(self, serial_number):
+        """
+        Save a serial number to the serial list file (see save_sn_to_list) and the index.
+
+        Args:
+            serial_number (str): The serial number to save.
+
+        Returns:
+            bool: True if the serial number is saved (or already was), False otherwise.
+        """
+        serial_number = serial_number.strip()
+        with locked_file(self.filename):
+            self.refresh()
+            if serial_number in self.serials:
+                return True
+            return self.append(serial_number)
+
+    def reserve(self, serial_prefix):
+        """
+        Atomically find the next free pad bit for a serial number prefix and save the full serial number.
+
+        The check and the save happen under an exclusive lock on the serial list, so concurrent processes
+        sharing the serial list can never be given the same serial number.
+
+        Args:
+            serial_prefix (str): The serial number without its pad bit.
+
+        Returns:
+            str: The reserved serial number.
+
+        Raises:
+            ValueError: If every pad bit is already used or the serial number could not be saved.
+        """
+        with locked_file(self.filename):
+            serial_number = serial_prefix + self.next_pad_bit(serial_prefix)
+            if not self.append(serial_number):
+                raise ValueError(f"Could not reserve serial number {serial_number}")
+        return serial_number
+
+    def append(self, serial_number):
+        """
+        Durably append a serial number to the file and the index (the caller holds the lock).
+        """
+        if not save_sn_to_list(serial_number, self.filename, durable=True):
+            return False
+        self.index_serial(serial_number)
+        # Our own append should not trigger a reload on the next lookup.
+        self.file_state = self.get_file_state()
+        return True
+
+
+def get_serial_registry(filename):
+    """
+    Get the shared SerialRegistry for a serial list file, creating it on first use.
+
+    Args:
+        filename (str): Path to the file containing one serial number per line.
+
+    Returns:
+        SerialRegistry: The registry for the file.
+    """
+    key = os.path.abspath(filename)
+    if key not in SERIAL_REGISTRY_BUFFER:
+        SERIAL_REGISTRY_BUFFER[key] = SerialRegistry(filename)
+    return SERIAL_REGISTRY_BUFFER[key]
+
+def build_alias_table(weights):
+    """
+    Build a Walker/Vose alias table for O(1) weighted sampling.
+
+    Args:
+        weights (list of float): Non-negative weights, one per item. Items with a weight
+            of zero are never drawn (unless every weight is zero, in which case the draw is uniform).
+
+    Returns:
+        tuple: (probabilities, aliases) lists of the same length as weights, to be used
+            with draw_from_alias_table. Returns ([], []) for an empty weights list.
+
+    Raises:
+        ValueError: If any weight is negative.
+    """
+    n = len(weights)
+    if n == 0:
+        return [], []
+    if any(w < 0 for w in weights):
+        raise ValueError("Alias table weights must be non-negative.")
+
+    total = float(sum(weights))
+    if total <= 0:
+        # Nothing to weight by, so every item is equally likely.
+        return [1.0] * n, list(range(n))
+
+    # Scale the weights so the average bucket holds exactly 1.0.
+    scaled = [w * n / total for w in weights]
+    probabilities = [0.0] * n
+    aliases = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+    # Pair each under-full bucket with an over-full one until all buckets are full.
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        probabilities[s] = scaled[s]
+        aliases[s] = l
+        scaled[l] = (scaled[l] + scaled[s]) - 1.0
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+
+    # Anything left over is full (up to floating point error).
+    for i in large + small:
+        probabilities[i] = 1.0
+
+    return probabilities, aliases
+
+
+def draw_from_alias_table(alias_table, rng=random):
+    """
+    Draw one index from an alias table created by build_alias_table in O(1) time.
+
+    Args:
+        alias_table (tuple): The (probabilities, aliases) pair returned by build_alias_table.
+        rng (random.Random, optional): The random number generator to use. Defaults to the random module.
+
+    Returns:
+        int: The drawn index.
+
+    Raises:
+        ValueError: If the alias table is empty.
+    """
+    probabilities, aliases = alias_table
+    if not probabilities:
+        raise ValueError("Cannot draw from an empty alias table.")
+    i = rng.randrange(len(probabilities))
+    return i if rng.random() < probabilities[i] else aliases[i]